@@ -0,0 +1,147 @@
+# benchmarks/bench_ann.py
+"""Recall-vs-latency harness for the approximate index options.
+
+Usage:
+    python benchmarks/bench_ann.py --store data/vectorstore [--k 10]
+    python benchmarks/bench_ann.py --synthetic 200000 [--dimension 384] [--k 10]
+
+With --store the vectors of a native store are indexed and queried with a
+fixed set of PL/SQL questions. With --synthetic a seeded, clustered corpus of
+the given size stands in for a larger code estate, queried with held-out
+points drawn from the same clusters. Every index is scored by recall@k
+against exact (flat) search on the same queries.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from plsql_rag_chat.lib.ingestion.ann import build_ann_index, configure_search, resolve_index_spec
+from plsql_rag_chat.lib.ingestion.native_store import NativeVectorStore
+from plsql_rag_chat.lib.ingestion.store import resolve_store_dir
+from plsql_rag_chat.lib.utils.helpers import get_embeddings
+
+QUESTIONS = [
+    "How does the engine generate legal moves?",
+    "Where is castling handled?",
+    "How is en passant detected?",
+    "Explain the alpha-beta search in QFind",
+    "How is the board converted to FEN?",
+    "How are pawn structures evaluated?",
+    "What does the opening book contain?",
+    "How is check detected?",
+    "How is a PGN move parsed?",
+    "Which routine scores king safety?",
+    "How are move lists sorted?",
+    "Where is the search depth controlled?",
+    "How does the interface run a game against the engine?",
+    "What is stored in the transposition table?",
+    "How is promotion handled?",
+    "How does the engine detect stalemate?",
+    "How is material balance computed?",
+    "Where are piece-square tables defined?",
+    "How are EPD test positions loaded?",
+    "What does the preprocessor do before evaluation?"
+]
+
+# (preset, query-time parameters, refine) to sweep; refine > 1 fetches that many
+# candidates per result and re-ranks them exactly, as NativeVectorStore does
+CONFIGS = [
+    ("flat", {}, 1),
+    ("ivf", {"nprobe": 1}, 1),
+    ("ivf", {"nprobe": 4}, 1),
+    ("ivf", {"nprobe": 16}, 1),
+    ("hnsw", {"efSearch": 16}, 1),
+    ("hnsw", {"efSearch": 64}, 1),
+    ("hnsw", {"efSearch": 256}, 1),
+    ("ivfpq", {"nprobe": 16}, 1),
+    ("ivfpq", {"nprobe": 16}, 4),
+]
+
+
+def load_store(store: Path):
+    vectorstore = NativeVectorStore.load_local(resolve_store_dir(store), get_embeddings())
+    vectors = np.asarray(vectorstore._vectors)
+    queries = np.asarray(vectorstore.embedding.embed_documents(QUESTIONS), dtype=np.float32)
+    return vectors, queries
+
+
+def synthetic(count: int, dimension: int, queries: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(count // 500, 1), dimension)).astype(np.float32)
+    labels = rng.integers(len(centers), size=count + queries)
+    points = centers[labels] + 0.35 * rng.normal(size=(count + queries, dimension)).astype(np.float32)
+    return points[:count], points[count:]
+
+
+def timed_search(index: faiss.Index, queries: np.ndarray, k: int,
+                 vectors: np.ndarray = None, refine: int = 1):
+    found = np.full((len(queries), k), -1, dtype=np.int64)
+    latencies = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids = index.search(query[np.newaxis, :], k * refine)
+        ids = ids[0][ids[0] >= 0]
+        if refine > 1:
+            distances = ((vectors[ids] - query) ** 2).sum(axis=1)
+            ids = ids[np.argsort(distances)]
+        latencies.append(time.perf_counter() - start)
+        found[i, :min(k, len(ids))] = ids[:k]
+    return found, np.array(latencies) * 1000
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--store", type=Path, help="Native vector store directory")
+    source.add_argument("--synthetic", type=int, help="Size of a synthetic clustered corpus")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.store:
+        vectors, queries = load_store(args.store)
+    else:
+        vectors, queries = synthetic(args.synthetic, args.dimension, args.queries)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count, dimension = vectors.shape
+    k = min(args.k, count)
+
+    exact = faiss.IndexFlatL2(dimension)
+    exact.add(vectors)
+    truth, _ = timed_search(exact, queries, k)
+
+    print(f"{count} vectors x {dimension} dims, {len(queries)} queries, recall@{k}")
+    print(f"{'index':<22}{'params':<22}{'build s':>9}{'size MB':>9}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    built = {}
+    for preset, params, refine in CONFIGS:
+        if preset not in built:
+            start = time.perf_counter()
+            index = exact if preset == "flat" else build_ann_index(vectors, preset)
+            built[preset] = (index, time.perf_counter() - start)
+        index, build_seconds = built[preset]
+        if index is None:
+            print(f"{preset:<22}{'-':<22}  not buildable for this corpus size")
+            continue
+        configure_search(index, params)
+        found, latencies = timed_search(index, queries, k, vectors, refine)
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+        label = ",".join(f"{name}={value}" for name, value in params.items()) or "-"
+        if refine > 1:
+            label += f",refine={refine}"
+        print(f"{resolve_index_spec(preset, count, dimension):<22}{label:<22}{build_seconds:>9.2f}"
+              f"{size_mb:>9.1f}{recall_at_k(found, truth):>8.3f}"
+              f"{np.percentile(latencies, 50):>9.3f}{np.percentile(latencies, 95):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
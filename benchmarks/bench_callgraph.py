@@ -0,0 +1,89 @@
+# benchmarks/bench_callgraph.py
+"""Call-graph expansion versus a larger k for questions about a routine.
+
+Usage:
+    python benchmarks/bench_callgraph.py --store /tmp/store [--k 3] [--expand-k 2]
+
+Build the store first with the current ingestion, which writes the call graph:
+
+    plsql-rag-ingest --store /tmp/store --metadata /tmp/store.json --full
+
+For every routine that calls others, asks "how does <its name in words> work"
+through hybrid search with k, with k + expand-k, and with k followed by
+one-hop expansion along call edges. Reports how often the routine itself is
+retrieved, the share of its first expand-k callees retrieved alongside it,
+the context tokens, and the time per question; the time of expansion alone
+is given separately.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from plsql_rag_chat.config.settings import MODEL_PARAMS
+from plsql_rag_chat.lib.retrieval.callgraph import CallGraphRetriever
+from plsql_rag_chat.lib.retrieval.tokenizer import split_identifier
+from plsql_rag_chat.lib.utils.helpers import _build_retriever, load_call_graph, load_lexical_index, load_vectorstore
+
+
+def routines_of(docs, call_graph) -> set:
+    return {
+        int(node) for doc in docs
+        for node in call_graph.routines_in(doc.metadata.get("file_name"), doc.metadata.get("start_index"))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, required=True)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--expand-k", type=int, default=2)
+    args = parser.parse_args()
+
+    vectorstore = load_vectorstore(args.store)
+    lexical_index = load_lexical_index(args.store)
+    call_graph = load_call_graph(args.store)
+    if call_graph is None:
+        raise SystemExit(f"{args.store} has no call graph; re-run ingestion")
+
+    def hybrid(k: int):
+        return _build_retriever(vectorstore, {**MODEL_PARAMS, "retrieval_k": k}, lexical_index)
+
+    setups = [
+        (f"k={args.k}", hybrid(args.k)),
+        (f"k={args.k + args.expand_k}", hybrid(args.k + args.expand_k)),
+        (f"k={args.k} + calls", CallGraphRetriever(
+            retriever=hybrid(args.k), vectorstore=vectorstore, call_graph=call_graph, max_chunks=args.expand_k
+        ))
+    ]
+    callers = [node for node in range(len(call_graph)) if len(call_graph.callees(node))]
+    print(f"{len(call_graph)} routines, {call_graph.edges} call edges, {len(callers)} routines with callees")
+    print(f"{'':<16}{'routine':>9}{'callees':>9}{'tokens':>8}{'p50 ms':>8}")
+
+    for label, retriever in setups:
+        found, covered, tokens, times = 0, [], [], []
+        for node in callers:
+            name = call_graph.nodes[node].split(".")[-1]
+            start = time.perf_counter()
+            docs = retriever.invoke(f"how does {' '.join(split_identifier(name))} work")
+            times.append((time.perf_counter() - start) * 1000)
+            tokens.append(sum(doc.metadata.get("tokens", 0) for doc in docs))
+            retrieved = routines_of(docs, call_graph)
+            if node in retrieved:
+                found += 1
+                callees = [int(c) for c in call_graph.callees(node)[:args.expand_k]]
+                covered.append(sum(c in retrieved for c in callees) / len(callees))
+        print(f"{label:<16}{found / len(callers):>9.0%}{np.mean(covered) if covered else 0:>9.0%}"
+              f"{np.mean(tokens):>8.0f}{np.percentile(times, 50):>8.2f}")
+
+    keys = [(doc.metadata["file_name"], doc.metadata["start_index"]) for doc in setups[0][1].invoke("move generation")]
+    start = time.perf_counter()
+    for _ in range(1000):
+        call_graph.expand(keys, args.expand_k)
+    print(f"one-hop expansion of {len(keys)} hits: {(time.perf_counter() - start) * 1000:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
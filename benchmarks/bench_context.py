@@ -0,0 +1,77 @@
+# benchmarks/bench_context.py
+"""Prompt sizes of the plain "stuff" chain versus packed context.
+
+Usage:
+    python benchmarks/bench_context.py [--store data/vectorstore] [--k 6] [--context-length 2048]
+
+For each question the retriever's chunks are rendered into the answer prompt
+as-is and after ContextPacker has deduplicated, merged and budgeted them.
+Reported are prompt tokens (estimated), how many prompts exceed the context
+length less the answer reserve, and how many chunks were merged or dropped.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from plsql_rag_chat.config.settings import CONTEXT_CONFIG, MODEL_PARAMS, SYSTEM_PROMPTS, VECTOR_STORE_PATH
+from plsql_rag_chat.lib.utils.context import ContextPacker
+from plsql_rag_chat.lib.utils.helpers import get_retriever, load_lexical_index, load_vectorstore
+from plsql_rag_chat.lib.utils.tokens import estimate_tokens
+
+QUESTIONS = [
+    "How does the engine generate legal moves?",
+    "Where is castling handled?",
+    "How is en passant detected?",
+    "Explain the alpha-beta search in QFind",
+    "How is the board converted to FEN?",
+    "How are pawn structures evaluated?",
+    "What does the opening book contain?",
+    "How is check detected?",
+    "How is a PGN move parsed?",
+    "How are move lists sorted?",
+    "Where is the search depth controlled?",
+    "How is promotion handled?"
+]
+
+TEMPLATE = SYSTEM_PROMPTS["chess_expert"] + "\n\nContext: {context}\n\nQuestion: {question}\n\nDetailed Answer:"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, default=VECTOR_STORE_PATH)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--context-length", type=int, default=MODEL_PARAMS["context_length"])
+    args = parser.parse_args()
+
+    vectorstore = load_vectorstore(args.store)
+    retriever = get_retriever(vectorstore, {**MODEL_PARAMS, "retrieval_k": args.k}, load_lexical_index(args.store))
+    packer = ContextPacker(args.context_length, CONTEXT_CONFIG["answer_tokens"])
+    limit = packer.budget()
+
+    plain, packed, merged, dropped = [], [], 0, 0
+    for question in QUESTIONS:
+        docs = retriever.invoke(question)
+        overhead = estimate_tokens(TEMPLATE.format(context="", question=question))
+        passages = packer.merge(docs)
+        kept = packer.pack(docs, overhead)
+        merged += len(docs) - len(passages)
+        dropped += len(passages) - len(kept)
+        plain.append(estimate_tokens(TEMPLATE.format(
+            context="\n\n".join(d.page_content for d in docs), question=question)))
+        packed.append(estimate_tokens(TEMPLATE.format(
+            context="\n\n".join(d.page_content for d in kept), question=question)))
+
+    plain, packed = np.array(plain), np.array(packed)
+    print(f"{len(QUESTIONS)} questions, k={args.k}, context length {args.context_length}, "
+          f"{CONTEXT_CONFIG['answer_tokens']} tokens reserved for the answer")
+    print(f"{'':<8}{'mean':>8}{'p95':>8}{'max':>8}{'over budget':>13}")
+    for label, tokens in (("plain", plain), ("packed", packed)):
+        print(f"{label:<8}{tokens.mean():>8.0f}{np.percentile(tokens, 95):>8.0f}{tokens.max():>8}"
+              f"{int((tokens > limit).sum()):>13}")
+    print(f"chunks merged into neighbours: {merged}, passages dropped for budget: {dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_embedding_quality.py
+"""Retrieval quality and cost of the local embedders.
+
+Usage:
+    python benchmarks/bench_embedding_quality.py [--packages DIR] [--dimension 384] [--k 5]
+
+Chunks the sample packages like ingestion does and embeds them with
+SimpleHashEmbeddings and HashingEmbeddings, then runs two searches by cosine
+similarity:
+
+- "by name": for every routine, the question "how does <its name in words>
+  work" should find a chunk of that routine;
+- "similar": every piece of a routine split over several chunks should find
+  another piece of the same routine.
+
+Reports recall@k, mean reciprocal rank, embedding throughput and the share of
+non-zero vector components.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from plsql_rag_chat.lib.embeddings.hash_embeddings import SimpleHashEmbeddings
+from plsql_rag_chat.lib.embeddings.hashing_embeddings import HashingEmbeddings
+from plsql_rag_chat.lib.ingestion.chunker import RoutineChunker
+from plsql_rag_chat.lib.ingestion.parser import PLSQLParser
+from plsql_rag_chat.lib.retrieval.tokenizer import split_identifier
+
+DEFAULT_PACKAGES = Path(__file__).resolve().parent.parent / "notebooks" / "documents" / "packages"
+
+
+def load_chunks(packages_dir: Path) -> List[Dict]:
+    chunks = []
+    chunker = RoutineChunker()
+    for path in sorted(packages_dir.glob("*.pk[sb]")):
+        content = path.read_text(encoding="latin1")
+        parsed = PLSQLParser.parse_package(content)
+        chunks.extend(chunker.chunk(content, parsed["routines"]))
+    return chunks
+
+
+def name_queries(chunks: List[Dict]) -> List[Tuple[str, set]]:
+    relevant: Dict[str, set] = {}
+    for i, chunk in enumerate(chunks):
+        if chunk["routine"]:
+            relevant.setdefault(chunk["routine"].upper(), set()).add(i)
+    return [(f"how does {' '.join(split_identifier(name))} work", rows) for name, rows in sorted(relevant.items())]
+
+
+def piece_queries(chunks: List[Dict]) -> List[Tuple[int, set]]:
+    pieces: Dict[str, set] = {}
+    for i, chunk in enumerate(chunks):
+        if chunk["routine"] and chunk["parts"] > 1:
+            pieces.setdefault(chunk["routine"].upper(), set()).add(i)
+    return [(i, rows - {i}) for rows in pieces.values() if len(rows) > 1 for i in sorted(rows)]
+
+
+def score(similarities: np.ndarray, relevant: List[set], k: int) -> Tuple[float, float]:
+    order = np.argsort(-similarities, axis=1, kind="stable")
+    hits, reciprocal = 0, 0.0
+    for ranking, rows in zip(order, relevant):
+        ranks = [r for r, row in enumerate(ranking) if row in rows]
+        if ranks:
+            hits += ranks[0] < k
+            reciprocal += 1.0 / (ranks[0] + 1)
+    return hits / len(relevant), reciprocal / len(relevant)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=Path, default=DEFAULT_PACKAGES)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.packages)
+    texts = [chunk["text"] for chunk in chunks]
+    by_name = name_queries(chunks)
+    similar = piece_queries(chunks)
+    print(f"{len(chunks)} chunks, {len(by_name)} routine names, {len(similar)} split-routine pieces, "
+          f"dimension {args.dimension}")
+    print(f"{'':<22}{'name R@' + str(args.k):>10}{'name MRR':>10}{'sim R@' + str(args.k):>10}{'sim MRR':>10}"
+          f"{'chunks/s':>10}{'nonzero':>9}")
+
+    for embeddings in (SimpleHashEmbeddings(dimension=args.dimension), HashingEmbeddings(dimension=args.dimension)):
+        start = time.perf_counter()
+        matrix = embeddings.embed_documents_array(texts)
+        elapsed = time.perf_counter() - start
+
+        queries = embeddings.embed_documents_array([question for question, _ in by_name])
+        name_recall, name_mrr = score(queries @ matrix.T, [rows for _, rows in by_name], args.k)
+
+        rows = [i for i, _ in similar]
+        similarities = matrix[rows] @ matrix.T
+        similarities[np.arange(len(rows)), rows] = -np.inf
+        sim_recall, sim_mrr = score(similarities, [others for _, others in similar], args.k)
+
+        print(f"{type(embeddings).__name__:<22}{name_recall:>10.2f}{name_mrr:>10.2f}{sim_recall:>10.2f}"
+              f"{sim_mrr:>10.2f}{len(texts) / elapsed:>10.0f}{np.count_nonzero(matrix) / matrix.size:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# benchmarks/bench_embeddings.py
+"""Compare the per-text and batched SimpleHashEmbeddings paths.
+
+Usage:
+    python benchmarks/bench_embeddings.py [--packages DIR] [--repeat N]
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from plsql_rag_chat.lib.embeddings.hash_embeddings import SimpleHashEmbeddings
+
+DEFAULT_PACKAGES = Path(__file__).resolve().parent.parent / "notebooks" / "documents" / "packages"
+
+
+def load_splits(packages_dir: Path, chunk_size: int = 500, overlap: int = 50) -> List[str]:
+    """Cut every package into fixed-size overlapping windows, like the preprocessor"""
+    splits = []
+    step = chunk_size - overlap
+    for path in sorted(packages_dir.glob("*.pk[sb]")):
+        text = path.read_text(encoding="latin1")
+        splits.extend(text[i:i + chunk_size] for i in range(0, len(text), step))
+    return splits
+
+
+def best_of(func, repeat: int) -> float:
+    """Return the fastest wall-clock time of `repeat` runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=Path, default=DEFAULT_PACKAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+
+    texts = load_splits(args.packages)
+    embeddings = SimpleHashEmbeddings(dimension=args.dimension)
+    print(f"{len(texts)} splits from {args.packages}")
+
+    loop = best_of(lambda: [embeddings._hash_text(t) for t in texts], args.repeat)
+    batch_list = best_of(lambda: embeddings.embed_documents(texts), args.repeat)
+    batch_array = best_of(lambda: embeddings.embed_documents_array(texts), args.repeat)
+
+    reference = np.array([embeddings._hash_text(t) for t in texts], dtype=np.float32)
+    max_diff = float(np.abs(reference - embeddings.embed_documents_array(texts)).max())
+
+    print(f"per-text loop        : {loop * 1000:8.2f} ms")
+    print(f"batched (list)       : {batch_list * 1000:8.2f} ms  ({loop / batch_list:5.1f}x)")
+    print(f"batched (ndarray)    : {batch_array * 1000:8.2f} ms  ({loop / batch_array:5.1f}x)")
+    print(f"max abs difference   : {max_diff:.3g}")
+
+
+if __name__ == "__main__":
+    main()
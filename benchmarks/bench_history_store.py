@@ -0,0 +1,87 @@
+# benchmarks/bench_history_store.py
+"""Write and reopen costs of the persistent chat history.
+
+Usage:
+    python benchmarks/bench_history_store.py [--sessions 20] [--turns 500] [--page-size 20]
+
+Appends --turns question/answer pairs to each of --sessions sessions, once
+committing every message as it arrives and once through ChatHistoryStore's
+batched writer, then times reopening a session: the store's latest page
+against reading the whole conversation.
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from plsql_rag_chat.lib.utils.history_store import HISTORY_FILE, ChatHistoryStore
+
+ANSWER = "The move generator walks the board table and collects pseudo-legal moves. " * 8
+
+
+def append_unbatched(path: Path, sessions, turns: int) -> float:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE messages (session_id TEXT, seq INTEGER, role TEXT, content TEXT, created REAL, "
+                 "PRIMARY KEY (session_id, seq))")
+    start = time.perf_counter()
+    for session_id in sessions:
+        for turn in range(turns):
+            for seq, role, content in ((2 * turn, "user", f"question {turn}"), (2 * turn + 1, "assistant", ANSWER)):
+                with conn:
+                    conn.execute("INSERT INTO messages VALUES (?, ?, ?, ?, ?)",
+                                 (session_id, seq, role, content, time.time()))
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def append_batched(store: ChatHistoryStore, sessions, turns: int):
+    start = time.perf_counter()
+    for session_id in sessions:
+        for turn in range(turns):
+            store.append(session_id, "user", f"question {turn}")
+            store.append(session_id, "assistant", ANSWER, {"sources": ["PL_PIG_CHESS_ENGINE"]})
+    appended = time.perf_counter() - start
+    store.flush()
+    return appended, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp())
+    sessions = [ChatHistoryStore.new_session_id() for _ in range(args.sessions)]
+    messages = args.sessions * args.turns * 2
+
+    unbatched = append_unbatched(directory / "unbatched.db", sessions, args.turns)
+    store = ChatHistoryStore(directory / HISTORY_FILE)
+    appended, batched = append_batched(store, sessions, args.turns)
+    print(f"{messages} messages in {args.sessions} sessions")
+    print(f"commit per message   {unbatched:8.2f} s  {unbatched / messages * 1e6:8.1f} us/message")
+    print(f"batched writer       {batched:8.2f} s  {batched / messages * 1e6:8.1f} us/message"
+          f"  (caller blocked {appended / messages * 1e6:.1f} us/message)")
+
+    probes = sessions[::max(len(sessions) // 50, 1)]
+    page, full = [], []
+    for session_id in probes:
+        start = time.perf_counter()
+        store.page(session_id, limit=args.page_size)
+        page.append((time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        store.page(session_id, limit=args.turns * 2)
+        full.append((time.perf_counter() - start) * 1000)
+    print(f"reopen, latest page  p50 {np.percentile(page, 50):7.2f} ms  ({args.page_size} messages)")
+    print(f"reopen, all messages p50 {np.percentile(full, 50):7.2f} ms  ({args.turns * 2} messages)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_import_time.py
+"""Cold import time of the app's entry points; fails when startup regresses.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 3] [--top 8] [--scale 1.0]
+
+Imports each entry point in a fresh interpreter under `python -X importtime`
+and keeps the fastest of --repeat runs. A check fails, and the script exits
+with status 1, when an import takes longer than its budget (multiplied by
+--scale on slower machines) or loads a module that should only be loaded on
+first use: LangChain chains, FAISS, the AWS SDK and LangSmith.
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded once the assistant is initialized or a provider is chosen, never at startup
+DEFERRED = ("langchain.chains", "langchain_community", "faiss", "boto3", "langsmith")
+
+# Entry point, budget in ms, modules it must not import
+TARGETS = [
+    ("plsql_rag_chat.config.settings", 60, DEFERRED + ("dotenv", "langchain_core", "numpy")),
+    ("plsql_rag_chat.lib.utils.history_store", 100, DEFERRED + ("langchain_core",)),
+    ("plsql_rag_chat.lib.utils.helpers", 400, DEFERRED),
+    ("plsql_rag_chat.app", 1000, DEFERRED)
+]
+
+
+def import_time(module: str) -> Tuple[float, Dict[str, Tuple[float, float]]]:
+    """Total ms to import `module`, and (self ms, cumulative ms) of every module it loaded"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(own) / 1000, int(cumulative) / 1000)
+    return modules[module][1], modules
+
+
+def deferred_loaded(modules: Dict[str, Tuple[float, float]], deferred: Tuple[str, ...]) -> List[str]:
+    return sorted({
+        prefix for prefix in deferred for name in modules
+        if name == prefix or name.startswith(prefix + ".")
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--scale", type=float, default=1.0)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<42}{'best ms':>9}{'budget':>9}  heaviest packages (self ms)")
+    for module, budget, deferred in TARGETS:
+        runs = [import_time(module) for _ in range(args.repeat)]
+        total, modules = min(runs, key=lambda run: run[0])
+
+        packages: Dict[str, float] = {}
+        for name, (own, _) in modules.items():
+            top_level = name.split(".")[0]
+            packages[top_level] = packages.get(top_level, 0.0) + own
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        print(f"{module:<42}{total:>9.0f}{budget * args.scale:>9.0f}  "
+              + ", ".join(f"{name} {ms:.0f}" for name, ms in heaviest))
+
+        if total > budget * args.scale:
+            failures.append(f"{module} took {total:.0f} ms, budget {budget * args.scale:.0f} ms")
+        loaded = deferred_loaded(modules, deferred)
+        if loaded:
+            failures.append(f"{module} imports {', '.join(loaded)} at startup")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
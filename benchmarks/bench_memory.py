@@ -0,0 +1,106 @@
+# benchmarks/bench_memory.py
+"""Size of the question-condensing prompt over a long chat session.
+
+Usage:
+    python benchmarks/bench_memory.py [--store data/vectorstore] [--turns 40] [--answer-words 300]
+
+One session asks --turns follow-up questions through the chat chain, once with
+the former five-turn window memory and once with ConversationMemory. A
+stand-in LLM answers with --answer-words words, echoes the question when asked
+to condense it and returns a short summary when asked to summarize, recording
+the estimated tokens of every condensing prompt.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain.memory import ConversationBufferWindowMemory
+from langchain_core.language_models.llms import LLM
+
+from plsql_rag_chat.config.settings import MODEL_PARAMS, VECTOR_STORE_PATH
+from plsql_rag_chat.lib.llm_handlers.base import BaseLLMHandler
+from plsql_rag_chat.lib.utils.helpers import (
+    create_chat_memory,
+    initialize_chat_chain,
+    load_lexical_index,
+    load_vectorstore
+)
+from plsql_rag_chat.lib.utils.tokens import estimate_tokens
+
+TOPICS = ["move generation", "castling", "en passant", "FEN export", "the opening book", "check detection",
+          "pawn evaluation", "the search depth", "promotion", "move ordering"]
+
+
+class RecordingLLM(LLM):
+    """Stand-in model that records the size of the condensing prompts"""
+
+    answer_words: int = 300
+    condense_tokens: List[int] = []
+    summaries: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        if "Standalone question:" in prompt:
+            self.condense_tokens.append(estimate_tokens(prompt))
+            return prompt.split("Follow Up Input:")[-1].split("Standalone question:")[0].strip()
+        if prompt.rstrip().endswith("New summary:"):
+            self.summaries += 1
+            return f"The user explored {self.summaries * 4} topics of the engine so far."
+        return " ".join(["procedure"] * self.answer_words)
+
+
+class RecordingHandler(BaseLLMHandler):
+    def __init__(self, llm: RecordingLLM):
+        self.llm = llm
+
+    def initialize_model(self, model_params: Dict[str, Any]) -> Any:
+        return self.llm
+
+    def health_check(self) -> bool:
+        return True
+
+    def get_available_models(self) -> List[str]:
+        return [MODEL_PARAMS["model_name"]]
+
+    def stream(self, prompt: str, model_params: Dict[str, Any], stop: Optional[List[str]] = None) -> Iterator[str]:
+        yield self.llm.invoke(prompt, stop=stop)
+
+
+def run(label: str, memory, vectorstore, lexical_index, turns: int, answer_words: int):
+    llm = RecordingLLM(answer_words=answer_words, condense_tokens=[])
+    chain = initialize_chat_chain(RecordingHandler(llm), vectorstore, MODEL_PARAMS, lexical_index, memory=memory)
+    start = time.perf_counter()
+    for turn in range(turns):
+        chain.invoke({"question": f"And how does turn {turn} relate to {TOPICS[turn % len(TOPICS)]}?"})
+    elapsed = time.perf_counter() - start
+    tokens = np.array(llm.condense_tokens)
+    print(f"{label:<10}{tokens[len(tokens) // 2]:>10}{tokens[-1]:>10}{tokens.max():>10}"
+          f"{llm.summaries:>11}{elapsed:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, default=VECTOR_STORE_PATH)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--answer-words", type=int, default=300)
+    args = parser.parse_args()
+
+    vectorstore = load_vectorstore(args.store)
+    lexical_index = load_lexical_index(args.store)
+
+    print(f"{args.turns} turns, answers of {args.answer_words} words; condensing prompt tokens")
+    print(f"{'':<10}{'midway':>10}{'last':>10}{'max':>10}{'summaries':>11}{'total s':>9}")
+    window = ConversationBufferWindowMemory(k=5, memory_key="chat_history", output_key="answer",
+                                            return_messages=True)
+    run("window", window, vectorstore, lexical_index, args.turns, args.answer_words)
+    run("summary", create_chat_memory(), vectorstore, lexical_index, args.turns, args.answer_words)
+
+
+if __name__ == "__main__":
+    main()
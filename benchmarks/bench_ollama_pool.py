@@ -0,0 +1,113 @@
+# benchmarks/bench_ollama_pool.py
+"""Connections opened and latency of concurrent sessions against a fake Ollama server.
+
+Usage:
+    python benchmarks/bench_ollama_pool.py [--sessions 16] [--rounds 5] [--tokens 20] [--token-ms 5]
+
+Each simulated session runs a health check, lists models and streams an
+answer, --rounds times, from its own thread. The pooled handler is compared
+with plain `requests` calls that open a connection each, as the handler did
+before. The asyncio variant runs the same sessions as coroutines on one
+event loop. The server reports how many TCP connections it accepted and how
+many generate requests it saw in flight at once.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from plsql_rag_chat.lib.llm_handlers.ollama_handler import OllamaHandler
+
+from fake_ollama import MODEL_NAME, FakeOllama
+
+PARAMS = {"model_name": MODEL_NAME, "temperature": 0.7, "context_length": 2048, "top_k": 40}
+
+
+def unpooled_session(url: str, rounds: int) -> list:
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        requests.get(f"{url}/api/tags", timeout=5)
+        requests.get(f"{url}/api/tags")
+        with requests.post(f"{url}/api/generate", json={"prompt": "q", **PARAMS}, stream=True) as response:
+            for line in response.iter_lines():
+                if line and json.loads(line).get("done"):
+                    break
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def pooled_session(handler: OllamaHandler, rounds: int) -> list:
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        handler.health_check()
+        handler.get_available_models()
+        "".join(handler.stream("q", PARAMS))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def async_session(handler: OllamaHandler, rounds: int) -> list:
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await handler.ahealth_check()
+        "".join([text async for text in handler.astream("q", PARAMS)])
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label: str, server: FakeOllama, latencies: list, elapsed: float):
+    latencies = np.concatenate(latencies) * 1000
+    print(f"{label:<10}{server.connections:>13}{server.max_in_flight:>10}{elapsed:>10.2f}"
+          f"{np.percentile(latencies, 50):>10.1f}{np.percentile(latencies, 95):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-ms", type=float, default=5)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.rounds} rounds, max concurrency {args.max_concurrency}")
+    print(f"{'client':<10}{'connections':>13}{'in flight':>10}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+
+    server = FakeOllama(args.tokens, args.token_ms / 1000).start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.sessions) as executor:
+        latencies = list(executor.map(lambda _: unpooled_session(server.url, args.rounds), range(args.sessions)))
+    report("requests", server, latencies, time.perf_counter() - start)
+    server.shutdown()
+
+    server = FakeOllama(args.tokens, args.token_ms / 1000).start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.sessions) as executor:
+        # One handler per session, as every Streamlit session builds its own
+        handlers = [OllamaHandler(server.url, max_concurrency=args.max_concurrency) for _ in range(args.sessions)]
+        latencies = list(executor.map(lambda handler: pooled_session(handler, args.rounds), handlers))
+    report("pooled", server, latencies, time.perf_counter() - start)
+    server.shutdown()
+
+    server = FakeOllama(args.tokens, args.token_ms / 1000).start()
+    handler = OllamaHandler(server.url, max_concurrency=args.max_concurrency)
+
+    async def run_async():
+        return await asyncio.gather(*(async_session(handler, args.rounds) for _ in range(args.sessions)))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run_async())
+    report("asyncio", server, latencies, time.perf_counter() - start)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_parser.py
+"""Compare the single-pass PL/SQL parser with the legacy routine regex.
+
+Usage:
+    python benchmarks/bench_parser.py [--packages DIR] [--repeat N]
+
+Besides the real packages, a synthetic input with unbalanced parameter lists
+shows how the legacy regex degrades quadratically while the parser stays linear.
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+from plsql_rag_chat.lib.ingestion.parser import PLSQLParser
+
+DEFAULT_PACKAGES = Path(__file__).resolve().parent.parent / "notebooks" / "documents" / "packages"
+
+# The routine pattern the notebook preprocessor used before the parser existed
+LEGACY_ROUTINE_PATTERN = re.compile(
+    r'(procedure|function)\s+(\w+)[^;]*?(\(.*?\))?\s*(return\s+\w+)?',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def legacy_parse(content: str) -> int:
+    return sum(1 for _ in LEGACY_ROUTINE_PATTERN.finditer(content))
+
+
+def parser_parse(content: str) -> int:
+    return len(PLSQLParser.parse_routines(content)[1])
+
+
+def best_of(func, content: str, repeat: int):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(content)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def synthetic_source(routines: int) -> str:
+    """Routine headers whose parameter lists are never closed"""
+    return "".join(f"PROCEDURE p{i}(a NUMBER\n" for i in range(routines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=Path, default=DEFAULT_PACKAGES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'file':<32}{'bytes':>9}{'regex ms':>10}{'hits':>6}{'parser ms':>11}{'hits':>6}")
+    total_regex = total_parser = 0.0
+    for path in sorted(args.packages.glob("*.pk[sb]")):
+        content = path.read_text(encoding="latin1")
+        regex_time, regex_hits = best_of(legacy_parse, content, args.repeat)
+        parser_time, parser_hits = best_of(parser_parse, content, args.repeat)
+        total_regex += regex_time
+        total_parser += parser_time
+        print(f"{path.name:<32}{len(content):>9}{regex_time * 1000:>10.2f}{regex_hits:>6}"
+              f"{parser_time * 1000:>11.2f}{parser_hits:>6}")
+    print(f"{'total':<41}{total_regex * 1000:>10.2f}{'':>6}{total_parser * 1000:>11.2f}")
+
+    print("\nunbalanced parameter lists (legacy regex rescans to end of input)")
+    print(f"{'routines':>9}{'bytes':>9}{'regex ms':>10}{'parser ms':>11}")
+    for routines in (500, 1000, 2000, 4000):
+        content = synthetic_source(routines)
+        regex_time, _ = best_of(legacy_parse, content, 1)
+        parser_time, _ = best_of(parser_parse, content, 1)
+        print(f"{routines:>9}{len(content):>9}{regex_time * 1000:>10.2f}{parser_time * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_partitions.py
+"""Package and category partitions versus searching every chunk.
+
+Usage:
+    python benchmarks/bench_partitions.py --store /tmp/store [--k 3]
+
+Build the store first with the current ingestion, which writes the partitions:
+
+    plsql-rag-ingest --store /tmp/store --metadata /tmp/store.json --full
+
+For every routine with a body, asks "how does <its name in words> work" and
+scopes it three ways: not at all, by the keyword classifier, and explicitly, as
+the sidebar does, to the routine's package or, for move generation, evaluation
+and notation routines, to its category.
+Reports the share of the store each question scans, how often the routine's
+definition is in the top k, the share of the top k inside the scope (the
+precision of a scoped question) and the time per question.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from plsql_rag_chat.config.settings import MODEL_PARAMS, get_settings
+from plsql_rag_chat.lib.ingestion.indexer import iter_store_documents
+from plsql_rag_chat.lib.ingestion.store import resolve_store_dir
+from plsql_rag_chat.lib.retrieval.partitions import CATEGORY_TERMS, PartitionedRetriever
+from plsql_rag_chat.lib.retrieval.symbols import SymbolIndex
+from plsql_rag_chat.lib.retrieval.tokenizer import split_identifier
+from plsql_rag_chat.lib.utils.helpers import (
+    _build_retriever,
+    load_lexical_index,
+    load_partition_index,
+    load_vectorstore
+)
+
+
+def covers(doc, routine) -> bool:
+    return (
+        doc.metadata.get("file_name") == routine["file_name"]
+        and doc.metadata.get("start_index", routine["end"]) < routine["end"]
+        and doc.metadata.get("end_index", routine["start"]) > routine["start"]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, required=True)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    vectorstore = load_vectorstore(args.store)
+    lexical_index = load_lexical_index(args.store)
+    partition_index = load_partition_index(args.store)
+    if partition_index is None:
+        raise SystemExit(f"{args.store} has no partitions; re-run ingestion")
+    symbol_index = SymbolIndex.load(resolve_store_dir(args.store.resolve()))
+    # Retrieved documents carry no ids; partitions hold store rows
+    rows_by_key = {
+        (doc.metadata.get("file_name"), doc.metadata.get("start_index")): row
+        for row, (_, doc) in enumerate(iter_store_documents(vectorstore))
+    }
+
+    print(f"{partition_index.size} chunks")
+    for name in partition_index.names:
+        print(f"  {name:<36}{len(partition_index.rows([name])):>6}"
+              f"{len(partition_index.rows([name])) / partition_index.size:>7.1%}")
+
+    params = {**MODEL_PARAMS, "retrieval_k": args.k}
+    everything = _build_retriever(vectorstore, params, lexical_index)
+
+    config = get_settings().retrieval
+
+    def scoped(partitions, routing):
+        return PartitionedRetriever(
+            retriever=everything,
+            vectorstore=vectorstore,
+            partition_index=partition_index,
+            lexical_index=lexical_index,
+            partitions=partitions,
+            routing=routing,
+            k=args.k,
+            fetch_k=config["fetch_k"],
+            rrf_k=config["rrf_k"],
+            vector_weight=config["vector_weight"],
+            lexical_weight=config["lexical_weight"]
+        )
+
+    _, routines = symbol_index.search(limit=100000)
+    definitions = [r for r in routines if r["has_body"] and r["start"] is not None]
+    routed = [r for r in definitions if r["category"] in CATEGORY_TERMS]
+    print(f"{len(definitions)} routines with a body, {len(routed)} in a routed category; top {args.k} chunks")
+
+    experiments = [
+        ("category", routed, lambda r: f"category:{r['category']}"),
+        ("package", definitions, lambda r: f"package:{r['package'].upper()}")
+    ]
+    for label, questions, scope_of in experiments:
+        print(f"{label} questions")
+        print(f"  {'':<14}{'scanned':>9}{'found':>8}{'in scope':>10}{'p50 ms':>8}")
+        setups = [
+            ("all chunks", lambda r: everything),
+            ("keywords", lambda r: scoped([], "keywords")),
+            ("sidebar", lambda r: scoped([scope_of(r)], "none"))
+        ]
+        for name, retriever_for in setups:
+            scanned, found, precision, times = [], 0, [], []
+            for routine in questions:
+                retriever = retriever_for(routine)
+                question = f"how does {' '.join(split_identifier(routine['name']))} work"
+                names = retriever.scope(question) if isinstance(retriever, PartitionedRetriever) else []
+                rows = partition_index.rows(names) if names else None
+                scanned.append(len(rows) / partition_index.size if rows is not None and len(rows) >= args.k else 1.0)
+                start = time.perf_counter()
+                docs = retriever.invoke(question)
+                times.append((time.perf_counter() - start) * 1000)
+                found += any(covers(doc, routine) for doc in docs)
+                inside = set(partition_index.rows([scope_of(routine)]).tolist())
+                precision.append(np.mean([
+                    rows_by_key.get((doc.metadata.get("file_name"), doc.metadata.get("start_index"))) in inside
+                    for doc in docs
+                ]) if docs else 0.0)
+            print(f"  {name:<14}{np.mean(scanned):>9.1%}{found / len(questions):>8.0%}"
+                  f"{np.mean(precision):>10.0%}{np.percentile(times, 50):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_response_cache.py
+"""Measure LLM calls and answer latency avoided by the response cache.
+
+Usage:
+    python benchmarks/bench_response_cache.py [--store data/vectorstore] [--sessions 5] [--llm-ms 800]
+
+Each session builds its own chat chain, as every browser tab of the app does,
+and asks the same questions. Only the first session should reach the LLM;
+later ones are answered from the cache shared by the process. A stand-in LLM sleeps for --llm-ms per call and counts its
+calls, so the run needs no model server.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.language_models.llms import LLM
+
+from plsql_rag_chat.config.settings import MODEL_PARAMS, VECTOR_STORE_PATH
+from plsql_rag_chat.lib.llm_handlers.base import BaseLLMHandler
+from plsql_rag_chat.lib.utils.helpers import (
+    get_response_cache,
+    initialize_chat_chain,
+    load_lexical_index,
+    load_vectorstore
+)
+
+QUESTIONS = [
+    "How does the engine generate legal moves?",
+    "Where is castling handled?",
+    "How is en passant detected?",
+    "How is the board converted to FEN?",
+    "What does the opening book contain?",
+    "How is check detected?"
+]
+
+
+class CountingLLM(LLM):
+    """Stand-in model that sleeps like a real one and counts its answers
+
+    Follow-up questions are condensed by echoing them unchanged, and the
+    memory's background summaries are answered with a fixed text, both without
+    delay and left out of `calls`, so only answers are counted.
+    """
+
+    latency: float = 0.8
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        if "Standalone question:" in prompt:
+            return prompt.split("Follow Up Input:")[-1].split("Standalone question:")[0].strip()
+        if "New summary:" in prompt:
+            return "Questions about the engine's code."
+        self.calls += 1
+        time.sleep(self.latency)
+        return f"Answer #{self.calls}"
+
+
+class CountingHandler(BaseLLMHandler):
+    def __init__(self, llm: CountingLLM):
+        self.llm = llm
+
+    def initialize_model(self, model_params: Dict[str, Any]) -> Any:
+        return self.llm
+
+    def health_check(self) -> bool:
+        return True
+
+    def get_available_models(self) -> List[str]:
+        return [MODEL_PARAMS["model_name"]]
+
+    def stream(self, prompt: str, model_params: Dict[str, Any], stop: Optional[List[str]] = None) -> Iterator[str]:
+        yield self.llm.invoke(prompt, stop=stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, default=VECTOR_STORE_PATH)
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--llm-ms", type=float, default=800)
+    args = parser.parse_args()
+
+    vectorstore = load_vectorstore(args.store)
+    lexical_index = load_lexical_index(args.store)
+    llm = CountingLLM(latency=args.llm_ms / 1000)
+    handler = CountingHandler(llm)
+
+    latencies = {"miss": [], "hit": []}
+    for session in range(args.sessions):
+        chain = initialize_chat_chain(handler, vectorstore, MODEL_PARAMS, lexical_index)
+        for question in QUESTIONS:
+            calls = llm.calls
+            start = time.perf_counter()
+            chain.invoke({"question": question})
+            elapsed = (time.perf_counter() - start) * 1000
+            latencies["miss" if llm.calls > calls else "hit"].append(elapsed)
+
+    asked = args.sessions * len(QUESTIONS)
+    print(f"{asked} questions over {args.sessions} sessions, stand-in LLM at {args.llm_ms:.0f} ms/call")
+    print(f"LLM calls: {llm.calls}, avoided: {asked - llm.calls}")
+    for kind, values in latencies.items():
+        if values:
+            print(f"{kind:<5} n={len(values):<4} p50 {np.percentile(values, 50):9.2f} ms"
+                  f"   p95 {np.percentile(values, 95):9.2f} ms")
+    cache = get_response_cache()
+    if cache is not None:
+        print(f"cache: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/bench_rewrite.py
+"""Per-stage latency of follow-up turns with and without the rewrite shortcut.
+
+Usage:
+    python benchmarks/bench_rewrite.py [--store data/vectorstore] [--rewrite-ms 600] [--answer-ms 1200]
+
+One chat session asks a mix of self-contained and follow-up questions, first
+with REWRITE_MODE=always (every follow-up is condensed by the LLM, as the
+stock chain does), then with "auto", then "auto" again in a new session with
+the same questions, which reuses cached rewrites. A stand-in LLM sleeps
+--rewrite-ms per condensing call and --answer-ms per answer. The response
+cache is disabled so every answer reaches the model.
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.language_models.llms import LLM
+
+from plsql_rag_chat.config.settings import MODEL_PARAMS, VECTOR_STORE_PATH, override_settings
+from plsql_rag_chat.lib.llm_handlers.base import BaseLLMHandler
+from plsql_rag_chat.lib.utils.helpers import (
+    get_rewrite_cache,
+    initialize_chat_chain,
+    load_lexical_index,
+    load_vectorstore
+)
+from plsql_rag_chat.lib.utils.timings import StageTimingHandler
+
+QUESTIONS = [
+    "How does the engine generate legal moves?",
+    "Where is castling handled in the move generator?",
+    "And what about en passant?",
+    "How is the board converted to FEN notation?",
+    "Why is it done that way?",
+    "How does the evaluation score pawn structures?",
+    "Which package contains the opening book?",
+    "Can you show more of it?",
+    "How is check detected after a move?",
+    "How does the search order candidate moves?"
+]
+
+
+class TimedLLM(LLM):
+    """Stand-in model with separate delays for condensing and answering"""
+
+    rewrite_latency: float = 0.6
+    answer_latency: float = 1.2
+    rewrites: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "timed"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+        if "Standalone question:" in prompt:
+            self.rewrites += 1
+            time.sleep(self.rewrite_latency)
+            return prompt.split("Follow Up Input:")[-1].split("Standalone question:")[0].strip()
+        time.sleep(self.answer_latency)
+        return "The move generator walks the board table."
+
+
+class TimedHandler(BaseLLMHandler):
+    def __init__(self, llm: TimedLLM):
+        self.llm = llm
+
+    def initialize_model(self, model_params: Dict[str, Any]) -> Any:
+        return self.llm
+
+    def health_check(self) -> bool:
+        return True
+
+    def get_available_models(self) -> List[str]:
+        return [MODEL_PARAMS["model_name"]]
+
+    def stream(self, prompt: str, model_params: Dict[str, Any], stop: Optional[List[str]] = None) -> Iterator[str]:
+        yield self.llm.invoke(prompt, stop=stop)
+
+
+def run(label: str, mode: str, vectorstore, lexical_index, args):
+    override_settings(rewrite={"mode": mode})
+    llm = TimedLLM(rewrite_latency=args.rewrite_ms / 1000, answer_latency=args.answer_ms / 1000)
+    chain = initialize_chat_chain(TimedHandler(llm), vectorstore, MODEL_PARAMS, lexical_index)
+    stages: Dict[str, List[float]] = {"rewrite": [], "retrieve": [], "answer": [], "total": []}
+    for question in QUESTIONS:
+        timer = StageTimingHandler()
+        chain.invoke({"question": question}, config={"callbacks": [timer]})
+        for stage, values in stages.items():
+            values.append(timer.timings.get(stage, 0.0) * 1000)
+    print(f"{label:<14}{llm.rewrites:>9}" + "".join(f"{np.mean(values):>11.0f}" for values in stages.values())
+          + f"{np.percentile(stages['total'], 95):>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, default=VECTOR_STORE_PATH)
+    parser.add_argument("--rewrite-ms", type=float, default=600)
+    parser.add_argument("--answer-ms", type=float, default=1200)
+    args = parser.parse_args()
+
+    override_settings(response_cache={"enabled": False})
+    vectorstore = load_vectorstore(args.store)
+    lexical_index = load_lexical_index(args.store)
+
+    print(f"{len(QUESTIONS)} turns, rewrite {args.rewrite_ms:.0f} ms, answer {args.answer_ms:.0f} ms; mean ms per turn")
+    print(f"{'':<14}{'rewrites':>9}{'rewrite':>11}{'retrieve':>11}{'answer':>11}{'total':>11}{'total p95':>11}")
+    run("always", "always", vectorstore, lexical_index, args)
+    get_rewrite_cache().clear()
+    run("auto", "auto", vectorstore, lexical_index, args)
+    run("auto, cached", "auto", vectorstore, lexical_index, args)
+    print(f"rewrite cache: {get_rewrite_cache().stats()}")
+
+
+if __name__ == "__main__":
+    main()
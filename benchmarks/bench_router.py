@@ -0,0 +1,107 @@
+# benchmarks/bench_router.py
+"""Load balancing and failover of the router over fake Ollama backends.
+
+Usage:
+    python benchmarks/bench_router.py [--backends 3] [--waves 6] [--users 8] [--tokens 20] [--token-ms 10]
+
+The last backend is three times slower than the others. Each wave sends
+--users concurrent prompts through one RouterHandler; after the second wave
+the first backend is shut down. The router should shift work away from the
+slow backend, fail over from the dead one without user-visible errors, and
+keep its circuit open.
+
+Then probes a Bedrock backend whose control-plane API is stubbed with
+botocore's Stubber: its circuit should stay closed while the configured model
+is found and open once the lookup fails.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from plsql_rag_chat.lib.llm_handlers.ollama_handler import OllamaHandler
+from plsql_rag_chat.lib.llm_handlers.router import RouterHandler
+
+from fake_ollama import MODEL_NAME, FakeOllama
+
+PARAMS = {"model_name": MODEL_NAME, "temperature": 0.7, "context_length": 2048, "top_k": 40}
+
+
+def user(router: RouterHandler, prompt: str):
+    start = time.perf_counter()
+    try:
+        "".join(router.stream(prompt, PARAMS))
+        return time.perf_counter() - start, None
+    except Exception as e:
+        return time.perf_counter() - start, e
+
+
+def probe_bedrock():
+    try:
+        from botocore.stub import Stubber
+        from plsql_rag_chat.lib.llm_handlers.bedrock_handler import BedrockHandler
+    except ImportError:
+        print("boto3 not installed; skipping the Bedrock probe")
+        return
+
+    handler = BedrockHandler(region="us-east-1", model_id="anthropic.claude-v2", pin_model=True)
+    router = RouterHandler([handler], probe_interval=0)
+    with Stubber(handler.control_client) as stubber:
+        for _ in range(2):
+            stubber.add_response(
+                "get_foundation_model",
+                {"modelDetails": {
+                    "modelArn": "arn:aws:bedrock:us-east-1::foundation-model/anthropic.claude-v2",
+                    "modelId": "anthropic.claude-v2"
+                }},
+                {"modelIdentifier": "anthropic.claude-v2"}
+            )
+        stubber.add_client_error("get_foundation_model", "ThrottlingException")
+        for label in ("healthy", "healthy", "unreachable"):
+            router.probe()
+            print(f"bedrock {label:<12}circuit {router.status()[0]['circuit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", type=int, default=3)
+    parser.add_argument("--waves", type=int, default=6)
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-ms", type=float, default=10)
+    args = parser.parse_args()
+
+    servers = [
+        FakeOllama(args.tokens, args.token_ms / 1000 * (3 if i == args.backends - 1 else 1)).start()
+        for i in range(args.backends)
+    ]
+    router = RouterHandler(
+        [OllamaHandler(server.url, connect_timeout=1) for server in servers],
+        failure_threshold=2,
+        cooldown=30,
+        probe_interval=0.5
+    )
+
+    print(f"{'wave':<6}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}   generations per backend")
+    with ThreadPoolExecutor(args.users) as executor:
+        for wave in range(args.waves):
+            if wave == 2:
+                servers[0].kill()
+                print(f"-- shut down {servers[0].url}")
+            results = list(executor.map(lambda i: user(router, f"question {wave}-{i}"), range(args.users)))
+            latencies = np.array([r[0] for r in results]) * 1000
+            errors = sum(r[1] is not None for r in results)
+            print(f"{wave:<6}{errors:>8}{np.percentile(latencies, 50):>10.0f}{np.percentile(latencies, 99):>10.0f}"
+                  f"   {[server.generations for server in servers]}")
+
+    router.close()
+    for status in router.status():
+        print(status)
+
+    probe_bedrock()
+
+
+if __name__ == "__main__":
+    main()
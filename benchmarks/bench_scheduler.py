@@ -0,0 +1,82 @@
+# benchmarks/bench_scheduler.py
+"""Latency of a burst of users with and without the generation scheduler.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--users 32] [--distinct 16] [--max-in-flight 4]
+                                         [--tokens 20] [--token-ms 10] [--contention 1.5]
+
+All users send their prompt at once to a fake Ollama server whose tokens slow
+down as more generations run together; only --distinct different prompts are
+used, so some users ask the same thing at the same moment. Without the
+scheduler every request goes straight to the server. With it, at most
+--max-in-flight generations run, the rest queue in order, and identical
+prompts share one generation.
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from plsql_rag_chat.lib.llm_handlers.ollama_handler import OllamaHandler
+from plsql_rag_chat.lib.llm_handlers.scheduler import GenerationScheduler, ScheduledHandler
+
+from fake_ollama import MODEL_NAME, FakeOllama
+
+PARAMS = {"model_name": MODEL_NAME, "temperature": 0.7, "context_length": 2048, "top_k": 40}
+
+
+def user(handler, prompt: str):
+    start = time.perf_counter()
+    first = None
+    for _ in handler.stream(prompt, PARAMS):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def run(label: str, server: FakeOllama, handler, users: int, distinct: int):
+    prompts = [f"question {i % distinct}" for i in range(users)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(users) as executor:
+        results = list(executor.map(lambda prompt: user(handler, prompt), prompts))
+    elapsed = time.perf_counter() - start
+    first = np.array([r[0] for r in results]) * 1000
+    total = np.array([r[1] for r in results]) * 1000
+    print(f"{label:<12}{server.generations:>8}{server.max_in_flight:>10}{elapsed:>9.2f}"
+          f"{np.percentile(first, 50):>10.0f}{np.percentile(first, 99):>10.0f}"
+          f"{np.percentile(total, 50):>10.0f}{np.percentile(total, 99):>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=16)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-ms", type=float, default=10)
+    parser.add_argument("--contention", type=float, default=1.5)
+    args = parser.parse_args()
+
+    print(f"{args.users} users, {args.distinct} distinct prompts, "
+          f"{args.tokens} tokens at {args.token_ms:.0f} ms x in_flight^{args.contention}")
+    print(f"{'':<12}{'calls':>8}{'in flight':>10}{'total s':>9}"
+          f"{'ttft p50':>10}{'ttft p99':>10}{'p50 ms':>10}{'p99 ms':>10}")
+
+    server = FakeOllama(args.tokens, args.token_ms / 1000, args.contention).start()
+    handler = OllamaHandler(server.url, max_connections=args.users, max_concurrency=args.users)
+    run("direct", server, handler, args.users, args.distinct)
+    server.shutdown()
+
+    server = FakeOllama(args.tokens, args.token_ms / 1000, args.contention).start()
+    handler = OllamaHandler(server.url, max_connections=args.users, max_concurrency=args.users)
+    scheduler = GenerationScheduler(handler.backend_id, max_in_flight=args.max_in_flight)
+    run("scheduled", server, ScheduledHandler(handler, scheduler), args.users, args.distinct)
+    server.shutdown()
+
+    print(f"scheduler: {scheduler.metrics()}")
+
+
+if __name__ == "__main__":
+    main()
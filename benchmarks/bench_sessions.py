@@ -0,0 +1,111 @@
+# benchmarks/bench_sessions.py
+"""Startup time and memory of many sessions initializing the assistant.
+
+Usage:
+    python benchmarks/bench_sessions.py [--store data/vectorstore] [--sessions 20]
+
+Each session does what "Initialize Assistant" does: get a handler, check the
+backend's health against a fake Ollama server, load the index and build its
+chat chain. "per session" builds everything anew every time, as the app used
+to; "shared" takes the handler, index and retriever from the resource
+registry. Afterwards one index file is touched to show that the next lookup
+loads the index again.
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from plsql_rag_chat.config.settings import LLM_CONFIG, MODEL_PARAMS, RESOURCE_CONFIG, VECTOR_STORE_PATH
+from plsql_rag_chat.lib.ingestion.store import resolve_store_dir
+from plsql_rag_chat.lib.utils.helpers import (
+    _load_lexical_index,
+    _load_vectorstore,
+    create_chat_memory,
+    get_llm_handler,
+    get_shared_llm_handler,
+    initialize_chat_chain,
+    is_backend_healthy,
+    load_lexical_index,
+    load_vectorstore,
+    resource_registry
+)
+
+from fake_ollama import MODEL_NAME, FakeOllama
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def per_session(config, store: Path):
+    handler = get_llm_handler(config)
+    handler.health_check()
+    vectorstore = _load_vectorstore(store)
+    lexical_index = _load_lexical_index(store)
+    return initialize_chat_chain(handler, vectorstore, MODEL_PARAMS, lexical_index, memory=create_chat_memory())
+
+
+def shared(config, store: Path):
+    handler = get_shared_llm_handler(config)
+    is_backend_healthy(handler)
+    vectorstore = load_vectorstore(store)
+    return initialize_chat_chain(handler, vectorstore, MODEL_PARAMS, load_lexical_index(store),
+                                 memory=create_chat_memory())
+
+
+def run(label: str, init, sessions: int, config, store: Path):
+    chains, times = [], []
+    before = rss_mb()
+    for _ in range(sessions):
+        start = time.perf_counter()
+        chains.append(init(config, store))
+        times.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<12}{times[0]:>10.0f}{np.percentile(times[1:], 50):>12.1f}{np.sum(times):>10.0f}"
+          f"{rss_mb() - before:>12.1f}")
+    return chains
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, default=VECTOR_STORE_PATH)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+
+    server = FakeOllama().start()
+    config = {**LLM_CONFIG, "provider": "ollama", "ollama_base_url": server.url, "model_name": MODEL_NAME}
+    # A private copy, so touching it below leaves the real index alone
+    store = Path(tempfile.mkdtemp()) / "vectorstore"
+    shutil.copytree(resolve_store_dir(args.store), store)
+
+    print(f"{args.sessions} sessions")
+    print(f"{'':<12}{'first ms':>10}{'next p50 ms':>12}{'total ms':>10}{'RSS +MB':>12}")
+    kept = run("per session", per_session, args.sessions, config, store)
+    kept += run("shared", shared, args.sessions, config, store)
+    print(f"registry: {resource_registry().stats()}")
+
+    first = load_vectorstore(store)
+    newest = max(store.glob("*"), key=lambda p: p.stat().st_mtime_ns)
+    os.utime(newest, ns=(time.time_ns(), time.time_ns()))
+    time.sleep(RESOURCE_CONFIG["check_interval"])
+    start = time.perf_counter()
+    second = load_vectorstore(store)
+    print(f"after touching {newest.name}: reloaded={second is not first} "
+          f"in {(time.perf_counter() - start) * 1000:.0f} ms; registry: {resource_registry().stats()}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
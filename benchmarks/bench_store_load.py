@@ -0,0 +1,86 @@
+# benchmarks/bench_store_load.py
+"""Compare opening a FAISS store with opening a native memory-mapped store.
+
+Usage:
+    python benchmarks/bench_store_load.py --faiss STORE_DIR --native STORE_DIR [--repeat N]
+
+Build the two stores first, for example:
+    plsql-rag-ingest --store /tmp/faiss --metadata /tmp/faiss.json --format faiss --docstore inline
+    plsql-rag-ingest --store /tmp/native --metadata /tmp/native.json --format native
+
+Each load runs in a fresh process. Private memory (RssAnon) is what every
+app worker pays separately; file-backed memory (RssFile) is page cache that
+all workers share.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+PROBE = r"""
+import json, sys, time
+from pathlib import Path
+
+def rss():
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("RssAnon", "RssFile"):
+                fields[key] = int(value.split()[0])
+    return fields
+
+from langchain_community.vectorstores import FAISS
+from plsql_rag_chat.lib.embeddings.hash_embeddings import SimpleHashEmbeddings
+from plsql_rag_chat.lib.ingestion.native_store import NativeVectorStore
+from plsql_rag_chat.lib.ingestion.store import resolve_store_dir
+
+kind, store = sys.argv[1], resolve_store_dir(Path(sys.argv[2]))
+embeddings = SimpleHashEmbeddings(dimension=384)
+before = rss()
+start = time.perf_counter()
+if kind == "faiss":
+    vectorstore = FAISS.load_local(str(store), embeddings, allow_dangerous_deserialization=True)
+else:
+    vectorstore = NativeVectorStore.load_local(store, embeddings)
+loaded = time.perf_counter()
+vectorstore.similarity_search("how are castling rights tracked", k=4)
+queried = time.perf_counter()
+after = rss()
+print(json.dumps({
+    "load_ms": (loaded - start) * 1000,
+    "query_ms": (queried - loaded) * 1000,
+    "anon_kb": after["RssAnon"] - before["RssAnon"],
+    "file_kb": after["RssFile"] - before["RssFile"]
+}))
+"""
+
+
+def measure(kind: str, store: str, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE, kind, store],
+            check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {key: min(run[key] for run in runs) for key in runs[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--faiss", required=True, help="FAISS store directory")
+    parser.add_argument("--native", required=True, help="Native store directory")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'store':<8}{'load ms':>10}{'1st query ms':>14}{'private KB':>12}{'shared KB':>11}")
+    for kind, store in (("faiss", args.faiss), ("native", args.native)):
+        result = measure(kind, store, args.repeat)
+        print(f"{kind:<8}{result['load_ms']:>10.2f}{result['query_ms']:>14.2f}"
+              f"{result['anon_kb']:>12}{result['file_kb']:>11}")
+
+
+if __name__ == "__main__":
+    main()
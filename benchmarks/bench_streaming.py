@@ -0,0 +1,71 @@
+# benchmarks/bench_streaming.py
+"""Time-to-first-token of streamed answers against a fake Ollama server.
+
+Usage:
+    python benchmarks/bench_streaming.py [--store data/vectorstore] [--tokens 200] [--token-ms 20]
+
+A local HTTP server speaks the streaming /api/generate protocol, emitting
+--tokens fragments --token-ms apart, and the real chat chain is run against
+it through OllamaHandler. Before streaming, users saw nothing until the
+whole answer was generated; now the first token is rendered on arrival.
+The response cache is disabled so that every question reaches the server.
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+import numpy as np
+
+from plsql_rag_chat.config.settings import MODEL_PARAMS, VECTOR_STORE_PATH
+from plsql_rag_chat.lib.llm_handlers.ollama_handler import OllamaHandler
+from plsql_rag_chat.lib.llm_handlers.streaming import TokenStreamHandler
+from plsql_rag_chat.lib.utils.helpers import initialize_chat_chain, load_lexical_index, load_vectorstore
+
+from fake_ollama import FakeOllama
+
+QUESTIONS = [
+    "How does the engine generate legal moves?",
+    "Where is castling handled?",
+    "How is en passant detected?",
+    "How is check detected?"
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, default=VECTOR_STORE_PATH)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--token-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    server = FakeOllama(args.tokens, args.token_ms / 1000).start()
+    handler = OllamaHandler(base_url=server.url)
+    assert handler.health_check()
+
+    vectorstore = load_vectorstore(args.store)
+    chain = initialize_chat_chain(handler, vectorstore, MODEL_PARAMS, load_lexical_index(args.store))
+
+    first, total, counts = [], [], []
+    for question in QUESTIONS:
+        received = []
+        callback = TokenStreamHandler(received.append)
+        start = time.perf_counter()
+        response = chain.invoke({"question": question}, config={"callbacks": [callback]})
+        total.append(time.perf_counter() - start)
+        first.append(callback.first_token_seconds)
+        counts.append(len(received))
+        assert "".join(received) == response["answer"]
+
+    server.shutdown()
+    print(f"{len(QUESTIONS)} questions, {args.tokens} tokens at {args.token_ms:.0f} ms each")
+    print(f"answer tokens streamed per question: {counts}")
+    print(f"time to first token  p50 {np.percentile(first, 50) * 1000:9.1f} ms")
+    print(f"time to full answer  p50 {np.percentile(total, 50) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_symbols.py
+"""Package explorer and exact routine lookup: metadata JSON versus symbol index.
+
+Usage:
+    python benchmarks/bench_symbols.py --store /tmp/store --metadata /tmp/store.json [--k 3] [--page-size 20]
+
+Build the store first with the current ingestion, which writes the symbol index:
+
+    plsql-rag-ingest --store /tmp/store --metadata /tmp/store.json --full
+
+"explorer" compares what the sidebar used to do on every initialization, load
+the metadata JSON and emit one code block per routine of every package, with
+opening the symbol index and reading one page of a prefix search. "lookup"
+asks "What does <ROUTINE> do?" for every routine with a body and reports how
+often the top `k` chunks include its definition, and the time per question,
+for the hybrid retriever and for the same retriever behind the symbol lookup.
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from plsql_rag_chat.config.settings import MODEL_PARAMS
+from plsql_rag_chat.lib.ingestion.store import resolve_store_dir
+from plsql_rag_chat.lib.retrieval.symbols import SymbolIndex, SymbolRetriever
+from plsql_rag_chat.lib.utils.helpers import _build_retriever, load_lexical_index, load_vectorstore
+
+
+def walk_metadata(metadata_path: Path) -> int:
+    with open(metadata_path, "r") as f:
+        metadata = json.load(f)
+    blocks = [
+        f"{routine.get('type', '').title()}: {routine.get('name', '')}({routine.get('parameters', '')})"
+        for package in metadata["packages"] for routine in package["routines"]
+    ]
+    return len(blocks)
+
+
+def explorer_page(store_dir: Path, prefix: str, page_size: int) -> int:
+    symbol_index = SymbolIndex.load(store_dir)
+    symbol_index.packages()
+    symbol_index.categories()
+    _, routines = symbol_index.search(prefix, limit=page_size)
+    symbol_index.close()
+    return len(routines)
+
+
+def best_ms(function, *args, repeat: int = 20) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", type=Path, required=True)
+    parser.add_argument("--metadata", type=Path, required=True)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+
+    store_dir = resolve_store_dir(args.store.resolve())
+    blocks = walk_metadata(args.metadata)
+    print(f"explorer: metadata {args.metadata.stat().st_size / 1024:.0f} KB, {blocks} routine blocks per render")
+    print(f"  json walk          {best_ms(walk_metadata, args.metadata):>8.2f} ms")
+    print(f"  symbol index page  {best_ms(explorer_page, store_dir, '', args.page_size):>8.2f} ms")
+    print(f"  prefix 'MOVE'      {best_ms(explorer_page, store_dir, 'MOVE', args.page_size):>8.2f} ms")
+
+    vectorstore = load_vectorstore(args.store)
+    symbol_index = SymbolIndex.load(store_dir)
+    hybrid = _build_retriever(vectorstore, {**MODEL_PARAMS, "retrieval_k": args.k}, load_lexical_index(args.store))
+    symbols = SymbolRetriever(retriever=hybrid, vectorstore=vectorstore, symbol_index=symbol_index)
+
+    _, routines = symbol_index.search(limit=100000)
+    definitions = [r for r in routines if r["has_body"] and r["chunk_ids"]]
+    print(f"lookup: {len(definitions)} routines with a body, top {args.k} chunks")
+    print(f"  {'':<18}{'found':>8}{'p50 ms':>9}{'p95 ms':>9}")
+    for label, retriever in (("hybrid", hybrid), ("symbol lookup", symbols)):
+        found, times = 0, []
+        for routine in definitions:
+            start = time.perf_counter()
+            docs = retriever.invoke(f"What does {routine['name']} do?")
+            times.append((time.perf_counter() - start) * 1000)
+            found += any(
+                doc.metadata.get("file_name") == routine["file_name"]
+                and doc.metadata.get("start_index", routine["end"]) < routine["end"]
+                and doc.metadata.get("end_index", routine["start"]) > routine["start"]
+                for doc in docs[:args.k]
+            )
+        print(f"  {label:<18}{found / len(definitions):>8.0%}{np.percentile(times, 50):>9.2f}"
+              f"{np.percentile(times, 95):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
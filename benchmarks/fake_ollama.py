@@ -0,0 +1,110 @@
+# benchmarks/fake_ollama.py
+"""Local stand-in for an Ollama server, shared by the benchmarks.
+
+Speaks enough of the API for the handlers: GET /api/tags and streaming
+POST /api/generate over HTTP/1.1 keep-alive, with chunked responses. It counts
+the TCP connections it accepts and the most generate requests in flight at
+once. With `contention` > 0, every token takes longer the more generations
+run at once (token_seconds * in_flight ** contention), as on a loaded GPU. Follow-up prompts of the question-condensing step are answered at once
+with the follow-up question itself.
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_NAME = "llama3.2:latest"
+
+
+class FakeOllama(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, tokens: int = 50, token_seconds: float = 0.02, contention: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.tokens = tokens
+        self.token_seconds = token_seconds
+        self.contention = contention
+        self.generations = 0
+        self.sockets = []
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        # Clients closing idle keep-alive connections are not errors
+        pass
+
+    def start(self) -> "FakeOllama":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def kill(self):
+        """Stop serving and drop every open connection, like a crashed host"""
+        self.shutdown()
+        self.server_close()
+        with self.lock:
+            for sock in self.sockets:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+            self.server.sockets.append(self.connection)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"models": [{"name": MODEL_NAME}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, data: dict):
+        line = json.dumps(data).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.generations += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            prompt = request["prompt"]
+            if "Standalone question:" in prompt:
+                question = prompt.split("Follow Up Input:")[-1].split("Standalone question:")[0].strip()
+                self._chunk({"response": question, "done": False})
+            else:
+                for i in range(server.tokens):
+                    time.sleep(server.token_seconds * max(server.in_flight, 1) ** server.contention)
+                    self._chunk({"response": f"token{i} ", "done": False})
+            self._chunk({"response": "", "done": True})
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        finally:
+            with server.lock:
+                server.in_flight -= 1
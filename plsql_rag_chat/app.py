@@ -4,29 +4,37 @@ import streamlit as st
 from pathlib import Path
 import sys
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import configurations and utilities
-from plsql_rag_chat.config.settings import (
-    UI_CONFIG,
-    MODEL_PARAMS,
-    LLM_CONFIG,
-    VECTOR_STORE_PATH,
-    METADATA_PATH
-)
+# LangChain is imported when the assistant is initialized, not on first render
+from plsql_rag_chat.config.settings import UI_CONFIG, get_settings
 from plsql_rag_chat.lib.ui.styles import CUSTOM_CSS
+from plsql_rag_chat.lib.llm_handlers.scheduler import scheduler_metrics
+from plsql_rag_chat.lib.utils.history_store import ChatHistoryStore
 from plsql_rag_chat.lib.ui.components import (
     render_sidebar_config,
-    render_chess_package_explorer
+    render_chess_package_explorer,
+    render_search_scope,
+    render_backend_metrics,
+    render_chat_sessions
 )
 from plsql_rag_chat.lib.utils.helpers import (
     load_vectorstore,
+    load_lexical_index,
+    load_symbol_index,
+    load_call_graph,
+    load_partition_index,
+    get_source_code,
+    create_chat_memory,
+    get_chat_history_store,
     initialize_chat_chain,
-    get_llm_handler
+    get_shared_llm_handler,
+    is_backend_healthy
 )
 
 # Add these constants at the top of the file
@@ -69,17 +77,72 @@ def initialize_session_state():
         st.session_state.messages = []
     if "chat_chain" not in st.session_state:
         st.session_state.chat_chain = None
+    if "vectorstore" not in st.session_state:
+        st.session_state.vectorstore = None
+    if "memory" not in st.session_state:
+        st.session_state.memory = None
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = ChatHistoryStore.new_session_id()
+        # Sequence number of the oldest message shown, while older ones are stored
+        st.session_state.history_cursor = None
+
+def session_memory():
+    """The session's conversation memory, created on first use"""
+    if st.session_state.memory is None:
+        st.session_state.memory = create_chat_memory()
+    return st.session_state.memory
+
+def record_message(role: str, content: str, metadata: Optional[Dict[str, Any]] = None):
+    """Add a message to the conversation and the persistent history"""
+    st.session_state.messages.append({"role": role, "content": content})
+    store = get_chat_history_store()
+    if store is not None:
+        store.append(st.session_state.session_id, role, content, metadata)
+
+def open_session(session_id: str):
+    """Show the latest page of a stored conversation and continue it"""
+    store = get_chat_history_store()
+    messages = store.page(session_id, limit=get_settings().chat_history["page_size"]) if store else []
+    st.session_state.session_id = session_id
+    st.session_state.messages = messages
+    st.session_state.history_cursor = messages[0]["seq"] if messages and messages[0]["seq"] > 0 else None
+    
+    # Follow-up questions refer to the turns just shown
+    memory = session_memory()
+    memory.clear()
+    turns = [
+        (question["content"], answer["content"])
+        for question, answer in zip(messages, messages[1:])
+        if question["role"] == "user" and answer["role"] == "assistant"
+    ]
+    for question, answer in turns[-memory.max_turns:]:
+        memory.save_context({"question": question}, {"answer": answer})
+
+def load_earlier_messages():
+    """Prepend the previous page of the stored conversation"""
+    store = get_chat_history_store()
+    cursor = st.session_state.history_cursor
+    if store is None or cursor is None:
+        return
+    earlier = store.page(st.session_state.session_id, before=cursor, limit=get_settings().chat_history["page_size"])
+    st.session_state.messages = earlier + st.session_state.messages
+    st.session_state.history_cursor = earlier[0]["seq"] if earlier and earlier[0]["seq"] > 0 else None
 
 def display_chat_messages():
     """Display chat message history"""
+    if st.session_state.history_cursor is not None:
+        st.button("⬆️ Load earlier messages", on_click=load_earlier_messages)
     for message in st.session_state.messages:
         with st.chat_message(message["role"]):
             st.write(message["content"])
 
 def handle_chat_input(chat_container):
     """Handle chat input and generate responses"""
-    if prompt := st.chat_input("Ask about chess engine implementation..."):
-        st.session_state.messages.append({"role": "user", "content": prompt})
+    # Example prompts are queued by their buttons and answered like typed ones
+    prompt = st.chat_input("Ask about chess engine implementation...")
+    prompt = prompt or st.session_state.pop("pending_prompt", None)
+    if prompt:
+        record_message("user", prompt)
         
         with chat_container:
             with st.chat_message("user"):
@@ -89,41 +152,45 @@ def handle_chat_input(chat_container):
                 with st.chat_message("assistant"):
                     st.error("Please initialize the assistant first! 🔧")
             else:
+                from plsql_rag_chat.lib.llm_handlers.streaming import TokenStreamHandler
+                from plsql_rag_chat.lib.utils.timings import StageTimingHandler
+                
                 try:
                     with st.chat_message("assistant"):
-                        with st.spinner("Analyzing..."):
-                            # Get chat history
-                            chat_history = []
-                            if len(st.session_state.messages) > 1:
-                                for i in range(0, len(st.session_state.messages)-1, 2):
-                                    if i+1 < len(st.session_state.messages):
-                                        chat_history.append(
-                                            (st.session_state.messages[i]["content"],
-                                             st.session_state.messages[i+1]["content"])
-                                        )
-                            
-                            # Generate response
-                            response = st.session_state.chat_chain({
-                                "question": prompt,
-                                "chat_history": chat_history
-                            })
-                            
-                            # Display response
-                            st.write(response["answer"])
-                            
-                            # Show source code if available
-                            if response.get("source_documents"):
-                                with st.expander("📚 Reference Code"):
-                                    for i, doc in enumerate(response["source_documents"], 1):
-                                        st.subheader(f"📦 Source {i}: {doc.metadata['package_name']}")
-                                        st.code(doc.metadata['formatted_content'], 
-                                               language="sql")
-                            
-                            # Update message history
-                            st.session_state.messages.append({
-                                "role": "assistant",
-                                "content": response["answer"]
-                            })
+                        # Tokens replace the placeholder as soon as they arrive
+                        placeholder = st.empty()
+                        placeholder.markdown("_Analyzing..._")
+                        streamed = []
+                        
+                        def render_token(token: str):
+                            streamed.append(token)
+                            placeholder.markdown("".join(streamed) + "▌")
+                        
+                        # Generate response; the chain's memory supplies the chat history
+                        timer = StageTimingHandler()
+                        response = st.session_state.chat_chain.invoke(
+                            {"question": prompt},
+                            config={"callbacks": [TokenStreamHandler(render_token), timer]}
+                        )
+                        
+                        # Display the complete response, also when it came from the cache
+                        placeholder.markdown(response["answer"])
+                        st.caption(f"⏱️ {timer.summary()}")
+                        
+                        # Show source code if available
+                        if response.get("source_documents"):
+                            with st.expander("📚 Reference Code"):
+                                for i, doc in enumerate(response["source_documents"], 1):
+                                    st.subheader(f"📦 Source {i}: {doc.metadata['package_name']}")
+                                    st.code(get_source_code(st.session_state.vectorstore, doc),
+                                           language="sql")
+                        
+                        # Update message history; sources and timings help warm caches later
+                        record_message("assistant", response["answer"], {
+                            "sources": [doc.metadata.get("package_name") for doc in response.get("source_documents", [])],
+                            "rewrite": timer.rewrite,
+                            "timings": timer.timings
+                        })
                 
                 except Exception as e:
                     st.error(f"❌ Error generating response: {str(e)}")
@@ -190,9 +257,8 @@ def render_example_prompts():
         with st.expander(f"📑 {category['category']}"):
             for prompt in category['prompts']:
                 if st.button(prompt, key=f"prompt_{hash(prompt)}"):
-                    # Add prompt to chat
-                    st.session_state.messages.append({"role": "user", "content": prompt})
-                    # Force a rerun to show the new message
+                    # Ask it on the next run, through the chat input path
+                    st.session_state.pending_prompt = prompt
                     st.rerun()
 
 def main():
@@ -210,12 +276,38 @@ def main():
             # Sidebar configuration
             with st.sidebar:
                 # Model parameters
-                model_params = render_sidebar_config(MODEL_PARAMS)
+                model_params = render_sidebar_config(get_settings().model_params)
                 
                 # Initialize button
                 if st.button("🚀 Initialize Assistant", use_container_width=True):
                     with st.spinner("Loading knowledge base..."):
                         initialize_assistant(model_params)
+                
+                if st.session_state.chat_chain is not None:
+                    settings = get_settings()
+                    render_search_scope(load_partition_index(settings.vector_store_path))
+                    render_chess_package_explorer(
+                        load_symbol_index(settings.vector_store_path, settings.metadata_path),
+                        settings.symbols["page_size"]
+                    )
+                
+                render_backend_metrics(scheduler_metrics())
+                
+                # Past conversations, most recent first
+                store = get_chat_history_store()
+                if store is not None:
+                    if st.button("🆕 New Conversation", use_container_width=True):
+                        st.session_state.session_id = ChatHistoryStore.new_session_id()
+                        st.session_state.messages = []
+                        st.session_state.history_cursor = None
+                        if st.session_state.memory is not None:
+                            st.session_state.memory.clear()
+                    selected = render_chat_sessions(store.list_sessions(limit=10), st.session_state.session_id)
+                    if selected:
+                        open_session(selected)
+            
+            # Pick up a rebuilt index before answering
+            refresh_chat_chain()
             
             # Main chat container
             chat_container = st.container()
@@ -237,39 +329,80 @@ def main():
         logger.exception("Application error:")
         st.error(f"Application error: {str(e)}")
 
+def search_partitions() -> List[str]:
+    """Partitions chosen in the sidebar to search, none for automatic routing"""
+    scope = st.session_state.get("search_scope")
+    return [scope] if scope else []
+
+def refresh_chat_chain():
+    """Rebuild the session's chain on the new index once the index files or the search scope change"""
+    if st.session_state.chat_chain is None:
+        return
+    settings = get_settings()
+    vectorstore = load_vectorstore(settings.vector_store_path)
+    partitions = search_partitions()
+    if vectorstore is None or (
+        vectorstore is st.session_state.vectorstore and partitions == st.session_state.get("chain_partitions", [])
+    ):
+        return
+    logger.info("Vector store or search scope changed, rebuilding chat chain")
+    chain = initialize_chat_chain(
+        get_shared_llm_handler(settings.llm),
+        vectorstore,
+        st.session_state.model_params,
+        load_lexical_index(settings.vector_store_path),
+        memory=session_memory(),
+        symbol_index=load_symbol_index(settings.vector_store_path, settings.metadata_path),
+        call_graph=load_call_graph(settings.vector_store_path),
+        partition_index=load_partition_index(settings.vector_store_path),
+        partitions=partitions
+    )
+    if chain is not None:
+        st.session_state.vectorstore = vectorstore
+        st.session_state.chain_partitions = partitions
+        st.session_state.chat_chain = chain
+
 # Extracted initialization logic for clarity
 def initialize_assistant(model_params):
-    # Get LLM handler
-    llm_handler = get_llm_handler(LLM_CONFIG)
+    # The handler, vector store and retriever are shared by all sessions;
+    # only the chain and its memory belong to this one
+    settings = get_settings()
+    llm_handler = get_shared_llm_handler(settings.llm)
     
     if not llm_handler:
-        st.error(f"Failed to initialize {LLM_CONFIG['provider']} handler")
+        st.error(f"Failed to initialize {settings.llm['provider']} handler")
         return
     
     # Check LLM health
-    if not llm_handler.health_check():
-        st.error(f"Cannot connect to {LLM_CONFIG['provider']}. Please check if the service is running.")
+    if not is_backend_healthy(llm_handler):
+        st.error(f"Cannot connect to {settings.llm['provider']}. Please check if the service is running.")
         return
     
     # Load vector store
-    vectorstore, metadata = load_vectorstore(
-        VECTOR_STORE_PATH,
-        METADATA_PATH
-    )
+    vectorstore = load_vectorstore(settings.vector_store_path)
     
-    if not vectorstore or not metadata:
-        st.error("Failed to load vector store or metadata")
+    if not vectorstore:
+        st.error("Failed to load vector store")
         return
     
+    st.session_state.vectorstore = vectorstore
+    st.session_state.model_params = model_params
+    st.session_state.chain_partitions = search_partitions()
+    
     # Initialize chat chain
     st.session_state.chat_chain = initialize_chat_chain(
         llm_handler,
         vectorstore,
-        model_params
+        model_params,
+        load_lexical_index(settings.vector_store_path),
+        memory=session_memory(),
+        symbol_index=load_symbol_index(settings.vector_store_path, settings.metadata_path),
+        call_graph=load_call_graph(settings.vector_store_path),
+        partition_index=load_partition_index(settings.vector_store_path),
+        partitions=st.session_state.chain_partitions
     )
     
     if st.session_state.chat_chain:
-        render_chess_package_explorer(metadata)
         st.success("Ready to assist! 🎉")
     else:
         st.error("Failed to initialize chat chain")
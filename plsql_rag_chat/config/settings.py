@@ -1,39 +1,19 @@
-from pathlib import Path
-import os
-from dotenv import load_dotenv
+# plsql_rag_chat/config/settings.py
+
 import logging
+import os
+import threading
+from dataclasses import dataclass, replace
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-load_dotenv()
-
 # Base paths
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 
-# Ensure data directories exist
-DATA_DIR.mkdir(exist_ok=True)
-(DATA_DIR / "vectorstore").mkdir(exist_ok=True)
-(DATA_DIR / "chat_histories").mkdir(exist_ok=True)
-(DATA_DIR / "metadata").mkdir(exist_ok=True)
-
-# Debug: Print raw environment variable
-logger.info(f"Raw LLM_PROVIDER value: '{os.getenv('LLM_PROVIDER')}'")
-
-# Data paths with validation
-VECTOR_STORE_PATH = Path(os.getenv("VECTOR_STORE_PATH", str(DATA_DIR / "vectorstore")))
-METADATA_PATH = Path(os.getenv("METADATA_PATH", str(DATA_DIR / "metadata" / "chess_metadata.json")))
-CHAT_HISTORIES_PATH = Path(os.getenv("CHAT_HISTORIES_PATH", str(DATA_DIR / "chat_histories")))
-
-# LLM settings with extra validation
-raw_provider = os.getenv("LLM_PROVIDER", "ollama")
-provider = raw_provider.lower().strip()
-logger.info(f"Cleaned provider value: '{provider}'")
-
-
 def clean_env_value(value: str, default: str) -> str:
     """Clean environment variable value and apply default if necessary"""
     if not value:
@@ -42,61 +22,437 @@ def clean_env_value(value: str, default: str) -> str:
     cleaned = value.split('#')[0].strip()
     return cleaned if cleaned else default
 
-# Load and validate LLM provider
-raw_provider = os.getenv('LLM_PROVIDER', '')
-provider = clean_env_value(raw_provider, 'ollama')
-logger.info(f"Raw LLM_PROVIDER value: '{raw_provider}'")
-logger.info(f"Cleaned provider value: '{provider}'")
-
-if provider not in ['ollama', 'bedrock']:
-    logger.error(f"Invalid provider '{provider}'. Defaulting to 'ollama'")
-    provider = 'ollama'
-
-# LLM Configuration
-LLM_CONFIG = {
-    "provider": provider,
-    "ollama_base_url": clean_env_value(
-        os.getenv("OLLAMA_BASE_URL", ''),
-        "http://localhost:11434"
-    ),
-    "bedrock_model_id": clean_env_value(
-        os.getenv("BEDROCK_MODEL_ID", ''),
-        "anthropic.claude-v2"
-    ),
-    "aws_region": clean_env_value(
-        os.getenv("AWS_REGION", ''),
-        "us-east-1"
-    ),
-    "model_name": clean_env_value(
-        os.getenv("MODEL_NAME", ''),
-        "llama3.2:latest"
+@dataclass(frozen=True)
+class Settings:
+    """Configuration read from the environment and `.env`, once per process
+
+    Importing this module reads nothing; `get_settings()` builds the settings
+    on first use. Each section is a read-only mapping, so code holding the
+    settings always sees the values the process started with, unless they are
+    replaced as a whole with `override_settings()`.
+    """
+
+    documents_path: Path
+    vector_store_path: Path
+    metadata_path: Path
+    chat_histories_path: Path
+    embedding_cache_path: Path
+    llm: Mapping[str, Any]
+    router: Mapping[str, Any]
+    ollama_http: Mapping[str, Any]
+    scheduler: Mapping[str, Any]
+    model_params: Mapping[str, Any]
+    embedding: Mapping[str, Any]
+    chunk: Mapping[str, Any]
+    vectorstore: Mapping[str, Any]
+    retrieval: Mapping[str, Any]
+    symbols: Mapping[str, Any]
+    context: Mapping[str, Any]
+    memory: Mapping[str, Any]
+    rewrite: Mapping[str, Any]
+    chat_history: Mapping[str, Any]
+    resource: Mapping[str, Any]
+    response_cache: Mapping[str, Any]
+
+def load_settings() -> Settings:
+    """Read the settings from the environment, after loading `.env`"""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    # Load and validate LLM provider
+    raw_provider = os.getenv('LLM_PROVIDER', '')
+    provider = clean_env_value(raw_provider, 'ollama').lower()
+    if provider not in ['ollama', 'bedrock', 'router']:
+        logger.error(f"Invalid provider '{raw_provider}'. Defaulting to 'ollama'")
+        provider = 'ollama'
+
+    # LLM Configuration
+    llm = {
+        "provider": provider,
+        "ollama_base_url": clean_env_value(
+            os.getenv("OLLAMA_BASE_URL", ''),
+            "http://localhost:11434"
+        ),
+        "bedrock_model_id": clean_env_value(
+            os.getenv("BEDROCK_MODEL_ID", ''),
+            "anthropic.claude-v2"
+        ),
+        "aws_region": clean_env_value(
+            os.getenv("AWS_REGION", ''),
+            "us-east-1"
+        ),
+        "model_name": clean_env_value(
+            os.getenv("MODEL_NAME", ''),
+            "llama3.2:latest"
+        )
+    }
+    logger.info(f"Validated LLM CONFIG: {llm}")
+
+    # Backends of the "router" provider as comma-separated provider=target pairs,
+    # e.g. "ollama=http://gpu1:11434,ollama=http://gpu2:11434,bedrock=us-east-1"
+    router = {
+        "backends": tuple(
+            tuple(part.strip() for part in entry.split("=", 1))
+            for entry in clean_env_value(os.getenv("LLM_BACKENDS", ''), "").split(",")
+            if "=" in entry
+        ),
+        "failure_threshold": int(clean_env_value(
+            os.getenv("ROUTER_FAILURE_THRESHOLD", ''),
+            "3"
+        )),
+        "cooldown": float(clean_env_value(
+            os.getenv("ROUTER_COOLDOWN", ''),
+            "30"
+        )),
+        "probe_interval": float(clean_env_value(
+            os.getenv("ROUTER_PROBE_INTERVAL", ''),
+            "10"
+        ))
+    }
+
+    # Connection pool shared by all sessions talking to the Ollama server;
+    # "max_concurrency" bounds the requests in flight at once
+    ollama_http = {
+        "connect_timeout": float(clean_env_value(
+            os.getenv("OLLAMA_CONNECT_TIMEOUT", ''),
+            "5"
+        )),
+        "read_timeout": float(clean_env_value(
+            os.getenv("OLLAMA_READ_TIMEOUT", ''),
+            "300"
+        )),
+        "max_connections": int(clean_env_value(
+            os.getenv("OLLAMA_MAX_CONNECTIONS", ''),
+            "20"
+        )),
+        "max_concurrency": int(clean_env_value(
+            os.getenv("OLLAMA_MAX_CONCURRENCY", ''),
+            "8"
+        ))
+    }
+
+    # Admission control in front of each LLM backend: at most "max_in_flight"
+    # generations run at once, others queue for up to "queue_timeout" seconds, and
+    # identical prompts in flight share one generation when "coalesce" is on
+    scheduler = {
+        "enabled": clean_env_value(
+            os.getenv("SCHEDULER_ENABLED", ''),
+            "true"
+        ).lower() in ("1", "true", "yes"),
+        "max_in_flight": int(clean_env_value(
+            os.getenv("SCHEDULER_MAX_IN_FLIGHT", ''),
+            "4"
+        )),
+        "queue_timeout": float(clean_env_value(
+            os.getenv("SCHEDULER_QUEUE_TIMEOUT", ''),
+            "60"
+        )),
+        "coalesce": clean_env_value(
+            os.getenv("SCHEDULER_COALESCE", ''),
+            "true"
+        ).lower() in ("1", "true", "yes")
+    }
+
+    # Model parameters with validation
+    model_params = {
+        "temperature": float(clean_env_value(
+            os.getenv("DEFAULT_TEMPERATURE", ''),
+            "0.7"
+        )),
+        "context_length": int(clean_env_value(
+            os.getenv("DEFAULT_CONTEXT_LENGTH", ''),
+            "2048"
+        )),
+        "top_k": int(clean_env_value(
+            os.getenv("DEFAULT_TOP_K", ''),
+            "40"
+        )),
+        "retrieval_k": int(clean_env_value(
+            os.getenv("DEFAULT_RETRIEVAL_K", ''),
+            "3"
+        )),
+        # Bedrock handlers take the model id from here, like Ollama the model name
+        "model_name": llm["bedrock_model_id"] if provider == "bedrock" else llm["model_name"]
+    }
+
+    # Embedding settings. "hash" is the digest-based test embedder the shipped
+    # index was built with; "hashing" embeds identifiers and their character
+    # n-grams, so similar code gets similar vectors (re-run ingestion after switching)
+    embedding = {
+        "model": clean_env_value(
+            os.getenv("EMBEDDING_MODEL", ''),
+            "hash"
+        ).lower(),
+        "dimension": int(clean_env_value(
+            os.getenv("EMBEDDING_DIMENSION", ''),
+            "384"
+        )),
+        "cache_max_entries": int(clean_env_value(
+            os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", ''),
+            "100000"
+        ))
+    }
+
+    # Chunking settings for ingestion
+    chunk = {
+        "max_tokens": int(clean_env_value(
+            os.getenv("CHUNK_MAX_TOKENS", ''),
+            "512"
+        )),
+        "min_tokens": int(clean_env_value(
+            os.getenv("CHUNK_MIN_TOKENS", ''),
+            "64"
+        ))
+    }
+
+    # Vector store settings; "native" is the memory-mapped, pickle-free format and
+    # "docstore" applies to FAISS stores, where "compact" keeps texts out of index.pkl.
+    # "index" selects exact search ("flat") or an approximate index for native
+    # stores: "ivf", "hnsw", "ivfpq" or any faiss index_factory string
+    vectorstore = {
+        "format": clean_env_value(
+            os.getenv("VECTORSTORE_FORMAT", ''),
+            "native"
+        ).lower(),
+        "index": clean_env_value(
+            os.getenv("VECTORSTORE_INDEX", ''),
+            "flat"
+        ),
+        "nprobe": int(clean_env_value(
+            os.getenv("VECTORSTORE_NPROBE", ''),
+            "8"
+        )),
+        "ef_search": int(clean_env_value(
+            os.getenv("VECTORSTORE_EF_SEARCH", ''),
+            "64"
+        )),
+        # Approximate candidates fetched per result and re-ranked exactly
+        "refine": int(clean_env_value(
+            os.getenv("VECTORSTORE_REFINE", ''),
+            "4"
+        )),
+        "docstore": clean_env_value(
+            os.getenv("VECTORSTORE_DOCSTORE", ''),
+            "compact"
+        ).lower()
+    }
+
+    # Retrieval settings; "hybrid" fuses BM25 and vector hits, "vector" disables BM25.
+    # Vector hits are down-weighted because the bundled hash embeddings carry no
+    # semantic signal; raise RETRIEVAL_VECTOR_WEIGHT with a real embedding model.
+    # "expand" set to "calls" appends up to "expand_k" routines called by the hits,
+    # "none" returns the hits alone. "routing" set to "keywords" searches only the
+    # package and category partitions named by the question, "none" searches all
+    # chunks unless the sidebar sets a scope
+    retrieval = {
+        "mode": clean_env_value(
+            os.getenv("RETRIEVAL_MODE", ''),
+            "hybrid"
+        ).lower(),
+        "fetch_k": int(clean_env_value(
+            os.getenv("RETRIEVAL_FETCH_K", ''),
+            "20"
+        )),
+        "rrf_k": int(clean_env_value(
+            os.getenv("RETRIEVAL_RRF_K", ''),
+            "60"
+        )),
+        "vector_weight": float(clean_env_value(
+            os.getenv("RETRIEVAL_VECTOR_WEIGHT", ''),
+            "0.5"
+        )),
+        "lexical_weight": float(clean_env_value(
+            os.getenv("RETRIEVAL_LEXICAL_WEIGHT", ''),
+            "1.0"
+        )),
+        "expand": clean_env_value(
+            os.getenv("RETRIEVAL_EXPAND", ''),
+            "calls"
+        ).lower(),
+        "expand_k": int(clean_env_value(
+            os.getenv("RETRIEVAL_EXPAND_K", ''),
+            "2"
+        )),
+        "routing": clean_env_value(
+            os.getenv("RETRIEVAL_ROUTING", ''),
+            "keywords"
+        ).lower()
+    }
+
+    # Symbol index built at ingestion: questions naming a routine are answered
+    # from its definition chunks (at most "max_chunks") without a vector search,
+    # and the package explorer lists "page_size" routines at a time
+    symbols = {
+        "lookup": clean_env_value(
+            os.getenv("SYMBOL_LOOKUP", ''),
+            "true"
+        ).lower() in ("1", "true", "yes"),
+        "max_chunks": int(clean_env_value(
+            os.getenv("SYMBOL_MAX_CHUNKS", ''),
+            "6"
+        )),
+        "page_size": int(clean_env_value(
+            os.getenv("SYMBOL_PAGE_SIZE", ''),
+            "20"
+        ))
+    }
+
+    # Prompt budgeting: retrieved chunks are packed into the model's context
+    # length less "answer_tokens" reserved for the generated answer
+    context = {
+        "answer_tokens": int(clean_env_value(
+            os.getenv("CONTEXT_ANSWER_TOKENS", ''),
+            "512"
+        ))
+    }
+
+    # Chat history fed to the question-condensing step: the last "max_turns"
+    # turns verbatim, older ones summarized, all within "max_tokens"
+    memory = {
+        "max_turns": int(clean_env_value(
+            os.getenv("MEMORY_MAX_TURNS", ''),
+            "4"
+        )),
+        "max_tokens": int(clean_env_value(
+            os.getenv("MEMORY_MAX_TOKENS", ''),
+            "768"
+        )),
+        "summary_tokens": int(clean_env_value(
+            os.getenv("MEMORY_SUMMARY_TOKENS", ''),
+            "256"
+        ))
+    }
+
+    # Rewriting follow-ups into standalone questions before retrieval. "auto"
+    # skips questions that stand on their own; "model_name" picks a smaller Ollama
+    # model or Bedrock model id for the rewrite (empty: the chat model)
+    rewrite = {
+        "mode": clean_env_value(
+            os.getenv("REWRITE_MODE", ''),
+            "auto"
+        ).lower(),
+        "model_name": clean_env_value(
+            os.getenv("REWRITE_MODEL", ''),
+            ""
+        ),
+        "cache_size": int(clean_env_value(
+            os.getenv("REWRITE_CACHE_SIZE", ''),
+            "256"
+        ))
+    }
+
+    # Chat histories persisted under CHAT_HISTORIES_PATH, written in batches and
+    # read back "page_size" messages at a time
+    chat_history = {
+        "enabled": clean_env_value(
+            os.getenv("CHAT_HISTORY_ENABLED", ''),
+            "true"
+        ).lower() in ("1", "true", "yes"),
+        "batch_size": int(clean_env_value(
+            os.getenv("CHAT_HISTORY_BATCH_SIZE", ''),
+            "64"
+        )),
+        "flush_interval": float(clean_env_value(
+            os.getenv("CHAT_HISTORY_FLUSH_INTERVAL", ''),
+            "1.0"
+        )),
+        "page_size": int(clean_env_value(
+            os.getenv("CHAT_HISTORY_PAGE_SIZE", ''),
+            "20"
+        ))
+    }
+
+    # Handler, vector store and retrievers are shared by all sessions; index
+    # files are checked for changes at most every "check_interval" seconds and a
+    # successful backend health check is trusted for "health_ttl" seconds
+    resource = {
+        "check_interval": float(clean_env_value(
+            os.getenv("RESOURCE_CHECK_INTERVAL", ''),
+            "2.0"
+        )),
+        "health_ttl": float(clean_env_value(
+            os.getenv("RESOURCE_HEALTH_TTL", ''),
+            "15.0"
+        ))
+    }
+
+    # Answer cache shared by all sessions in the process. A similarity threshold
+    # above 0 also serves near-duplicate questions; leave it at 0 with the hash
+    # embeddings, whose similarities do not reflect meaning
+    response_cache = {
+        "enabled": clean_env_value(
+            os.getenv("RESPONSE_CACHE_ENABLED", ''),
+            "true"
+        ).lower() in ("1", "true", "yes"),
+        "max_entries": int(clean_env_value(
+            os.getenv("RESPONSE_CACHE_MAX_ENTRIES", ''),
+            "512"
+        )),
+        "ttl_seconds": float(clean_env_value(
+            os.getenv("RESPONSE_CACHE_TTL_SECONDS", ''),
+            "3600"
+        )),
+        "similarity_threshold": float(clean_env_value(
+            os.getenv("RESPONSE_CACHE_SIMILARITY", ''),
+            "0"
+        ))
+    }
+
+    sections = {
+        "llm": llm,
+        "router": router,
+        "ollama_http": ollama_http,
+        "scheduler": scheduler,
+        "model_params": model_params,
+        "embedding": embedding,
+        "chunk": chunk,
+        "vectorstore": vectorstore,
+        "retrieval": retrieval,
+        "symbols": symbols,
+        "context": context,
+        "memory": memory,
+        "rewrite": rewrite,
+        "chat_history": chat_history,
+        "resource": resource,
+        "response_cache": response_cache
+    }
+    return Settings(
+        # Data paths
+        documents_path=Path(os.getenv("DOCUMENTS_PATH", str(BASE_DIR / "notebooks" / "documents"))),
+        vector_store_path=Path(os.getenv("VECTOR_STORE_PATH", str(DATA_DIR / "vectorstore"))),
+        metadata_path=Path(os.getenv("METADATA_PATH", str(DATA_DIR / "metadata" / "chess_metadata.json"))),
+        chat_histories_path=Path(os.getenv("CHAT_HISTORIES_PATH", str(DATA_DIR / "chat_histories"))),
+        embedding_cache_path=Path(os.getenv("EMBEDDING_CACHE_PATH", str(DATA_DIR / "embedding_cache"))),
+        **{name: MappingProxyType(values) for name, values in sections.items()}
     )
-}
 
-# Log validated configuration
-logger.info(f"Validated LLM CONFIG: {LLM_CONFIG}")
-
-# Model parameters with validation
-MODEL_PARAMS = {
-    "temperature": float(clean_env_value(
-        os.getenv("DEFAULT_TEMPERATURE", ''),
-        "0.7"
-    )),
-    "context_length": int(clean_env_value(
-        os.getenv("DEFAULT_CONTEXT_LENGTH", ''),
-        "2048"
-    )),
-    "top_k": int(clean_env_value(
-        os.getenv("DEFAULT_TOP_K", ''),
-        "40"
-    )),
-    "retrieval_k": int(clean_env_value(
-        os.getenv("DEFAULT_RETRIEVAL_K", ''),
-        "3"
-    )),
-    "model_name": LLM_CONFIG["model_name"]
-}
+_SETTINGS: Optional[Settings] = None
+_SETTINGS_LOCK = threading.Lock()
+
+def get_settings() -> Settings:
+    """The settings of this process, read on first use"""
+    global _SETTINGS
+    with _SETTINGS_LOCK:
+        if _SETTINGS is None:
+            _SETTINGS = load_settings()
+        return _SETTINGS
 
+def override_settings(**changes: Any) -> Settings:
+    """Replace settings for the rest of the process
+
+    Mappings are merged into their section, e.g.
+    `override_settings(rewrite={"mode": "never"})`.
+    """
+    global _SETTINGS
+    current = get_settings()
+    updates: Dict[str, Any] = {}
+    for name, value in changes.items():
+        if isinstance(value, dict):
+            value = MappingProxyType({**getattr(current, name), **value})
+        updates[name] = value
+    with _SETTINGS_LOCK:
+        _SETTINGS = replace(current, **updates)
+        return _SETTINGS
 
 # System prompts
 SYSTEM_PROMPTS = {
@@ -126,13 +482,66 @@ PACKAGE_CATEGORIES = {
     "general": "🔧 General Utilities"
 }
 
+# Module-level names of the settings, resolved from get_settings() when first
+# imported, e.g. `from plsql_rag_chat.config.settings import LLM_CONFIG`
+_SETTINGS_NAMES = {
+    'DOCUMENTS_PATH': 'documents_path',
+    'VECTOR_STORE_PATH': 'vector_store_path',
+    'METADATA_PATH': 'metadata_path',
+    'CHAT_HISTORIES_PATH': 'chat_histories_path',
+    'EMBEDDING_CACHE_PATH': 'embedding_cache_path',
+    'LLM_CONFIG': 'llm',
+    'ROUTER_CONFIG': 'router',
+    'OLLAMA_HTTP_CONFIG': 'ollama_http',
+    'SCHEDULER_CONFIG': 'scheduler',
+    'MODEL_PARAMS': 'model_params',
+    'EMBEDDING_CONFIG': 'embedding',
+    'CHUNK_CONFIG': 'chunk',
+    'VECTORSTORE_CONFIG': 'vectorstore',
+    'RETRIEVAL_CONFIG': 'retrieval',
+    'SYMBOL_CONFIG': 'symbols',
+    'CONTEXT_CONFIG': 'context',
+    'MEMORY_CONFIG': 'memory',
+    'REWRITE_CONFIG': 'rewrite',
+    'CHAT_HISTORY_CONFIG': 'chat_history',
+    'RESOURCE_CONFIG': 'resource',
+    'RESPONSE_CACHE_CONFIG': 'response_cache'
+}
+
+def __getattr__(name: str) -> Any:
+    field = _SETTINGS_NAMES.get(name)
+    if field is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(get_settings(), field)
+
 # Export all variables that should be accessible
 __all__ = [
+    'Settings',
+    'get_settings',
+    'load_settings',
+    'override_settings',
+    'clean_env_value',
+    'DOCUMENTS_PATH',
     'VECTOR_STORE_PATH',
     'METADATA_PATH',
     'CHAT_HISTORIES_PATH',
+    'EMBEDDING_CACHE_PATH',
     'LLM_CONFIG',
+    'ROUTER_CONFIG',
+    'OLLAMA_HTTP_CONFIG',
+    'SCHEDULER_CONFIG',
     'MODEL_PARAMS',
+    'EMBEDDING_CONFIG',
+    'CHUNK_CONFIG',
+    'VECTORSTORE_CONFIG',
+    'RETRIEVAL_CONFIG',
+    'SYMBOL_CONFIG',
+    'CONTEXT_CONFIG',
+    'MEMORY_CONFIG',
+    'REWRITE_CONFIG',
+    'CHAT_HISTORY_CONFIG',
+    'RESOURCE_CONFIG',
+    'RESPONSE_CACHE_CONFIG',
     'SYSTEM_PROMPTS',
     'UI_CONFIG',
     'PACKAGE_CATEGORIES'
@@ -1,5 +1,11 @@
 # plsql_rag_chat/lib/embeddings/__init__.py
-from .hash_embeddings import SimpleHashEmbeddings
+from plsql_rag_chat.lib.lazy import lazy_exports
 
-__all__ = ['SimpleHashEmbeddings']
+_EXPORTS = {
+    'SimpleHashEmbeddings': 'hash_embeddings',
+    'HashingEmbeddings': 'hashing_embeddings',
+    'CachedEmbeddings': 'cached_embeddings'
+}
 
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(__name__, _EXPORTS)
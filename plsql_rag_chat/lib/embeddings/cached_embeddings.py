@@ -0,0 +1,249 @@
+# plsql_rag_chat/lib/embeddings/cached_embeddings.py
+
+import hashlib
+import logging
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are serialized within the process only
+    fcntl = None
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+_KEY_BYTES = 32
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that memoizes vectors in a memory-mapped on-disk cache
+
+    Vectors are keyed by the SHA-256 of the text and stored under a namespace
+    derived from the wrapped model and its dimension, so switching models never
+    returns stale vectors. The cache holds at most `max_entries` vectors and
+    evicts the least recently used ones when full.
+
+    Several processes, e.g. the app and an ingestion run, may share a cache
+    directory. Writers take an exclusive lock on the directory, and a hit is
+    only used when the slot still holds the requested key, since another
+    process may have evicted and reused it.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_dir: Path,
+        namespace: Optional[str] = None,
+        max_entries: int = 100_000,
+        evict_fraction: float = 0.1
+    ):
+        self.embeddings = embeddings
+        self.cache_dir = Path(cache_dir)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.evict_fraction = evict_fraction
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._stamps: Optional[np.memmap] = None
+        self._lock_file: Optional[IO] = None
+        self._slots: Dict[bytes, int] = {}
+        self._free: List[int] = []
+        self._clock = 0
+
+    # ------------------------------------------------------------------ #
+    # Embeddings interface
+    # ------------------------------------------------------------------ #
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts, computing only the ones not in the cache"""
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Embed a list of texts into a (n, dimension) float32 matrix"""
+        keys = [self._key("d", text) for text in texts]
+        return self._lookup(keys, texts, self._compute_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query text"""
+        key = self._key("q", text)
+        return self._lookup([key], [text], self._compute_queries)[0].tolist()
+
+    # ------------------------------------------------------------------ #
+    # Cache internals
+    # ------------------------------------------------------------------ #
+
+    @staticmethod
+    def _key(kind: str, text: str) -> bytes:
+        # Queries and documents may embed differently for asymmetric models
+        return hashlib.sha256(kind.encode() + b"\0" + text.encode()).digest()
+
+    def _compute_documents(self, texts: List[str]) -> np.ndarray:
+        if hasattr(self.embeddings, "embed_documents_array"):
+            return np.asarray(self.embeddings.embed_documents_array(texts), dtype=np.float32)
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+    def _compute_queries(self, texts: List[str]) -> np.ndarray:
+        return np.asarray([self.embeddings.embed_query(t) for t in texts], dtype=np.float32)
+
+    def _lookup(self, keys: List[bytes], texts: List[str], compute) -> np.ndarray:
+        with self._lock:
+            if self._vectors is None and getattr(self.embeddings, "dimension", None):
+                self._open(self.embeddings.dimension)
+            if self._vectors is not None:
+                found = [self._slots.get(k) for k in keys]
+            else:
+                found = [None] * len(keys)
+
+            # Copy hits out before storing misses, which may evict slots
+            self._clock += 1
+            hits = {}
+            for key, slot in zip(keys, found):
+                if slot is None:
+                    continue
+                vector = np.array(self._vectors[slot])
+                # Checked after the copy: a writer clears the key before the vector
+                if bytes(self._keys[slot]) != key:
+                    self._slots.pop(key, None)
+                    continue
+                hits[key] = vector
+                self._stamps[slot] = self._clock
+
+            # Deduplicate misses so repeated texts are embedded once
+            missing: Dict[bytes, str] = {}
+            for key, text in zip(keys, texts):
+                if key not in hits:
+                    missing.setdefault(key, text)
+
+            if missing:
+                vectors = compute(list(missing.values()))
+                computed = dict(zip(missing.keys(), vectors))
+                self._store(computed)
+                hits.update(computed)
+
+            self.hits += sum(1 for key in keys if key not in missing)
+            self.misses += len(missing)
+
+            if not keys:
+                return np.zeros((0, getattr(self.embeddings, "dimension", 0)), dtype=np.float32)
+            return np.stack([hits[key] for key in keys]).astype(np.float32, copy=False)
+
+    def _namespace_dir(self, dimension: int) -> Path:
+        namespace = self.namespace
+        if namespace is None:
+            model = (
+                getattr(self.embeddings, "model_id", None)
+                or getattr(self.embeddings, "model", None)
+                or type(self.embeddings).__name__
+            )
+            namespace = str(model)
+        safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", namespace)
+        return self.cache_dir / f"{safe}-{dimension}"
+
+    def _open(self, dimension: int):
+        """Open (or create) the memory-mapped cache files for this dimension"""
+        path = self._namespace_dir(dimension)
+        path.mkdir(parents=True, exist_ok=True)
+        files = {
+            "vectors": (path / "vectors.npy", np.float32, (self.max_entries, dimension)),
+            "keys": (path / "keys.npy", np.uint8, (self.max_entries, _KEY_BYTES)),
+            "stamps": (path / "stamps.npy", np.int64, (self.max_entries,)),
+        }
+
+        arrays = {}
+        try:
+            for name, (file_path, dtype, shape) in files.items():
+                if file_path.exists():
+                    array = np.lib.format.open_memmap(file_path, mode="r+")
+                    if array.shape != shape or array.dtype != dtype:
+                        raise ValueError(f"Unexpected layout in {file_path}")
+                else:
+                    array = np.lib.format.open_memmap(file_path, mode="w+", dtype=dtype, shape=shape)
+                arrays[name] = array
+        except ValueError as e:
+            logger.warning(f"Resetting embedding cache at {path}: {str(e)}")
+            for file_path, dtype, shape in files.values():
+                arrays[file_path.stem] = np.lib.format.open_memmap(
+                    file_path, mode="w+", dtype=dtype, shape=shape
+                )
+
+        self._vectors = arrays["vectors"]
+        self._keys = arrays["keys"]
+        self._stamps = arrays["stamps"]
+        self._lock_file = open(path / "cache.lock", "a")
+
+        used = np.flatnonzero(self._stamps)
+        self._slots = {bytes(self._keys[slot]): int(slot) for slot in used}
+        self._free = np.flatnonzero(self._stamps == 0)[::-1].tolist()
+        self._clock = int(self._stamps.max()) if len(used) else 0
+        logger.info(f"Opened embedding cache at {path} with {len(self._slots)} entries")
+
+    @contextmanager
+    def _writer_lock(self):
+        """Serialize writers across the processes sharing the cache directory"""
+        if fcntl is None or self._lock_file is None:
+            yield
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _evict(self, needed: int):
+        """Free the least recently used slots"""
+        used = np.flatnonzero(self._stamps)
+        count = min(
+            len(used),
+            max(needed - len(self._free), int(self.max_entries * self.evict_fraction))
+        )
+        if count <= 0:
+            return
+        victims = used[np.argpartition(self._stamps[used], count - 1)[:count]]
+        for slot in victims.tolist():
+            self._slots.pop(bytes(self._keys[slot]), None)
+            self._stamps[slot] = 0
+            self._free.append(slot)
+        logger.info(f"Evicted {count} entries from embedding cache")
+
+    def _store(self, computed: Dict[bytes, np.ndarray]):
+        if not computed:
+            return
+        if self._vectors is None:
+            self._open(len(next(iter(computed.values()))))
+
+        items = list(computed.items())[-self.max_entries:]
+        with self._writer_lock():
+            # Other processes may have taken or freed slots since this one looked
+            self._free = np.flatnonzero(self._stamps == 0)[::-1].tolist()
+            if len(items) > len(self._free):
+                self._evict(len(items))
+
+            self._clock = max(self._clock, int(self._stamps.max())) + 1
+            for key, vector in items:
+                slot = self._free.pop()
+                # Readers of the slot's previous key see a mismatch from here on
+                self._keys[slot] = 0
+                self._vectors[slot] = vector
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._stamps[slot] = self._clock
+                self._slots[key] = slot
+
+    def flush(self):
+        """Write pending cache pages to disk"""
+        with self._lock:
+            for array in (self._vectors, self._keys, self._stamps):
+                if array is not None:
+                    array.flush()
+
+    def __len__(self) -> int:
+        return len(self._slots)
@@ -1,7 +1,10 @@
 import numpy as np
 import hashlib
 from typing import List
-from langchain.embeddings.base import Embeddings
+from langchain_core.embeddings import Embeddings
+
+# Each SHA-256 digest yields eight big-endian 32-bit words
+_DIGEST_WORDS = 8
 
 class SimpleHashEmbeddings(Embeddings):
     """Simple deterministic hash-based embeddings for testing"""
@@ -32,9 +35,27 @@ class SimpleHashEmbeddings(Embeddings):
             
         return array.tolist()
     
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Embed a list of texts into a single (n, dimension) float32 matrix"""
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if not texts:
+            return matrix
+        
+        # Decode all digests at once instead of parsing hex per text
+        digests = b"".join(hashlib.sha256(text.encode()).digest() for text in texts)
+        words = np.frombuffer(digests, dtype=">u4").reshape(len(texts), _DIGEST_WORDS)
+        
+        width = min(_DIGEST_WORDS, self.dimension)
+        matrix[:, :width] = words[:, :width] / 2**32 - 1
+        
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+        nonzero = norms > 0
+        matrix[nonzero] /= norms[nonzero, None]
+        return matrix
+    
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of texts"""
-        return [self._hash_text(text) for text in texts]
+        return self.embed_documents_array(texts).tolist()
     
     def embed_query(self, text: str) -> List[float]:
         """Embed a single text"""
@@ -0,0 +1,136 @@
+# plsql_rag_chat/lib/embeddings/hashing_embeddings.py
+
+import hashlib
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from plsql_rag_chat.lib.retrieval.tokenizer import tokenize_plsql
+
+# Bump when the features change, so cached vectors and indexes are rebuilt
+HASHING_VERSION = 1
+
+# Words found in nearly every chunk, i.e. with a low inverse document frequency
+PLSQL_KEYWORDS = frozenset("""
+begin end if then else elsif loop while exit when case return procedure function
+package body declare is as in out nocopy not null and or true false type table
+record index by of constant default varchar2 char number integer pls_integer
+binary_integer boolean date rowtype select into from where values insert update
+delete set commit rollback raise exception others cursor open close fetch create
+replace pragma
+""".split())
+
+_HASH_BYTES = 8
+
+class HashingEmbeddings(Embeddings):
+    """TF-IDF-style embeddings of PL/SQL identifiers via the hashing trick
+
+    A text's features are the terms of the lexical tokenizer (identifiers,
+    qualified names and their snake_case/camelCase parts) and the character
+    n-grams of each term, so `GENERATE_MOVES` is close to `generate moves` and
+    `gen_moves`. Features are hashed with a sign into `dimension` buckets and
+    weighted by sublinear term frequency; keywords present in almost every
+    chunk are down-weighted by a fixed factor instead of a corpus-fitted IDF,
+    so vectors never change when other files are re-indexed. Batches are
+    scattered into one matrix with NumPy; no model is downloaded.
+    """
+
+    def __init__(
+        self,
+        dimension: int = 384,
+        ngram_range: Tuple[int, int] = (3, 4),
+        ngram_weight: float = 0.5,
+        keyword_weight: float = 0.2
+    ):
+        self.dimension = dimension
+        self.ngram_range = ngram_range
+        self.ngram_weight = ngram_weight
+        self.keyword_weight = keyword_weight
+        self.model_id = (
+            f"hashing-v{HASHING_VERSION}-n{ngram_range[0]}{ngram_range[1]}"
+            f"-g{ngram_weight:g}-k{keyword_weight:g}"
+        )
+        # Signed bucket of each feature (~bucket when negative), and per-term vectors
+        self._codes: Dict[str, int] = {}
+        self._terms: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _features(self, term: str) -> Dict[str, float]:
+        """Weighted features of one term: the term itself and its character n-grams"""
+        weight = self.keyword_weight if term in PLSQL_KEYWORDS else 1.0
+        features = {"t:" + term: weight}
+        low, high = self.ngram_range
+        if "." in term or weight < 1.0 or len(term) < low:
+            return features
+        padded = f"<{term}>"
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                key = "g:" + padded[i:i + n]
+                features[key] = features.get(key, 0.0) + self.ngram_weight
+        return features
+
+    def _term_vector(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Buckets and signed weights of a term's features, hashed once per term"""
+        cached = self._terms.get(term)
+        if cached is not None:
+            return cached
+        features = self._features(term)
+        with self._lock:
+            # n-grams are shared by many terms, so each is hashed once
+            new = [f for f in features if f not in self._codes]
+            if new:
+                digests = b"".join(hashlib.blake2b(f.encode(), digest_size=_HASH_BYTES).digest() for f in new)
+                values = np.frombuffer(digests, dtype="<u8")
+                buckets = (values % np.uint64(self.dimension)).astype(np.int64)
+                codes = np.where(values >> np.uint64(63), ~buckets, buckets)
+                self._codes.update(zip(new, codes.tolist()))
+            codes = np.fromiter(map(self._codes.__getitem__, features), dtype=np.int64, count=len(features))
+            if len(self._terms) >= 200_000:
+                self._terms.clear()
+                self._codes.clear()
+            negative = codes < 0
+            vector = (
+                np.where(negative, ~codes, codes),
+                np.where(negative, -1.0, 1.0) * np.fromiter(features.values(), dtype=np.float64)
+            )
+            self._terms[term] = vector
+        return vector
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """Embed a list of texts into a single (n, dimension) float32 matrix"""
+        buckets: List[np.ndarray] = []
+        weights: List[np.ndarray] = []
+        scales: List[float] = []
+        for row, text in enumerate(texts):
+            offset = row * self.dimension
+            for term, count in Counter(tokenize_plsql(text)).items():
+                term_buckets, term_weights = self._term_vector(term)
+                buckets.append(term_buckets + offset)
+                weights.append(term_weights)
+                # Sublinear term frequency
+                scales.append(1.0 + math.log(count))
+
+        cells = len(texts) * self.dimension
+        if not buckets:
+            return np.zeros((len(texts), self.dimension), dtype=np.float32)
+        lengths = np.fromiter((len(b) for b in buckets), dtype=np.int64, count=len(buckets))
+        values = np.concatenate(weights) * np.repeat(np.asarray(scales), lengths)
+        matrix = np.bincount(np.concatenate(buckets), weights=values, minlength=cells)
+        matrix = matrix.reshape(len(texts), self.dimension).astype(np.float32)
+
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+        nonzero = norms > 0
+        matrix[nonzero] /= norms[nonzero, None]
+        return matrix
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts"""
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text"""
+        return self.embed_documents_array([text])[0].tolist()
@@ -0,0 +1,23 @@
+# plsql_rag_chat/lib/ingestion/__init__.py
+
+from plsql_rag_chat.lib.lazy import lazy_exports
+
+# Imported on first use: the app needs store.py without FAISS and LangChain
+_EXPORTS = {
+    'ChessPackageManager': 'package_manager',
+    'PLSQLParser': 'parser',
+    'RoutineChunker': 'chunker',
+    'CompactDocstore': 'docstore',
+    'NativeVectorStore': 'native_store',
+    'read_plsql_file': 'loader',
+    'load_package': 'loader',
+    'split_document': 'loader',
+    'extract_call_graph': 'calls',
+    'resolve_store_dir': 'store',
+    'ingest_files': 'parallel',
+    'IncrementalIndexer': 'indexer',
+    'update_vectorstore': 'indexer'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(__name__, _EXPORTS)
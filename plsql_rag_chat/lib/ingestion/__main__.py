@@ -0,0 +1,7 @@
+# plsql_rag_chat/lib/ingestion/__main__.py
+
+import sys
+
+from plsql_rag_chat.lib.ingestion.cli import main
+
+sys.exit(main())
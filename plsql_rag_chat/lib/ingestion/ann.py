@@ -0,0 +1,89 @@
+# plsql_rag_chat/lib/ingestion/ann.py
+
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANN_FILE = "ann.faiss"
+
+# Named presets; any other value is passed to faiss.index_factory unchanged
+INDEX_PRESETS = ("flat", "ivf", "hnsw", "ivfpq")
+
+# faiss k-means wants this many training points per centroid
+_POINTS_PER_CENTROID = 39
+
+# Quantizers are trained on a fixed-seed sample of at most this many vectors
+MAX_TRAINING_POINTS = 100_000
+
+def resolve_index_spec(spec: str, count: int, dimension: int) -> str:
+    """Turn a preset name into a faiss factory string sized for `count` vectors"""
+    name = spec.strip()
+    preset = name.lower()
+    nlist = max(1, min(int(4 * math.sqrt(count)), count // _POINTS_PER_CENTROID))
+    if preset == "flat":
+        return "Flat"
+    if preset == "ivf":
+        return f"IVF{nlist},Flat"
+    if preset == "hnsw":
+        return "HNSW32"
+    if preset == "ivfpq":
+        # One sub-quantizer per 8 dimensions; fewer bits when there is little
+        # data to train the 2**bits centroids of each sub-quantizer
+        subquantizers = max(d for d in range(1, dimension // 8 + 1) if dimension % d == 0)
+        bits = min(8, max(4, int(math.log2(max(count // _POINTS_PER_CENTROID, 1)))))
+        return f"IVF{nlist},PQ{subquantizers}x{bits}"
+    return name
+
+def is_exact(spec: str) -> bool:
+    return spec.strip().lower() == "flat"
+
+def build_ann_index(vectors: np.ndarray, spec: str) -> Optional[faiss.Index]:
+    """Train and fill an L2 index for `vectors`; None if the spec cannot be built
+
+    Too few vectors to train the requested quantizers is the usual reason for
+    None, in which case callers fall back to exact search.
+    """
+    count, dimension = vectors.shape
+    factory = resolve_index_spec(spec, count, dimension)
+    try:
+        index = faiss.index_factory(dimension, factory, faiss.METRIC_L2)
+        if not index.is_trained:
+            sample = vectors
+            if count > MAX_TRAINING_POINTS:
+                rows = np.random.default_rng(0).choice(count, MAX_TRAINING_POINTS, replace=False)
+                sample = vectors[np.sort(rows)]
+            index.train(np.ascontiguousarray(sample, dtype=np.float32))
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        logger.info(f"Built {factory} index over {count} vectors")
+        return index
+    except RuntimeError as e:
+        logger.warning(f"Cannot build {factory} index over {count} vectors, using exact search: {str(e)}")
+        return None
+
+def configure_search(index: faiss.Index, params: Dict[str, Any]):
+    """Apply query-time knobs (nprobe, efSearch) that the index supports"""
+    space = faiss.ParameterSpace()
+    for name, value in params.items():
+        if value is None:
+            continue
+        try:
+            space.set_index_parameter(index, name, value)
+        except RuntimeError:
+            # e.g. efSearch on an IVF index
+            continue
+
+def write_ann_index(index: faiss.Index, store_dir: Path):
+    faiss.write_index(index, str(Path(store_dir) / ANN_FILE))
+
+def read_ann_index(store_dir: Path) -> Optional[faiss.Index]:
+    """Open the ANN index of a store, memory-mapping inverted lists where possible"""
+    path = Path(store_dir) / ANN_FILE
+    if not path.exists():
+        return None
+    return faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
@@ -0,0 +1,98 @@
+# plsql_rag_chat/lib/ingestion/calls.py
+
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from plsql_rag_chat.lib.ingestion.parser import PLSQLParser
+from plsql_rag_chat.lib.retrieval.callgraph import CallGraph
+
+logger = logging.getLogger(__name__)
+
+def _overlapping(chunks: List[Tuple[int, int, int]], start: int, end: int) -> List[int]:
+    return [row for chunk_start, chunk_end, row in chunks if chunk_start < end and chunk_end > start]
+
+def extract_call_graph(
+    documents: Iterable[Tuple[str, Document]],
+    routines: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> CallGraph:
+    """Routine-level call graph of the chunks held by a store
+
+    Each file is reassembled from its chunks, which are exact slices of the
+    source, and every name referenced in a routine body is resolved to a
+    routine: `PACKAGE.NAME` (optionally schema-qualified) to that package,
+    a bare `NAME` to the routine's own package, as PL/SQL resolves them.
+    Names that are not routines, such as variables and types, are dropped.
+    `routines` maps file names to their parsed routines, for chunks read
+    back from a store, which does not keep them.
+    """
+    routines = routines or {}
+    files: Dict[str, Dict] = {}
+    chunk_ids: List[str] = []
+    chunk_keys: List[Tuple[str, int]] = []
+    for doc_id, doc in documents:
+        metadata = doc.metadata
+        if not metadata.get("file_name") or metadata.get("start_index") is None:
+            continue
+        entry = files.setdefault(metadata["file_name"], {
+            "package": (metadata.get("package_name") or "Unknown").upper(),
+            "routines": routines.get(metadata["file_name"]) or metadata.get("routines") or [],
+            "chunks": [],
+            "texts": []
+        })
+        entry["chunks"].append((metadata["start_index"], metadata["end_index"], len(chunk_ids)))
+        entry["texts"].append((metadata["start_index"], doc.page_content))
+        chunk_ids.append(doc_id)
+        chunk_keys.append((metadata["file_name"], metadata["start_index"]))
+
+    # Nodes first, so calls to routines of later files resolve
+    node_rows: Dict[Tuple[str, str], int] = {}
+    definitions: Dict[int, List[int]] = {}
+    declarations: Dict[int, List[int]] = {}
+    bodies: List[Tuple[str, int, int, int]] = []
+    for file_name, entry in sorted(files.items()):
+        entry["chunks"].sort()
+        for routine in entry["routines"]:
+            if routine.get("start") is None or routine.get("end") is None:
+                continue
+            node = node_rows.setdefault((entry["package"], routine["name"].upper()), len(node_rows))
+            rows = _overlapping(entry["chunks"], routine["start"], routine["end"])
+            if routine.get("has_body"):
+                definitions.setdefault(node, []).extend(rows)
+                bodies.append((file_name, node, routine["start"], routine["end"]))
+            else:
+                declarations.setdefault(node, []).extend(rows)
+    packages = {package for package, _ in node_rows}
+
+    calls: List[Counter] = [Counter() for _ in node_rows]
+    for file_name, node, start, end in bodies:
+        entry = files[file_name]
+        if "content" not in entry:
+            # Gaps between chunks are whitespace trimmed off by the chunker
+            parts, position = [], 0
+            for chunk_start, text in sorted(entry["texts"]):
+                if chunk_start >= position:
+                    parts.append(" " * (chunk_start - position) + text)
+                    position = chunk_start + len(text)
+            entry["content"] = "".join(parts)
+        for _, names in PLSQLParser.references(entry["content"], start, end):
+            if len(names) > 1 and names[-2] in packages:
+                key = (names[-2], names[-1])
+            elif len(names) > 1 and names[0] in packages:
+                key = (names[0], names[1])
+            else:
+                key = (entry["package"], names[0])
+            target = node_rows.get(key)
+            if target is not None and target != node:
+                calls[node][target] += 1
+
+    nodes = [f"{package}.{name}" for package, name in node_rows]
+    node_chunks = [
+        list(dict.fromkeys(definitions.get(node) or declarations.get(node) or []))
+        for node in range(len(nodes))
+    ]
+    graph = CallGraph.build(nodes, [dict(row) for row in calls], node_chunks, chunk_ids, chunk_keys)
+    logger.info(f"Extracted {graph.edges} call edges between {len(graph)} routines")
+    return graph
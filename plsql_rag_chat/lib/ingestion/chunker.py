@@ -0,0 +1,212 @@
+# plsql_rag_chat/lib/ingestion/chunker.py
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from plsql_rag_chat.lib.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+def _trim(content: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink a span so it neither starts nor ends with whitespace"""
+    while start < end and content[start].isspace():
+        start += 1
+    while end > start and content[end - 1].isspace():
+        end -= 1
+    return start, end
+
+def _is_comment_line(line: str) -> bool:
+    stripped = line.strip()
+    return (
+        stripped.startswith("--")
+        or stripped.startswith("/*")
+        or stripped.startswith("*")
+        or stripped.endswith("*/")
+    )
+
+def _is_break_line(line: str) -> bool:
+    """Lines after which a chunk can end without cutting a statement"""
+    stripped = line.strip()
+    return not stripped or stripped.endswith(";")
+
+class RoutineChunker:
+    """Split PL/SQL sources along routine and declaration boundaries
+
+    Each routine body becomes one chunk, together with the comment block that
+    directly precedes it. Text between routines (types, constants, package
+    headers) forms declaration chunks. Pieces larger than `max_tokens` are cut
+    at statement ends, and neighbours below `min_tokens` are merged while the
+    result stays within budget. Chunks are exact slices of the source, so
+    `start_index`/`end_index` always reproduce their text.
+    """
+
+    def __init__(self, max_tokens: int = 512, min_tokens: int = 64):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+
+    @property
+    def signature(self) -> str:
+        """Identify the chunking setup so a change forces a full re-index"""
+        return f"routine-{self.max_tokens}-{self.min_tokens}"
+
+    def chunk(self, content: str, routines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Chunk `content` using the routine spans produced by PLSQLParser"""
+        pieces = []
+        for segment in self._segments(content, routines):
+            pieces.extend(self._fit(content, segment))
+        chunks = self._merge(content, pieces)
+        for chunk in chunks:
+            chunk["text"] = content[chunk["start_index"]:chunk["end_index"]]
+        return chunks
+
+    # ------------------------------------------------------------------ #
+    # Segmentation
+    # ------------------------------------------------------------------ #
+
+    def _segments(self, content: str, routines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Nested routines lie inside their parent's span and stay with it
+        top_level = []
+        last_end = -1
+        for routine in sorted(routines, key=lambda r: r["start"]):
+            if routine.get("end") is None or routine["start"] < last_end:
+                continue
+            top_level.append(routine)
+            last_end = routine["end"]
+
+        segments = []
+        pos = 0
+        for routine in top_level:
+            start = self._leading_comment_start(content, pos, routine["start"])
+            self._add_segment(segments, content, pos, start, "declaration", [])
+            kind = "routine" if routine.get("has_body") else "declaration"
+            self._add_segment(segments, content, start, routine["end"], kind, [routine["name"]])
+            pos = routine["end"]
+        self._add_segment(segments, content, pos, len(content), "declaration", [])
+        return segments
+
+    @staticmethod
+    def _add_segment(
+        segments: List[Dict[str, Any]],
+        content: str,
+        start: int,
+        end: int,
+        kind: str,
+        names: List[str]
+    ):
+        start, end = _trim(content, start, end)
+        if start < end:
+            segments.append({
+                "kind": kind,
+                "start_index": start,
+                "end_index": end,
+                "routine_names": names
+            })
+
+    @staticmethod
+    def _leading_comment_start(content: str, lower: int, routine_start: int) -> int:
+        """Extend a routine upwards over the comment block directly above it"""
+        lines = content[lower:routine_start].splitlines(keepends=True)
+        start = routine_start
+        # Indentation in front of the PROCEDURE/FUNCTION keyword
+        if lines and not lines[-1].strip() and not lines[-1].endswith(("\n", "\r")):
+            start -= len(lines.pop())
+        while lines and lines[-1].strip() and _is_comment_line(lines[-1]):
+            start -= len(lines.pop())
+        return start
+
+    # ------------------------------------------------------------------ #
+    # Budgeting
+    # ------------------------------------------------------------------ #
+
+    def _fit(self, content: str, segment: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Cut a segment that exceeds the token budget at statement ends"""
+        start, end = segment["start_index"], segment["end_index"]
+        tokens = estimate_tokens(content[start:end])
+        if tokens <= self.max_tokens:
+            return [dict(segment, tokens=tokens, part=1, parts=1)]
+
+        spans: List[Tuple[int, int, int]] = []
+        current: List[Tuple[int, int, int, bool]] = []
+        current_tokens = 0
+
+        def flush(upto: int):
+            nonlocal current, current_tokens
+            if upto:
+                spans.append((
+                    current[0][0],
+                    current[upto - 1][1],
+                    sum(line[2] for line in current[:upto])
+                ))
+            current = current[upto:]
+            current_tokens = sum(line[2] for line in current)
+
+        for line_start, line_end in self._lines(content, start, end):
+            line = content[line_start:line_end]
+            line_tokens = estimate_tokens(line)
+            if line_tokens > self.max_tokens:
+                flush(len(current))
+                spans.extend(self._hard_split(content, line_start, line_end))
+                continue
+            if current and current_tokens + line_tokens > self.max_tokens:
+                # Prefer the last statement end in the second half of the chunk
+                cut, running = len(current), 0
+                for i, (_, _, t, is_break) in enumerate(current, 1):
+                    running += t
+                    if is_break and running >= self.max_tokens // 2:
+                        cut = i
+                flush(cut)
+            current.append((line_start, line_end, line_tokens, _is_break_line(line)))
+            current_tokens += line_tokens
+        flush(len(current))
+
+        pieces = []
+        for piece_start, piece_end, piece_tokens in spans:
+            piece_start, piece_end = _trim(content, piece_start, piece_end)
+            if piece_start < piece_end:
+                pieces.append(dict(
+                    segment,
+                    start_index=piece_start,
+                    end_index=piece_end,
+                    tokens=piece_tokens
+                ))
+        for i, piece in enumerate(pieces, 1):
+            piece["part"], piece["parts"] = i, len(pieces)
+        return pieces
+
+    @staticmethod
+    def _lines(content: str, start: int, end: int):
+        pos = start
+        while pos < end:
+            newline = content.find("\n", pos, end)
+            line_end = end if newline < 0 else newline + 1
+            yield pos, line_end
+            pos = line_end
+
+    def _hard_split(self, content: str, start: int, end: int) -> List[Tuple[int, int, int]]:
+        """Split a single overlong line into budget-sized slices"""
+        width = self.max_tokens * CHARS_PER_TOKEN // 2
+        spans = []
+        for piece_start in range(start, end, width):
+            piece_end = min(piece_start + width, end)
+            spans.append((piece_start, piece_end, estimate_tokens(content[piece_start:piece_end])))
+        return spans
+
+    def _merge(self, content: str, pieces: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Merge small neighbouring pieces while they fit the budget"""
+        chunks: List[Dict[str, Any]] = []
+        for piece in pieces:
+            previous: Optional[Dict[str, Any]] = chunks[-1] if chunks else None
+            if previous is not None and previous["parts"] == 1 and piece["parts"] == 1:
+                small = min(previous["tokens"], piece["tokens"]) < self.min_tokens
+                both_declarations = previous["kind"] == piece["kind"] == "declaration"
+                if small or both_declarations:
+                    tokens = estimate_tokens(content[previous["start_index"]:piece["end_index"]])
+                    if tokens <= self.max_tokens:
+                        previous["end_index"] = piece["end_index"]
+                        previous["tokens"] = tokens
+                        previous["routine_names"] = previous["routine_names"] + piece["routine_names"]
+                        if piece["kind"] == "routine":
+                            previous["kind"] = "routine"
+                        continue
+            chunks.append(dict(piece))
+
+        for chunk in chunks:
+            chunk["routine"] = chunk["routine_names"][0] if chunk["routine_names"] else None
+        return chunks
@@ -0,0 +1,80 @@
+# plsql_rag_chat/lib/ingestion/cli.py
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from plsql_rag_chat.config.settings import get_settings
+from plsql_rag_chat.lib.utils.helpers import get_embeddings
+from plsql_rag_chat.lib.ingestion.chunker import RoutineChunker
+from plsql_rag_chat.lib.ingestion.docstore import DOCSTORE_MODES
+from plsql_rag_chat.lib.ingestion.indexer import STORE_FORMATS, update_vectorstore
+
+logger = logging.getLogger(__name__)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Build or incrementally update the PL/SQL vector store"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(
+        prog="plsql-rag-ingest",
+        description="Build or incrementally update the PL/SQL vector store"
+    )
+    parser.add_argument("--documents", type=Path, default=settings.documents_path,
+                        help="Directory containing packages/ and metadata/")
+    parser.add_argument("--store", type=Path, default=settings.vector_store_path,
+                        help="Vector store directory")
+    parser.add_argument("--metadata", type=Path, default=settings.metadata_path,
+                        help="Output metadata JSON file")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-index every file")
+    parser.add_argument("--max-tokens", type=int, default=settings.chunk["max_tokens"],
+                        help="Token budget per chunk")
+    parser.add_argument("--format", choices=STORE_FORMATS, default=settings.vectorstore["format"],
+                        help="native: memory-mapped vectors with a SQLite sidecar; faiss: index.faiss + index.pkl")
+    parser.add_argument("--index", default=settings.vectorstore["index"],
+                        help="Native only. flat (exact), ivf, hnsw, ivfpq or a faiss index_factory string")
+    parser.add_argument("--docstore", choices=DOCSTORE_MODES, default=settings.vectorstore["docstore"],
+                        help="FAISS only. compact: texts in a memory-mapped blob; inline: texts pickled in index.pkl")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for parsing and splitting (default: CPU count, 1 = serial)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        stats = update_vectorstore(
+            args.documents,
+            args.store,
+            args.metadata,
+            embeddings=get_embeddings(),
+            full=args.full,
+            workers=args.workers,
+            chunker=RoutineChunker(
+                max_tokens=args.max_tokens,
+                min_tokens=settings.chunk["min_tokens"]
+            ),
+            docstore=args.docstore,
+            store_format=args.format,
+            index_spec=args.index
+        )
+    except Exception as e:
+        logger.error(f"Ingestion failed: {str(e)}", exc_info=True)
+        return 1
+
+    mode = "full rebuild" if stats["full_rebuild"] else "incremental update"
+    print(f"{mode} finished in {time.perf_counter() - start:.2f}s")
+    print(f"  files scanned : {stats['files']}")
+    print(f"  changed       : {', '.join(stats['changed']) or '-'}")
+    print(f"  removed       : {', '.join(stats['removed']) or '-'}")
+    print(f"  failed        : {', '.join(stats['failed']) or '-'}")
+    print(f"  chunks added  : {stats['chunks_added']}")
+    print(f"  chunks deleted: {stats['chunks_deleted']}")
+    print(f"  store         : {stats['store_dir']}")
+    for stage, seconds in stats.get("timings", {}).items():
+        print(f"  {stage:<14}: {seconds:.3f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
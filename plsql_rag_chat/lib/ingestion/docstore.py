@@ -0,0 +1,169 @@
+# plsql_rag_chat/lib/ingestion/docstore.py
+
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+logger = logging.getLogger(__name__)
+
+TEXT_BLOB_FILE = "texts.bin"
+
+# Metadata fields kept out of the pickled records and loaded only on request
+LAZY_FIELDS = ("formatted_content",)
+
+# Per-package metadata that is already in the metadata JSON
+DROPPED_FIELDS = ("routines",)
+
+DOCSTORE_MODES = ("compact", "inline")
+
+def text_digest(text: str) -> str:
+    """Content key used to store each distinct text once"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+class CompactDocstore(Docstore, AddableMixin):
+    """Docstore that keeps chunk texts in a memory-mapped blob next to the index
+
+    The pickled part holds only the small per-chunk metadata plus offsets into
+    `texts.bin`, where every distinct text (chunk bodies, formatted package
+    sources) is stored once. Texts are decoded on `search`, i.e. only for the
+    chunks a query actually retrieves, and lazy fields such as
+    `formatted_content` are read with `field` when a source is displayed.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._pending: Dict[str, str] = {}
+        self._blob_path: Optional[Path] = None
+        self._blob: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        if self._pending:
+            raise ValueError("CompactDocstore has unsaved texts; call pack() before saving")
+        return {"records": self._records, "spans": self._spans}
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__init__()
+        self._records = state["records"]
+        self._spans = state["spans"]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def attach(self, store_dir: Path):
+        """Point the docstore at the directory holding its text blob"""
+        with self._lock:
+            self._blob = None
+            self._blob_path = Path(store_dir) / TEXT_BLOB_FILE
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Add documents; their texts stay in memory until the next `pack`"""
+        overlapping = set(texts).intersection(self._records)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+        for doc_id, doc in texts.items():
+            metadata = dict(doc.metadata)
+            for field in DROPPED_FIELDS:
+                metadata.pop(field, None)
+            for field in LAZY_FIELDS:
+                if field in metadata:
+                    metadata[f"{field}_ref"] = self._intern(metadata.pop(field))
+            self._records[doc_id] = (metadata, self._intern(doc.page_content))
+
+    def delete(self, ids: List) -> None:
+        """Drop documents; their texts are reclaimed by the next `pack`"""
+        overlapping = set(ids).intersection(self._records)
+        if not overlapping:
+            raise ValueError(f"Tried to delete ids that do not exist: {ids}")
+        for doc_id in overlapping:
+            self._records.pop(doc_id)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Materialize the document stored under `search`"""
+        record = self._records.get(search)
+        if record is None:
+            return f"ID {search} not found."
+        metadata, ref = record
+        return Document(page_content=self.text(ref), metadata=dict(metadata))
+
+    def field(self, doc: Document, name: str) -> Optional[str]:
+        """Load a lazy metadata field such as `formatted_content` for `doc`"""
+        if name in doc.metadata:
+            return doc.metadata[name]
+        ref = doc.metadata.get(f"{name}_ref")
+        return self.text(ref) if ref else None
+
+    def text(self, ref: str) -> str:
+        """Decode one stored text by its digest"""
+        pending = self._pending.get(ref)
+        if pending is not None:
+            return pending
+        offset, length = self._spans[ref]
+        if not length:
+            return ""
+        return bytes(self._open_blob()[offset:offset + length]).decode("utf-8")
+
+    def pack(self, store_dir: Path):
+        """Write every referenced text to `store_dir`/texts.bin and switch to it
+
+        Texts of deleted documents are dropped, so the blob never grows past
+        the live corpus across incremental updates.
+        """
+        store_dir = Path(store_dir)
+        blob_path = store_dir / TEXT_BLOB_FILE
+        tmp_path = store_dir / f".{TEXT_BLOB_FILE}.tmp"
+
+        spans: Dict[str, Tuple[int, int]] = {}
+        offset = 0
+        with open(tmp_path, "wb") as f:
+            for metadata, ref in self._records.values():
+                refs = [ref] + [
+                    metadata[f"{field}_ref"] for field in LAZY_FIELDS
+                    if f"{field}_ref" in metadata
+                ]
+                for digest in refs:
+                    if digest in spans:
+                        continue
+                    data = self._raw(digest)
+                    f.write(data)
+                    spans[digest] = (offset, len(data))
+                    offset += len(data)
+        os.replace(tmp_path, blob_path)
+
+        with self._lock:
+            self._spans = spans
+            self._pending = {}
+            self._blob = None
+            self._blob_path = blob_path
+        logger.info(f"Packed {len(spans)} texts ({offset} bytes) into {blob_path}")
+
+    def _intern(self, text: str) -> str:
+        digest = text_digest(text)
+        if digest not in self._spans and digest not in self._pending:
+            self._pending[digest] = text
+        return digest
+
+    def _raw(self, ref: str) -> Union[bytes, memoryview]:
+        pending = self._pending.get(ref)
+        if pending is not None:
+            return pending.encode("utf-8")
+        offset, length = self._spans[ref]
+        if not length:
+            return b""
+        return memoryview(self._open_blob()[offset:offset + length])
+
+    def _open_blob(self) -> np.memmap:
+        with self._lock:
+            if self._blob is None:
+                if self._blob_path is None:
+                    raise ValueError("CompactDocstore is not attached to a store directory")
+                self._blob = np.memmap(self._blob_path, dtype=np.uint8, mode="r")
+            return self._blob
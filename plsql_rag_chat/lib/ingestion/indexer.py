@@ -0,0 +1,364 @@
+# plsql_rag_chat/lib/ingestion/indexer.py
+
+import datetime
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from plsql_rag_chat.lib.embeddings.cached_embeddings import CachedEmbeddings
+from plsql_rag_chat.lib.ingestion.ann import is_exact
+from plsql_rag_chat.lib.ingestion.calls import extract_call_graph
+from plsql_rag_chat.lib.ingestion.chunker import RoutineChunker
+from plsql_rag_chat.lib.ingestion.docstore import DOCSTORE_MODES, CompactDocstore
+from plsql_rag_chat.lib.ingestion.native_store import NativeVectorStore
+from plsql_rag_chat.lib.ingestion.package_manager import ChessPackageManager
+from plsql_rag_chat.lib.ingestion.parallel import StageTimer, ingest_files
+from plsql_rag_chat.lib.ingestion.store import (
+    new_generation_dir,
+    publish_generation,
+    resolve_store_dir,
+    write_json_atomic
+)
+from plsql_rag_chat.lib.retrieval.lexical import LexicalIndex, lexical_text
+from plsql_rag_chat.lib.retrieval.partitions import PartitionIndex
+from plsql_rag_chat.lib.retrieval.symbols import SYMBOLS_FILE, SymbolIndex, symbol_packages
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 2
+STORE_FORMATS = ("native", "faiss")
+
+def describe_embeddings(embeddings: Embeddings) -> str:
+    """Identify an embedding model so a model change forces a full rebuild"""
+    if isinstance(embeddings, CachedEmbeddings):
+        embeddings = embeddings.embeddings
+    dimension = getattr(embeddings, "dimension", "")
+    name = getattr(embeddings, "model_id", None) or type(embeddings).__name__
+    return f"{name}-{dimension}"
+
+def file_digest(file_path: Path) -> str:
+    """SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_ids(file_name: str, count: int) -> List[str]:
+    """Stable docstore ids for the chunks of one file"""
+    return [f"{file_name}:{i}" for i in range(count)]
+
+def iter_store_documents(vectorstore) -> Iterator[Tuple[str, Document]]:
+    """Yield (id, document) for every chunk held by a native or FAISS store"""
+    if isinstance(vectorstore, NativeVectorStore):
+        yield from vectorstore.iter_documents()
+        return
+    for doc_id in vectorstore.index_to_docstore_id.values():
+        yield doc_id, vectorstore.docstore.search(doc_id)
+
+class IncrementalIndexer:
+    """Keep the FAISS store in sync with the package sources
+
+    A manifest stored next to the index records the mtime, size and hash of
+    every source file together with the docstore ids of its chunks. On each run
+    only added or modified files are re-chunked and re-embedded; the chunks of
+    modified and removed files are deleted from the existing index by id.
+    """
+
+    def __init__(
+        self,
+        documents_path: Path,
+        store_path: Path,
+        metadata_path: Path,
+        embeddings: Embeddings,
+        workers: Optional[int] = None,
+        chunker: Optional[RoutineChunker] = None,
+        docstore: str = "compact",
+        store_format: str = "native",
+        index_spec: str = "flat"
+    ):
+        if docstore not in DOCSTORE_MODES:
+            raise ValueError(f"Unknown docstore mode: {docstore}")
+        if store_format not in STORE_FORMATS:
+            raise ValueError(f"Unknown vector store format: {store_format}")
+        if store_format != "native" and not is_exact(index_spec):
+            raise ValueError("Approximate indexes require the native store format")
+        self.documents_path = Path(documents_path)
+        self.store_path = Path(store_path)
+        self.metadata_path = Path(metadata_path)
+        self.embeddings = embeddings
+        self.workers = workers
+        self.chunker = chunker or RoutineChunker()
+        self.docstore = docstore
+        self.store_format = store_format
+        self.index_spec = index_spec
+
+    def load_manifest(self, store_dir: Path) -> Optional[Dict[str, Any]]:
+        """Load the manifest of the live store if it matches the current setup"""
+        manifest_path = store_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Unreadable manifest {manifest_path}: {str(e)}")
+            return None
+
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.info("Manifest version changed, rebuilding from scratch")
+            return None
+        if manifest.get("embeddings") != describe_embeddings(self.embeddings):
+            logger.info("Embedding model changed, rebuilding from scratch")
+            return None
+        if manifest.get("chunker") != self.chunker.signature:
+            logger.info("Chunking settings changed, rebuilding from scratch")
+            return None
+        if manifest.get("format", "faiss") != self.store_format:
+            logger.info("Vector store format changed, rebuilding from scratch")
+            return None
+        if manifest.get("index", "flat") != self.index_spec:
+            logger.info("Index type changed, rebuilding from scratch")
+            return None
+        if self.store_format == "faiss" and manifest.get("docstore", "inline") != self.docstore:
+            logger.info("Docstore mode changed, rebuilding from scratch")
+            return None
+        return manifest
+
+    def load_store(self, store_dir: Path):
+        """Open the live store so it can be updated in place of a rebuild"""
+        if self.store_format == "native":
+            vectorstore = NativeVectorStore.load_local(store_dir, self.embeddings)
+            vectorstore.index_spec = self.index_spec
+            return vectorstore
+        vectorstore = FAISS.load_local(
+            folder_path=str(store_dir),
+            embeddings=self.embeddings,
+            allow_dangerous_deserialization=True
+        )
+        if isinstance(vectorstore.docstore, CompactDocstore):
+            vectorstore.docstore.attach(store_dir)
+        return vectorstore
+
+    def plan(
+        self,
+        files: List[Path],
+        manifest_files: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Classify source files as unchanged, changed (incl. new) or removed"""
+        unchanged, changed, fingerprints = [], [], {}
+
+        for file_path in files:
+            stat = file_path.stat()
+            entry = manifest_files.get(file_path.name)
+            fingerprint = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+            # Cheap stat check first; hash only when it is inconclusive
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                fingerprint["sha256"] = entry["sha256"]
+            else:
+                fingerprint["sha256"] = file_digest(file_path)
+
+            fingerprints[file_path.name] = fingerprint
+            if entry and entry["sha256"] == fingerprint["sha256"]:
+                unchanged.append(file_path)
+            else:
+                changed.append(file_path)
+
+        current = {file_path.name for file_path in files}
+        removed = sorted(name for name in manifest_files if name not in current)
+        return {
+            "unchanged": unchanged,
+            "changed": changed,
+            "removed": removed,
+            "fingerprints": fingerprints
+        }
+
+    def run(self, full: bool = False) -> Dict[str, Any]:
+        """Bring the vector store up to date and return run statistics"""
+        manager = ChessPackageManager(self.documents_path)
+        manager.validate_paths()
+        package_details = manager.get_package_details()
+        dependencies = manager.get_package_dependencies()
+        files = manager.get_plsql_files()
+        logger.info(f"Found {len(files)} PL/SQL files")
+
+        store_dir = resolve_store_dir(self.store_path)
+        manifest = None if full else self.load_manifest(store_dir)
+        manifest_files = manifest["files"] if manifest else {}
+        plan = self.plan(files, manifest_files)
+
+        stats = {
+            "files": len(files),
+            "changed": [p.name for p in plan["changed"]],
+            "removed": plan["removed"],
+            "failed": [],
+            "full_rebuild": manifest is None,
+            "chunks_added": 0,
+            "chunks_deleted": 0
+        }
+
+        if manifest is not None and not plan["changed"] and not plan["removed"]:
+            logger.info("Vector store is up to date")
+            stats["store_dir"] = str(store_dir)
+            return stats
+
+        timer = StageTimer()
+        vectorstore = None
+        if manifest is not None:
+            with timer.measure("load"):
+                vectorstore = self.load_store(store_dir)
+            stale_ids = []
+            for name in [p.name for p in plan["changed"]] + plan["removed"]:
+                stale_ids.extend(manifest_files.get(name, {}).get("ids", []))
+            if stale_ids:
+                with timer.measure("delete"):
+                    vectorstore.delete(stale_ids)
+                stats["chunks_deleted"] = len(stale_ids)
+
+        new_files = {
+            file_path.name: manifest_files[file_path.name] for file_path in plan["unchanged"]
+        }
+        parsed_packages = {}
+        splits, split_ids = [], []
+
+        logger.info(f"Processing {len(plan['changed'])} changed files...")
+        results = ingest_files(
+            plan["changed"], package_details, dependencies, self.workers, timer, self.chunker
+        )
+        for file_path, result in zip(plan["changed"], results):
+            if result is None:
+                # Left out of the manifest, so the next run retries it
+                stats["failed"].append(file_path.name)
+                continue
+            ids = chunk_ids(file_path.name, len(result["splits"]))
+            splits.extend(result["splits"])
+            split_ids.extend(ids)
+            parsed_packages[file_path.name] = result["parsed"]
+            new_files[file_path.name] = dict(plan["fingerprints"][file_path.name], ids=ids)
+        stats["chunks_added"] = len(split_ids)
+        if stats["failed"]:
+            logger.warning(f"Failed to ingest {len(stats['failed'])} files: {', '.join(stats['failed'])}")
+
+        if splits:
+            texts = [doc.page_content for doc in splits]
+            with timer.measure("embed"):
+                vectors = self.embeddings.embed_documents(texts)
+            with timer.measure("index"):
+                text_embeddings = list(zip(texts, vectors))
+                metadatas = [doc.metadata for doc in splits]
+                if vectorstore is None and self.store_format == "native":
+                    vectorstore = NativeVectorStore.from_embeddings(
+                        text_embeddings,
+                        self.embeddings,
+                        metadatas=metadatas,
+                        ids=split_ids,
+                        index_spec=self.index_spec
+                    )
+                elif vectorstore is None:
+                    vectorstore = FAISS.from_embeddings(
+                        text_embeddings,
+                        self.embeddings,
+                        metadatas=metadatas,
+                        ids=split_ids,
+                        docstore=CompactDocstore() if self.docstore == "compact" else InMemoryDocstore()
+                    )
+                else:
+                    vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=split_ids)
+
+        for file_path in plan["unchanged"]:
+            new_files[file_path.name] = dict(
+                plan["fingerprints"][file_path.name],
+                ids=manifest_files[file_path.name]["ids"]
+            )
+
+        if vectorstore is None:
+            raise ValueError(f"No PL/SQL content found under {manager.packages_path}")
+
+        # Write the new generation aside, then switch readers over atomically
+        with timer.measure("save"):
+            generation_dir = new_generation_dir(self.store_path)
+            if isinstance(getattr(vectorstore, "docstore", None), CompactDocstore):
+                vectorstore.docstore.pack(generation_dir)
+            vectorstore.save_local(str(generation_dir))
+            packages = self.write_metadata(parsed_packages, plan, incremental=manifest is not None)
+        # Stored chunks do not keep their package's routines; the metadata has them all
+        routines = {p["file_name"]: p.get("routines", []) for p in packages if p.get("file_name")}
+        documents = list(iter_store_documents(vectorstore))
+        with timer.measure("lexical"):
+            LexicalIndex.build((doc_id, lexical_text(doc)) for doc_id, doc in documents).save(generation_dir)
+        with timer.measure("symbols"):
+            SymbolIndex.build(symbol_packages(documents, routines), generation_dir / SYMBOLS_FILE).close()
+        with timer.measure("callgraph"):
+            extract_call_graph(documents, routines).save(generation_dir)
+        with timer.measure("partitions"):
+            PartitionIndex.build(documents, routines).save(generation_dir)
+        with timer.measure("save"):
+            write_json_atomic(generation_dir / MANIFEST_FILE, {
+                "version": MANIFEST_VERSION,
+                "embeddings": describe_embeddings(self.embeddings),
+                "chunker": self.chunker.signature,
+                "format": self.store_format,
+                "index": self.index_spec,
+                "docstore": self.docstore,
+                "files": dict(sorted(new_files.items()))
+            }, indent=2)
+            publish_generation(self.store_path, generation_dir)
+
+        stats["store_dir"] = str(generation_dir)
+        stats["timings"] = timer.report()
+        stats["total_chunks"] = sum(len(entry["ids"]) for entry in new_files.values())
+        return stats
+
+    def write_metadata(
+        self,
+        parsed_packages: Dict[str, Dict[str, Any]],
+        plan: Dict[str, Any],
+        incremental: bool
+    ) -> List[Dict[str, Any]]:
+        """Merge freshly parsed packages into the metadata file and return them"""
+        packages = {}
+        if incremental and self.metadata_path.exists():
+            with open(self.metadata_path, "r") as f:
+                existing = json.load(f)
+            dropped = {p.name for p in plan["changed"]} | set(plan["removed"])
+            for package in existing.get("packages", []):
+                file_name = package.get("file_name")
+                if file_name and file_name not in dropped:
+                    packages[file_name] = package
+        packages.update(parsed_packages)
+
+        ordered = [packages[name] for name in sorted(packages)]
+        write_json_atomic(self.metadata_path, {
+            "packages": ordered,
+            "total_documents": len(ordered),
+            "creation_date": datetime.datetime.now().isoformat()
+        }, indent=2)
+        return ordered
+
+def update_vectorstore(
+    documents_path: Path,
+    store_path: Path,
+    metadata_path: Path,
+    embeddings: Embeddings,
+    full: bool = False,
+    workers: Optional[int] = None,
+    chunker: Optional[RoutineChunker] = None,
+    docstore: str = "compact",
+    store_format: str = "native",
+    index_spec: str = "flat"
+) -> Dict[str, Any]:
+    """Incrementally rebuild the vector store from the package sources"""
+    indexer = IncrementalIndexer(
+        documents_path, store_path, metadata_path, embeddings, workers, chunker,
+        docstore, store_format, index_spec
+    )
+    return indexer.run(full=full)
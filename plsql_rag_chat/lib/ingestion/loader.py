@@ -0,0 +1,115 @@
+# plsql_rag_chat/lib/ingestion/loader.py
+
+import copy
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import sqlparse
+from langchain_core.documents import Document
+
+from plsql_rag_chat.lib.ingestion.chunker import RoutineChunker
+from plsql_rag_chat.lib.ingestion.parser import PLSQLParser
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ['latin1', 'cp1252', 'iso-8859-1', 'utf-8']
+
+def read_plsql_file(file_path: Path) -> Optional[str]:
+    """Read a PL/SQL source file, trying each supported encoding in turn"""
+    for encoding in ENCODINGS:
+        try:
+            with open(file_path, 'r', encoding=encoding) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue
+    logger.error(f"Could not read {file_path.name} with any supported encoding")
+    return None
+
+def format_plsql(content: str, file_name: str) -> str:
+    """Pretty-print PL/SQL for display, falling back to the raw source"""
+    try:
+        return sqlparse.format(
+            content,
+            reindent=True,
+            keyword_case='upper'
+        )
+    except Exception as e:
+        # Newer sqlparse releases refuse very large inputs
+        logger.warning(f"Could not format {file_name}, keeping raw source: {str(e)}")
+        return content
+
+def build_document(
+    file_path: Path,
+    content: str,
+    parsed: Dict[str, Any],
+    formatted_content: str,
+    package_details: Dict[str, Any],
+    dependencies: Dict[str, List[str]]
+) -> Document:
+    """Merge curated package details into `parsed` and wrap the source as a document"""
+    package_name = parsed["package_name"]
+    
+    if package_name.lower() in package_details:
+        parsed.update(package_details[package_name.lower()])
+    
+    parsed["dependencies"] = dependencies.get(package_name.lower(), [])
+    parsed["file_name"] = file_path.name
+    
+    return Document(
+        page_content=content,
+        metadata={
+            "package_name": parsed["package_name"],
+            "routines": parsed["routines"],
+            "purpose": parsed.get("purpose", ""),
+            "dependencies": parsed["dependencies"],
+            "file_type": file_path.suffix,
+            "formatted_content": formatted_content,
+            "source": str(file_path),
+            "file_name": file_path.name
+        }
+    )
+
+def load_package(
+    file_path: Path,
+    package_details: Dict[str, Any],
+    dependencies: Dict[str, List[str]]
+) -> Optional[Tuple[Document, Dict[str, Any]]]:
+    """Parse one package file into a LangChain document and its metadata entry"""
+    content = read_plsql_file(file_path)
+    if content is None:
+        return None
+    
+    try:
+        parsed = PLSQLParser.parse_package(content)
+        formatted_content = format_plsql(content, file_path.name)
+        doc = build_document(
+            file_path, content, parsed, formatted_content, package_details, dependencies
+        )
+        return doc, parsed
+    except Exception as e:
+        logger.error(f"Error parsing {file_path.name}: {str(e)}")
+        return None
+
+def make_splits(doc: Document, chunks: List[Dict[str, Any]]) -> List[Document]:
+    """Wrap chunks of `doc` as documents carrying its metadata and their offsets"""
+    splits = []
+    for chunk in chunks:
+        metadata = copy.deepcopy(doc.metadata)
+        metadata.update({
+            "chunk_kind": chunk["kind"],
+            "routine": chunk["routine"],
+            "routine_names": chunk["routine_names"],
+            "start_index": chunk["start_index"],
+            "end_index": chunk["end_index"],
+            "part": chunk["part"],
+            "parts": chunk["parts"],
+            "tokens": chunk["tokens"]
+        })
+        splits.append(Document(page_content=chunk["text"], metadata=metadata))
+    return splits
+
+def split_document(doc: Document, chunker: Optional[RoutineChunker] = None) -> List[Document]:
+    """Split a package document into routine-aligned retrieval chunks"""
+    chunker = chunker or RoutineChunker()
+    return make_splits(doc, chunker.chunk(doc.page_content, doc.metadata["routines"]))
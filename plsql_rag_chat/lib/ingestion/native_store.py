@@ -0,0 +1,521 @@
+# plsql_rag_chat/lib/ingestion/native_store.py
+
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from plsql_rag_chat.lib.ingestion.ann import (
+    build_ann_index,
+    configure_search,
+    is_exact,
+    read_ann_index,
+    resolve_index_spec,
+    write_ann_index
+)
+from plsql_rag_chat.lib.ingestion.docstore import DROPPED_FIELDS, LAZY_FIELDS, text_digest
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+NORMS_FILE = "norms.f32"
+SIDECAR_FILE = "store.sqlite"
+FORMAT_VERSION = 1
+
+# Rows scored per matrix product, bounding the temporary memory of a search
+SEARCH_BLOCK_ROWS = 65536
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE chunks (
+    row INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    text_ref TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE TABLE texts (ref TEXT PRIMARY KEY, body TEXT NOT NULL);
+"""
+
+def is_native_store(store_dir: Path) -> bool:
+    """True if `store_dir` holds a store written by NativeVectorStore"""
+    return (Path(store_dir) / SIDECAR_FILE).exists()
+
+def _matches(metadata: Dict[str, Any], filter: Union[Callable, Dict[str, Any]]) -> bool:
+    if callable(filter):
+        return filter(metadata)
+    for key, value in filter.items():
+        if isinstance(value, list):
+            if metadata.get(key) not in value:
+                return False
+        elif metadata.get(key) != value:
+            return False
+    return True
+
+class NativeVectorStore(VectorStore):
+    """Pickle-free vector store that serves queries from memory-mapped files
+
+    A store directory holds the vectors as a raw row-major float32 matrix
+    (`vectors.f32`), their squared norms (`norms.f32`) and a SQLite sidecar
+    with chunk ids, JSON metadata and deduplicated texts. Opening a store only
+    maps the files and reads a few header rows, so every app worker shares one
+    copy of the vectors through the page cache. Search is exact L2, like the
+    flat FAISS index it replaces, and metadata is fetched only for the hits.
+
+    With a non-flat `index_spec` (see `ann.resolve_index_spec`) `save_local`
+    also writes an approximate index over the same vectors. Queries then take
+    their candidates from it and re-rank them exactly against `vectors.f32`.
+
+    Changes (`add_embeddings`, `delete`) are buffered in memory and written by
+    `save_local` to a new directory; a published store is never modified.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        dimension: int,
+        store_dir: Optional[Path] = None,
+        index_spec: str = "flat",
+        search_params: Optional[Dict[str, Any]] = None
+    ):
+        self.embedding = embedding
+        self.dimension = dimension
+        self.store_dir = Path(store_dir) if store_dir is not None else None
+        self.index_spec = index_spec
+        self.search_params = search_params or {}
+        self._ann = None
+        self._count = 0
+        self._vectors: Optional[np.memmap] = None
+        self._norms: Optional[np.memmap] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        # Unsaved changes
+        self._deleted: set = set()
+        self._pending: List[Tuple[str, str, List[float], Dict[str, Any]]] = []
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return self._count - len(self._deleted) + len(self._pending)
+
+    # ------------------------------------------------------------------ #
+    # Loading and saving
+    # ------------------------------------------------------------------ #
+
+    @classmethod
+    def load_local(
+        cls,
+        folder_path: Union[str, Path],
+        embeddings: Embeddings,
+        search_params: Optional[Dict[str, Any]] = None
+    ) -> "NativeVectorStore":
+        """Open a store directory without reading its vectors into memory"""
+        store_dir = Path(folder_path)
+        conn = sqlite3.connect(
+            f"file:{store_dir / SIDECAR_FILE}?mode=ro", uri=True, check_same_thread=False
+        )
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        if int(meta.get("version", 0)) != FORMAT_VERSION:
+            conn.close()
+            raise ValueError(f"Unsupported native store version in {store_dir}: {meta.get('version')}")
+
+        store = cls(
+            embeddings, int(meta["dimension"]), store_dir,
+            index_spec=meta.get("index", "flat"), search_params=search_params
+        )
+        store._conn = conn
+        store._count = int(meta["count"])
+        if store._count:
+            store._vectors = np.memmap(
+                store_dir / VECTORS_FILE, dtype=np.float32, mode="r",
+                shape=(store._count, store.dimension)
+            )
+            store._norms = np.memmap(
+                store_dir / NORMS_FILE, dtype=np.float32, mode="r", shape=(store._count,)
+            )
+            if not is_exact(store.index_spec):
+                store._ann = read_ann_index(store_dir)
+                if store._ann is not None:
+                    configure_search(store._ann, {
+                        name: value for name, value in store.search_params.items() if name != "refine"
+                    })
+        return store
+
+    def save_local(self, folder_path: Union[str, Path]):
+        """Write the live rows, including unsaved changes, to `folder_path`"""
+        target = Path(folder_path)
+        target.mkdir(parents=True, exist_ok=True)
+        if self.store_dir is not None and target.resolve() == self.store_dir.resolve():
+            raise ValueError("Native stores are immutable; save to a new directory")
+
+        conn = sqlite3.connect(target / SIDECAR_FILE)
+        try:
+            conn.executescript(_SCHEMA)
+            row = 0
+            with open(target / VECTORS_FILE, "wb") as vectors_file, \
+                    open(target / NORMS_FILE, "wb") as norms_file:
+                # Rows carried over from the store this one was loaded from
+                if self._count:
+                    conn.execute("ATTACH DATABASE ? AS old", (str(self.store_dir / SIDECAR_FILE),))
+                    conn.execute("CREATE TEMP TABLE live_refs (ref TEXT PRIMARY KEY)")
+                    old_rows = self._read_conn().execute(
+                        "SELECT row, id, text_ref, metadata FROM chunks ORDER BY row"
+                    ).fetchall()
+                    kept = [r for r in old_rows if r[0] not in self._deleted]
+                    for start in range(0, len(kept), SEARCH_BLOCK_ROWS):
+                        block = [r[0] for r in kept[start:start + SEARCH_BLOCK_ROWS]]
+                        vectors_file.write(np.ascontiguousarray(self._vectors[block]).tobytes())
+                        norms_file.write(np.ascontiguousarray(self._norms[block]).tobytes())
+                    for _, doc_id, text_ref, metadata in kept:
+                        conn.execute(
+                            "INSERT INTO chunks VALUES (?, ?, ?, ?)", (row, doc_id, text_ref, metadata)
+                        )
+                        refs = [text_ref] + self._lazy_refs(json.loads(metadata))
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO live_refs VALUES (?)", [(r,) for r in refs]
+                        )
+                        row += 1
+                    conn.execute(
+                        "INSERT OR IGNORE INTO main.texts "
+                        "SELECT ref, body FROM old.texts WHERE ref IN (SELECT ref FROM live_refs)"
+                    )
+                    conn.commit()
+                    conn.execute("DETACH DATABASE old")
+
+                for doc_id, text, vector, metadata in self._pending:
+                    array = np.asarray(vector, dtype=np.float32)
+                    vectors_file.write(array.tobytes())
+                    norms_file.write(np.float32(array @ array).tobytes())
+                    stored = dict(metadata)
+                    for field in DROPPED_FIELDS:
+                        stored.pop(field, None)
+                    for field in LAZY_FIELDS:
+                        if field in stored:
+                            stored[f"{field}_ref"] = self._insert_text(conn, stored.pop(field))
+                    conn.execute("INSERT INTO chunks VALUES (?, ?, ?, ?)", (
+                        row, doc_id, self._insert_text(conn, text), json.dumps(stored)
+                    ))
+                    row += 1
+
+            index_spec = "flat"
+            if row and not is_exact(self.index_spec):
+                vectors = np.fromfile(target / VECTORS_FILE, dtype=np.float32).reshape(row, self.dimension)
+                ann = build_ann_index(vectors, self.index_spec)
+                if ann is not None:
+                    write_ann_index(ann, target)
+                    index_spec = resolve_index_spec(self.index_spec, row, self.dimension)
+
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("version", str(FORMAT_VERSION)),
+                ("dimension", str(self.dimension)),
+                ("count", str(row)),
+                ("distance", "l2"),
+                ("index", index_spec)
+            ])
+            conn.commit()
+        finally:
+            conn.close()
+        logger.info(f"Saved native vector store with {row} vectors to {target}")
+
+    @staticmethod
+    def _insert_text(conn: sqlite3.Connection, text: str) -> str:
+        ref = text_digest(text)
+        conn.execute("INSERT OR IGNORE INTO texts VALUES (?, ?)", (ref, text))
+        return ref
+
+    @staticmethod
+    def _lazy_refs(metadata: Dict[str, Any]) -> List[str]:
+        return [metadata[f"{field}_ref"] for field in LAZY_FIELDS if f"{field}_ref" in metadata]
+
+    def _read_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            raise ValueError("Native vector store has no saved rows")
+        return self._conn
+
+    # ------------------------------------------------------------------ #
+    # Building
+    # ------------------------------------------------------------------ #
+
+    @classmethod
+    def from_embeddings(
+        cls,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        embedding: Embeddings,
+        metadatas: Optional[Iterable[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> "NativeVectorStore":
+        text_embeddings = list(text_embeddings)
+        if not text_embeddings:
+            raise ValueError("Cannot create a native vector store without vectors")
+        store = cls(embedding, len(text_embeddings[0][1]), index_spec=kwargs.get("index_spec", "flat"))
+        store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> "NativeVectorStore":
+        vectors = embedding.embed_documents(list(texts))
+        return cls.from_embeddings(zip(texts, vectors), embedding, metadatas=metadatas, ids=ids)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        vectors = self.embedding.embed_documents(texts)
+        return self.add_embeddings(zip(texts, vectors), metadatas=metadatas, ids=ids)
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[Tuple[str, List[float]]],
+        metadatas: Optional[Iterable[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Buffer new rows until the next `save_local`"""
+        text_embeddings = list(text_embeddings)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in text_embeddings]
+        ids = list(ids) if ids is not None else [text_digest(text) for text, _ in text_embeddings]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids found in the ids list.")
+
+        existing = set(self._live_rows(ids)) | {p[0] for p in self._pending}
+        overlapping = existing.intersection(ids)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+
+        for (text, vector), metadata, doc_id in zip(text_embeddings, metadatas, ids):
+            if len(vector) != self.dimension:
+                raise ValueError(f"Expected {self.dimension}-dim vectors, got {len(vector)}")
+            self._pending.append((doc_id, text, vector, metadata))
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Drop rows by id; saved rows are excluded from the next `save_local`"""
+        if ids is None:
+            raise ValueError("No ids provided to delete.")
+        rows = self._live_rows(ids)
+        dropped = set(ids)
+        pending_before = len(self._pending)
+        self._pending = [p for p in self._pending if p[0] not in dropped]
+        if not rows and len(self._pending) == pending_before:
+            raise ValueError(f"Tried to delete ids that do not exist: {ids}")
+        self._deleted.update(rows.values())
+        return True
+
+    def _live_rows(self, ids: List[str]) -> Dict[str, int]:
+        if not self._count or not ids:
+            return {}
+        rows = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows.update(self._read_conn().execute(
+                    f"SELECT id, row FROM chunks WHERE id IN ({placeholders})", batch
+                ))
+        return {doc_id: row for doc_id, row in rows.items() if row not in self._deleted}
+
+    # ------------------------------------------------------------------ #
+    # Search
+    # ------------------------------------------------------------------ #
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._euclidean_relevance_score_fn
+
+    def _distances(self, query: np.ndarray) -> np.ndarray:
+        """Squared L2 distance from `query` to every saved row"""
+        distances = np.empty(self._count, dtype=np.float32)
+        for start in range(0, self._count, SEARCH_BLOCK_ROWS):
+            stop = min(start + SEARCH_BLOCK_ROWS, self._count)
+            distances[start:stop] = self._norms[start:stop] - 2.0 * (self._vectors[start:stop] @ query)
+        distances += query @ query
+        return distances
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+        fetch_k: int = 20,
+        rows: Optional[Sequence[int]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Return the `k` nearest documents with their squared L2 distances
+
+        With `rows`, only those saved rows are searched, e.g. one partition.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        candidates: List[Tuple[float, Any]] = []
+
+        wanted = min(k if filter is None else max(k, fetch_k), self._count)
+        scoped = rows is not None
+        if scoped:
+            rows = np.asarray(rows, dtype=np.int64)
+            if self._deleted:
+                rows = rows[~np.isin(rows, list(self._deleted))]
+            wanted = min(wanted, len(rows))
+            if wanted:
+                # Exact distances for the selected rows only
+                distances = self._norms[rows] - 2.0 * (self._vectors[rows] @ query) + query @ query
+                best = np.argpartition(distances, wanted - 1)[:wanted]
+                candidates.extend((float(distances[i]), int(rows[i])) for i in best)
+        elif self._count and self._ann is not None and not self._deleted:
+            # Over-fetch so the exact re-ranking can repair quantization error
+            fetch = min(wanted * max(int(self.search_params.get("refine", 1)), 1), self._count)
+            _, found = self._ann.search(query[np.newaxis, :], fetch)
+            rows = np.sort(found[0][found[0] >= 0])
+            # Exact distances, so scores match a flat store even for PQ codes
+            distances = self._norms[rows] - 2.0 * (self._vectors[rows] @ query) + query @ query
+            best = np.argsort(distances)[:wanted]
+            candidates.extend((float(distances[i]), int(rows[i])) for i in best)
+        elif self._count:
+            distances = self._distances(query)
+            if self._deleted:
+                distances[list(self._deleted)] = np.inf
+            top = np.argpartition(distances, wanted - 1)[:wanted]
+            candidates.extend((float(distances[row]), int(row)) for row in top)
+        # Unsaved rows have no row number to select them by
+        for doc_id, text, vector, metadata in (self._pending if not scoped else []):
+            array = np.asarray(vector, dtype=np.float32) - query
+            candidates.append((float(array @ array), (doc_id, text, metadata)))
+
+        candidates = [c for c in candidates if np.isfinite(c[0])]
+        candidates.sort(key=lambda c: c[0])
+        results = []
+        for distance, doc in zip([c[0] for c in candidates], self._materialize([c[1] for c in candidates])):
+            if filter is not None and not _matches(doc.metadata, filter):
+                continue
+            results.append((doc, distance))
+            if len(results) == k:
+                break
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            results = [(doc, score) for doc, score in results if score <= score_threshold]
+        return results
+
+    def _materialize(self, keys: List[Any]) -> Iterable[Document]:
+        """Yield documents for saved row numbers or pending rows, in order"""
+        rows = [key for key in keys if isinstance(key, int)]
+        records = {}
+        if rows:
+            placeholders = ",".join("?" * len(rows))
+            with self._lock:
+                records = {
+                    row: (metadata, body)
+                    for row, metadata, body in self._read_conn().execute(
+                        "SELECT c.row, c.metadata, t.body FROM chunks c "
+                        f"JOIN texts t ON t.ref = c.text_ref WHERE c.row IN ({placeholders})",
+                        rows
+                    )
+                }
+        for key in keys:
+            if isinstance(key, int):
+                metadata, body = records[key]
+                yield Document(page_content=body, metadata=json.loads(metadata))
+            else:
+                _, text, metadata = key
+                yield Document(page_content=text, metadata=dict(metadata))
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(
+            embedding, k, filter=filter, fetch_k=fetch_k, **kwargs
+        )]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(
+            self.embedding.embed_query(query), k, filter=filter, fetch_k=fetch_k, **kwargs
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+        fetch_k: int = 20,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(
+            query, k, filter=filter, fetch_k=fetch_k, **kwargs
+        )]
+
+    # ------------------------------------------------------------------ #
+    # Lookup by id
+    # ------------------------------------------------------------------ #
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        """Documents for `ids` in the given order; unknown ids are skipped"""
+        rows = self._live_rows(list(ids))
+        pending = {p[0]: p for p in self._pending}
+        keys = []
+        for doc_id in ids:
+            if doc_id in rows:
+                keys.append(rows[doc_id])
+            elif doc_id in pending:
+                _, text, _, metadata = pending[doc_id]
+                keys.append((doc_id, text, metadata))
+        return list(self._materialize(keys))
+
+    def iter_documents(self) -> Iterator[Tuple[str, Document]]:
+        """Yield (id, document) for every live row, including unsaved ones"""
+        if self._count:
+            with self._lock:
+                records = self._read_conn().execute(
+                    "SELECT c.row, c.id, c.metadata, t.body FROM chunks c "
+                    "JOIN texts t ON t.ref = c.text_ref ORDER BY c.row"
+                ).fetchall()
+            for row, doc_id, metadata, body in records:
+                if row not in self._deleted:
+                    yield doc_id, Document(page_content=body, metadata=json.loads(metadata))
+        for doc_id, text, _, metadata in self._pending:
+            yield doc_id, Document(page_content=text, metadata=dict(metadata))
+
+    # ------------------------------------------------------------------ #
+    # Lazy fields
+    # ------------------------------------------------------------------ #
+
+    def field(self, doc: Document, name: str) -> Optional[str]:
+        """Load a lazy metadata field such as `formatted_content` for `doc`"""
+        if name in doc.metadata:
+            return doc.metadata[name]
+        ref = doc.metadata.get(f"{name}_ref")
+        if not ref:
+            return None
+        with self._lock:
+            row = self._read_conn().execute("SELECT body FROM texts WHERE ref = ?", (ref,)).fetchone()
+        return row[0] if row else None
@@ -0,0 +1,56 @@
+# plsql_rag_chat/lib/ingestion/package_manager.py
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+class ChessPackageManager:
+    """Specialized manager for chess engine packages"""
+    
+    def __init__(self, base_path="documents"):
+        self.base_path = Path(base_path)
+        self.packages_path = self.base_path / "packages"
+        self.metadata_path = self.base_path / "metadata"
+        
+    def validate_paths(self):
+        """Validate that required paths exist"""
+        if not self.packages_path.exists():
+            raise ValueError(f"Packages directory not found: {self.packages_path}")
+        if not self.metadata_path.exists():
+            logger.info(f"Creating metadata directory: {self.metadata_path}")
+            self.metadata_path.mkdir(parents=True, exist_ok=True)
+    
+    def load_metadata(self) -> Dict[str, Any]:
+        """Load chess package metadata"""
+        metadata_file = self.metadata_path / "package_info.json"
+        if metadata_file.exists():
+            try:
+                with open(metadata_file, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError as e:
+                logger.error(f"Error reading metadata file: {e}. Using empty metadata.")
+                return {}
+        return {}
+
+    def get_package_dependencies(self) -> Dict[str, List[str]]:
+        """Extract package dependencies from metadata"""
+        metadata = self.load_metadata()
+        dependencies = {}
+        if 'chess' in metadata and 'packages' in metadata['chess']:
+            for pkg, info in metadata['chess']['packages'].items():
+                dependencies[pkg] = info.get('dependencies', [])
+        return dependencies
+
+    def get_package_details(self) -> Dict[str, Any]:
+        """Get detailed information about each package"""
+        metadata = self.load_metadata()
+        if 'chess' in metadata and 'packages' in metadata['chess']:
+            return metadata['chess']['packages']
+        return {}
+
+    def get_plsql_files(self) -> List[Path]:
+        """Get all PL/SQL files in the packages directory, in a stable order"""
+        return sorted(self.packages_path.glob("*.pk[sb]"))
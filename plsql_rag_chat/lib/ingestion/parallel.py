@@ -0,0 +1,203 @@
+# plsql_rag_chat/lib/ingestion/parallel.py
+
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from plsql_rag_chat.lib.ingestion.loader import (
+    build_document,
+    format_plsql,
+    make_splits,
+    read_plsql_file
+)
+from plsql_rag_chat.lib.ingestion.chunker import RoutineChunker
+from plsql_rag_chat.lib.ingestion.parser import PLSQLParser
+
+logger = logging.getLogger(__name__)
+
+# Characters of source per format task; sqlparse also refuses very large inputs
+FORMAT_SHARD_CHARS = 8000
+
+def format_spans(
+    content: str,
+    routines: List[Dict[str, Any]],
+    size: int = FORMAT_SHARD_CHARS
+) -> List[Tuple[int, int]]:
+    """Cut a file into spans of about `size` characters, formatted as separate tasks
+
+    Cuts fall at the start of top-level routines and, outside routines, after
+    lines ending in `;`, so no statement is split. A statement longer than
+    `size`, such as a large constant, stays in one span.
+    """
+    top: List[Tuple[int, int]] = []
+    last_end = 0
+    for routine in sorted(
+        (r for r in routines if r.get("start") is not None and r.get("end") is not None),
+        key=lambda r: r["start"]
+    ):
+        if routine["start"] >= last_end:
+            top.append((routine["start"], routine["end"]))
+        last_end = max(last_end, routine["end"])
+
+    points = {start for start, _ in top}
+    number = 0
+    for match in re.finditer(r";[ \t]*\n", content):
+        while number < len(top) and top[number][1] <= match.end():
+            number += 1
+        if number == len(top) or match.end() <= top[number][0]:
+            points.add(match.end())
+
+    bounds = [0]
+    for point in sorted(points):
+        if point - bounds[-1] >= size and point < len(content):
+            bounds.append(point)
+    bounds.append(len(content))
+    return list(zip(bounds, bounds[1:]))
+
+def run_stage(
+    stage: str,
+    content: str,
+    file_name: str,
+    chunker: RoutineChunker
+) -> Tuple[Any, Dict[str, float]]:
+    """Run one ingestion task on a file's content, or a span of it for format; executed in worker processes"""
+    start = time.perf_counter()
+    if stage == "parse":
+        # Chunking needs the routine spans, so it runs in the same task
+        parsed = PLSQLParser.parse_package(content)
+        parsed_at = time.perf_counter()
+        chunks = chunker.chunk(content, parsed["routines"])
+        return (parsed, chunks), {
+            "parse": parsed_at - start,
+            "chunk": time.perf_counter() - parsed_at
+        }
+    elif stage == "format":
+        return format_plsql(content, file_name), {"format": time.perf_counter() - start}
+    raise ValueError(f"Unknown ingestion stage: {stage}")
+
+class StageTimer:
+    """Accumulate per-stage timings for an ingestion run"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = defaultdict(float)
+
+    def add(self, stage: str, seconds: float):
+        self.timings[stage] += seconds
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def report(self) -> Dict[str, float]:
+        return {stage: round(seconds, 4) for stage, seconds in self.timings.items()}
+
+def ingest_files(
+    files: List[Path],
+    package_details: Dict[str, Any],
+    dependencies: Dict[str, List[str]],
+    workers: Optional[int] = None,
+    timer: Optional[StageTimer] = None,
+    chunker: Optional[RoutineChunker] = None
+) -> List[Optional[Dict[str, Any]]]:
+    """Read, parse, chunk and format package files, optionally across a process pool
+
+    Every file is parsed and chunked in one task. Formatting, the dominant
+    cost, is then sharded along the routine spans the parser found (see
+    `format_spans`), so a large package body is formatted by several workers
+    instead of pinning one. Results are reassembled in input order, which makes
+    the output identical to a serial run regardless of scheduling. Entries are
+    None for files that could not be read or parsed.
+    """
+    timer = timer or StageTimer()
+    chunker = chunker or RoutineChunker()
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+
+    contents: Dict[int, str] = {}
+    with timer.measure("read"):
+        for index, file_path in enumerate(files):
+            content = read_plsql_file(file_path)
+            if content is not None:
+                contents[index] = content
+
+    outputs: Dict[Tuple[int, str, int], Any] = {}
+    failed = set()
+
+    def collect(task: Tuple[int, str, int, str], run):
+        index, stage, part, _ = task
+        try:
+            result, timings = run()
+            outputs[(index, stage, part)] = result
+            for name, seconds in timings.items():
+                timer.add(name, seconds)
+        except Exception as e:
+            logger.error(f"Error in {stage} stage for {files[index].name}: {str(e)}")
+            failed.add(index)
+
+    def run_tasks(executor: Optional[ProcessPoolExecutor], tasks: List[Tuple[int, str, int, str]]):
+        # Largest first so the long tasks do not end up last in the queue
+        tasks = sorted(tasks, key=lambda task: -len(task[3]))
+        if executor is None:
+            for task in tasks:
+                collect(task, lambda: run_stage(task[1], task[3], files[task[0]].name, chunker))
+            return
+        futures = [
+            (task, executor.submit(run_stage, task[1], task[3], files[task[0]].name, chunker))
+            for task in tasks
+        ]
+        for task, future in futures:
+            collect(task, future.result)
+
+    shards: Dict[int, int] = {}
+    wall_start = time.perf_counter()
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        run_tasks(executor, [(index, "parse", 0, content) for index, content in contents.items()])
+        # Format spans follow the parsed routines, so they are scheduled once parsing is done
+        format_tasks = []
+        for index, content in contents.items():
+            if index in failed:
+                continue
+            parsed, _ = outputs[(index, "parse", 0)]
+            spans = format_spans(content, parsed["routines"])
+            shards[index] = len(spans)
+            format_tasks.extend(
+                (index, "format", part, content[start:end]) for part, (start, end) in enumerate(spans)
+            )
+        run_tasks(executor, format_tasks)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    timer.add("process_wall", time.perf_counter() - wall_start)
+
+    results: List[Optional[Dict[str, Any]]] = []
+    with timer.measure("assemble"):
+        for index, file_path in enumerate(files):
+            if index not in contents or index in failed:
+                results.append(None)
+                continue
+            parsed, chunks = outputs[(index, "parse", 0)]
+            doc = build_document(
+                file_path,
+                contents[index],
+                parsed,
+                "".join(outputs[(index, "format", part)] for part in range(shards[index])),
+                package_details,
+                dependencies
+            )
+            results.append({
+                "file_path": file_path,
+                "document": doc,
+                "parsed": parsed,
+                "splits": make_splits(doc, chunks)
+            })
+    return results
@@ -0,0 +1,298 @@
+# plsql_rag_chat/lib/ingestion/parser.py
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Comments, strings and quoted identifiers are matched as whole units so that
+# keywords inside them are never seen. Every branch consumes its input without
+# nested quantifiers, so each scan is a single linear pass over the source.
+_OPAQUE = r"""
+      (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+    | (?<![\w$#])(?P<qstring>[nN]?[qQ]'(?:\[.*?\]|\{.*?\}|<.*?>|\(.*?\)|(?P<qdelim>\S).*?(?P=qdelim))(?:'|\Z))
+    | (?P<string>[nN]?'[^']*(?:''[^']*)*(?:'|\Z))
+    | (?P<qident>"[^"]*(?:"|\Z))
+"""
+
+# Full tokenizer, used inside routine headers and after END
+_TOKEN_PATTERN = re.compile(
+    _OPAQUE + r"""
+    | (?P<word>[A-Za-z][A-Za-z0-9_$#]*)
+    | (?P<punct>[();.])
+    """,
+    re.VERBOSE | re.DOTALL
+)
+
+# Block-structure scanner: jumps straight from one structural keyword to the
+# next, skipping everything else in C instead of tokenizing every identifier.
+# The leading lookahead lists every possible first character, which lets the
+# regex engine reject all other positions without trying each alternative.
+_KEYWORD_PATTERN = re.compile(
+    r"(?=[-/'\"nNqQpPfFbBcCeE])(?:" + _OPAQUE + r"""
+    | (?<![\w$#])(?P<keyword>(?i:PACKAGE|PROCEDURE|FUNCTION|BEGIN|CASE|END))(?![\w$#])
+    )""",
+    re.VERBOSE | re.DOTALL
+)
+
+# Names, possibly dotted, as referenced from routine bodies
+_REFERENCE_PATTERN = re.compile(
+    _OPAQUE + r"""
+    | (?P<name>[A-Za-z][A-Za-z0-9_$#]*(?:\s*\.\s*[A-Za-z][A-Za-z0-9_$#]*)*)
+    """,
+    re.VERBOSE | re.DOTALL
+)
+
+# Keywords that may sit between a function's RETURN type and IS/AS/;
+_ROUTINE_MODIFIERS = {
+    "PIPELINED", "DETERMINISTIC", "PARALLEL_ENABLE", "RESULT_CACHE",
+    "AUTHID", "AGGREGATE", "USING", "ACCESSIBLE", "SHARING"
+}
+
+def categorize_routine(routine_name: str) -> str:
+    """Assign a routine to one of the PACKAGE_CATEGORIES by name"""
+    name = routine_name.lower()
+    if any(term in name for term in ['move', 'position', 'piece']):
+        return "move_generation"
+    elif any(term in name for term in ['eval', 'score', 'value']):
+        return "evaluation"
+    elif any(term in name for term in ['fen', 'pgn', 'notation']):
+        return "notation"
+    return "general"
+
+class _Token:
+    __slots__ = ("kind", "text", "upper", "start", "end")
+
+    def __init__(self, kind: str, text: str, start: int, end: int):
+        self.kind = kind
+        self.text = text
+        self.upper = text.upper() if kind == "word" else text
+        self.start = start
+        self.end = end
+
+class _Scanner:
+    """Position-based reader over PL/SQL source with token lookahead"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.pos = 0
+        self._peeked: Optional[_Token] = None
+
+    def next_keyword(self) -> Optional[_Token]:
+        """Advance to the next structural keyword outside comments and strings"""
+        if self._peeked is not None:
+            self.pos = self._peeked.start
+            self._peeked = None
+        while True:
+            match = _KEYWORD_PATTERN.search(self.content, self.pos)
+            if match is None:
+                self.pos = len(self.content)
+                return None
+            self.pos = match.end()
+            if match.lastgroup == "keyword":
+                return _Token("word", match.group(), match.start(), match.end())
+
+    def peek(self) -> Optional[_Token]:
+        """Return the next token without consuming it"""
+        if self._peeked is None:
+            while True:
+                match = _TOKEN_PATTERN.search(self.content, self.pos)
+                if match is None:
+                    return None
+                kind = match.lastgroup
+                if kind == "comment":
+                    self.pos = match.end()
+                    continue
+                if kind == "qdelim":
+                    kind = "qstring"
+                self._peeked = _Token(kind, match.group(), match.start(), match.end())
+                break
+        return self._peeked
+
+    def next(self) -> Optional[_Token]:
+        token = self.peek()
+        if token is not None:
+            self.pos = token.end
+            self._peeked = None
+        return token
+
+    def next_if(self, *values: str) -> Optional[_Token]:
+        token = self.peek()
+        if token is not None and token.upper in values:
+            return self.next()
+        return None
+
+class PLSQLParser:
+    """Single-pass parser for PL/SQL package specs and bodies
+
+    Routines are reported with the character span of their declaration or
+    definition, from the PROCEDURE/FUNCTION keyword through the closing `;`.
+    The loader decodes sources as latin-1, so these spans are also byte
+    offsets into the file.
+    """
+
+    @staticmethod
+    def parse_package(content: str) -> Dict[str, Any]:
+        """Parse package content and extract chess-specific metadata"""
+        package_name, routines = PLSQLParser.parse_routines(content)
+        return {
+            "package_name": package_name or "Unknown",
+            "routines": routines,
+            "content": content.strip()
+        }
+
+    @staticmethod
+    def parse_routines(content: str) -> Tuple[Optional[str], List[Dict[str, Any]]]:
+        """Return the package name and every routine found in `content`"""
+        stream = _Scanner(content)
+        package_name = None
+        routines: List[Dict[str, Any]] = []
+
+        # Nesting of BEGIN/CASE blocks, and routines whose END is still pending
+        depth = 0
+        open_routines: List[List[Any]] = []
+
+        while True:
+            token = stream.next_keyword()
+            if token is None:
+                break
+            keyword = token.upper
+
+            if keyword == "PACKAGE" and package_name is None:
+                stream.next_if("BODY")
+                package_name = PLSQLParser._read_name(stream)
+
+            elif keyword in ("PROCEDURE", "FUNCTION"):
+                routine = PLSQLParser._read_header(content, stream, token)
+                if routine is None:
+                    continue
+                routines.append(routine)
+                terminator = stream.next()
+                if terminator is None:
+                    routine["end"] = len(content)
+                elif terminator.upper in ("IS", "AS"):
+                    routine["has_body"] = True
+                    if stream.next_if("LANGUAGE", "EXTERNAL"):
+                        routine["end"] = PLSQLParser._skip_to_semicolon(stream, len(content))
+                    else:
+                        open_routines.append([routine, None])
+                else:
+                    routine["end"] = terminator.end
+
+            elif keyword in ("BEGIN", "CASE"):
+                depth += 1
+                if keyword == "BEGIN" and open_routines and open_routines[-1][1] is None:
+                    open_routines[-1][1] = depth
+
+            elif keyword == "END":
+                # END IF/LOOP/CASE and END name need the two words side by side;
+                # in "END || CASE ..." the CASE opens a new expression instead
+                closing = stream.peek()
+                if closing is not None and content[token.end:closing.start].strip():
+                    closing = None
+                if closing is not None and closing.upper in ("IF", "LOOP"):
+                    stream.next()
+                    continue
+                if closing is not None and closing.upper == "CASE":
+                    stream.next()
+                    depth = max(depth - 1, 0)
+                    continue
+                if open_routines and open_routines[-1][1] == depth:
+                    routine = open_routines.pop()[0]
+                    end = token.end
+                    if closing is not None and closing.kind in ("word", "qident"):
+                        end = stream.next().end
+                    semicolon = stream.next_if(";")
+                    routine["end"] = semicolon.end if semicolon else end
+                depth = max(depth - 1, 0)
+
+        # Unterminated bodies run to the end of the source
+        for routine, _ in open_routines:
+            routine["end"] = len(content)
+        return package_name, routines
+
+    @staticmethod
+    def references(content: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, Tuple[str, ...]]]:
+        """Yield (offset, upper-cased name parts) of every name in a span, outside comments and strings"""
+        end = len(content) if end is None else end
+        for match in _REFERENCE_PATTERN.finditer(content, start, end):
+            if match.lastgroup == "name":
+                yield match.start(), tuple(part.strip().upper() for part in match.group().split("."))
+
+    @staticmethod
+    def _read_name(stream: _Scanner) -> Optional[str]:
+        """Read a possibly schema-qualified name and return its last part"""
+        token = stream.peek()
+        if token is None or token.kind not in ("word", "qident"):
+            return None
+        name = stream.next().text.strip('"')
+        while stream.next_if("."):
+            part = stream.next()
+            if part is None:
+                break
+            name = part.text.strip('"')
+        return name
+
+    @staticmethod
+    def _read_header(
+        content: str,
+        stream: _Scanner,
+        keyword: _Token
+    ) -> Optional[Dict[str, Any]]:
+        """Read a routine header up to, but not including, IS/AS/;"""
+        name = PLSQLParser._read_name(stream)
+        if name is None:
+            return None
+
+        parameters = ""
+        opening = stream.next_if("(")
+        if opening is not None:
+            nesting = 1
+            closing = opening
+            while nesting:
+                token = stream.next()
+                if token is None:
+                    break
+                closing = token
+                if token.text == "(":
+                    nesting += 1
+                elif token.text == ")":
+                    nesting -= 1
+            parameters = " ".join(content[opening.end:closing.start].split())
+
+        return_type = None
+        if stream.next_if("RETURN"):
+            first = last = None
+            while True:
+                token = stream.peek()
+                if token is None or token.upper in ("IS", "AS", ";") or token.upper in _ROUTINE_MODIFIERS:
+                    break
+                first = first or token
+                last = stream.next()
+            if first is not None:
+                return_type = " ".join(content[first.start:last.end].split())
+
+        # Skip modifiers such as PIPELINED or AUTHID CURRENT_USER
+        while True:
+            token = stream.peek()
+            if token is None or token.upper in ("IS", "AS", ";"):
+                break
+            stream.next()
+
+        return {
+            "type": keyword.text,
+            "name": name,
+            "parameters": parameters,
+            "return_type": return_type,
+            "category": categorize_routine(name),
+            "start": keyword.start,
+            "end": None,
+            "has_body": False
+        }
+
+    @staticmethod
+    def _skip_to_semicolon(stream: _Scanner, default: int) -> int:
+        while True:
+            token = stream.next()
+            if token is None:
+                return default
+            if token.text == ";":
+                return token.end
@@ -0,0 +1,64 @@
+# plsql_rag_chat/lib/ingestion/store.py
+
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+
+def resolve_store_dir(store_path: Path) -> Path:
+    """Return the directory holding the live index files
+
+    Rebuilt stores are written to a fresh generation directory and published by
+    atomically rewriting the CURRENT pointer, so readers always see a complete
+    index. Stores without a pointer keep their files directly in `store_path`.
+    """
+    store_path = Path(store_path)
+    pointer = store_path / CURRENT_FILE
+    if pointer.exists():
+        generation = pointer.read_text().strip()
+        if generation and (store_path / generation).is_dir():
+            return store_path / generation
+        logger.warning(f"Ignoring dangling vector store pointer: {pointer}")
+    return store_path
+
+def new_generation_dir(store_path: Path) -> Path:
+    """Create an empty directory for the next store generation"""
+    name = f"{GENERATION_PREFIX}{datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    generation_dir = Path(store_path) / name
+    generation_dir.mkdir(parents=True)
+    return generation_dir
+
+def publish_generation(store_path: Path, generation_dir: Path, keep: int = 2):
+    """Point readers at `generation_dir` and prune all but the newest `keep` generations"""
+    store_path = Path(store_path)
+    tmp_pointer = store_path / f"{CURRENT_FILE}.tmp"
+    tmp_pointer.write_text(generation_dir.name)
+    os.replace(tmp_pointer, store_path / CURRENT_FILE)
+    logger.info(f"Published vector store generation: {generation_dir.name}")
+    
+    # Keep the previous generation around for readers that are still loading it
+    generations = sorted(
+        p for p in store_path.glob(f"{GENERATION_PREFIX}*")
+        if p.is_dir() and p != generation_dir
+    )
+    for stale in generations[:max(len(generations) - (keep - 1), 0)]:
+        shutil.rmtree(stale, ignore_errors=True)
+        logger.info(f"Removed old vector store generation: {stale.name}")
+
+def write_json_atomic(path: Path, data: Any, **kwargs):
+    """Write JSON next to `path` and rename it into place"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp_path, path)
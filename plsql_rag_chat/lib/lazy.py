@@ -0,0 +1,20 @@
+# plsql_rag_chat/lib/lazy.py
+
+import sys
+from importlib import import_module
+from typing import Any, Callable, Dict
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Callable[[str], Any]:
+    """Module `__getattr__` importing each exported name from its submodule on first use
+
+    Lets a package re-export its API without importing every submodule, and
+    their dependencies, when only one of them is used.
+    """
+    def __getattr__(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(f".{module}", package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+    return __getattr__
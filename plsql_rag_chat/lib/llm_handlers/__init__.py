@@ -1,5 +1,20 @@
-from .base import BaseLLMHandler
-from .ollama_handler import OllamaHandler
-from .bedrock_handler import BedrockHandler
+from plsql_rag_chat.lib.lazy import lazy_exports
 
-__all__ = ['BaseLLMHandler', 'OllamaHandler', 'BedrockHandler']
\ No newline at end of file
+# Imported on first use, so the Bedrock SDK loads only with a Bedrock backend
+_EXPORTS = {
+    'BaseLLMHandler': 'base',
+    'OllamaHandler': 'ollama_handler',
+    'BedrockHandler': 'bedrock_handler',
+    'RouterHandler': 'router',
+    'ANSWER_TAG': 'streaming',
+    'HandlerLLM': 'streaming',
+    'TokenStreamHandler': 'streaming',
+    'GenerationScheduler': 'scheduler',
+    'ScheduledHandler': 'scheduler',
+    'SchedulerTimeout': 'scheduler',
+    'get_scheduler': 'scheduler',
+    'scheduler_metrics': 'scheduler'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(__name__, _EXPORTS)
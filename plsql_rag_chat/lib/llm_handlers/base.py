@@ -1,10 +1,16 @@
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 
 class BaseLLMHandler(ABC):
     """Base class for LLM handlers"""
     
+    @property
+    def backend_id(self) -> str:
+        """Name of the backend this handler talks to, shared by handlers for the same one"""
+        return type(self).__name__
+    
     @abstractmethod
     def initialize_model(self, model_params: Dict[str, Any]) -> Any:
         """Initialize the language model with given parameters"""
@@ -18,4 +24,27 @@ class BaseLLMHandler(ABC):
     @abstractmethod
     def get_available_models(self) -> List[str]:
         """Get list of available models"""
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    def stream(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """Generate a completion for the prompt, yielding text as it is produced"""
+        pass
+    
+    async def astream(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """Asyncio variant of stream; by default each fragment is read in a worker thread"""
+        loop = asyncio.get_running_loop()
+        iterator = iter(self.stream(prompt, model_params, stop=stop))
+        done = object()
+        while (text := await loop.run_in_executor(None, next, iterator, done)) is not done:
+            yield text
@@ -1,36 +1,89 @@
-from typing import Dict, Any, List, Optional
-import boto3
-from langchain_community.llms import Bedrock  # Updated import
+import threading
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Tuple
 from .base import BaseLLMHandler
 
+if TYPE_CHECKING:
+    from langchain_community.llms import Bedrock
+
+# Distinct parameter sets kept as model objects; sessions use a handful
+MAX_MODELS = 32
+
 class BedrockHandler(BaseLLMHandler):
-    def __init__(self, region: str):
+    def __init__(self, region: str, model_id: str = "anthropic.claude-v2", pin_model: bool = False):
+        # The AWS SDK is imported only when a Bedrock backend is configured
+        import boto3
         self.region = region
+        self.model_id = model_id
+        # Routers send every backend the same model name, which only Ollama knows
+        self.pin_model = pin_model
         self.client = boto3.client("bedrock-runtime", region_name=region)
+        # Model listings live on the control plane, not the runtime API
+        self.control_client = boto3.client("bedrock", region_name=region)
         self.model = None
+        self._models: Dict[Tuple, "Bedrock"] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def backend_id(self) -> str:
+        return f"bedrock:{self.region}"
     
-    def initialize_model(self, model_params: Dict[str, Any]) -> Optional[Bedrock]:
-        self.model = Bedrock(
-            model_id=model_params.get("model_id", "anthropic.claude-v2"),
-            client=self.client,
-            model_kwargs={
-                "temperature": model_params.get("temperature", 0.7),
-                "max_tokens": model_params.get("context_length", 2048),
-                "top_k": model_params.get("top_k", 40),
-            }
+    def _model_id(self, model_params: Dict[str, Any]) -> str:
+        if self.pin_model:
+            return self.model_id
+        return (
+            model_params.get("model_id")
+            or model_params.get("bedrock_model_id")
+            or model_params.get("model_name")
+            or self.model_id
         )
+    
+    def _get_model(self, model_params: Dict[str, Any]) -> "Bedrock":
+        """Model object for these parameters; the handler is shared, so each call brings its own"""
+        from langchain_community.llms import Bedrock
+        model_id = self._model_id(model_params)
+        model_kwargs = {
+            "temperature": model_params.get("temperature", 0.7),
+            "max_tokens": model_params.get("context_length", 2048),
+            "top_k": model_params.get("top_k", 40),
+        }
+        key = (model_id,) + tuple(sorted(model_kwargs.items()))
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                if len(self._models) >= MAX_MODELS:
+                    self._models.clear()
+                model = self._models[key] = Bedrock(
+                    model_id=model_id,
+                    client=self.client,
+                    # Report tokens to callbacks while the answer is generated
+                    streaming=True,
+                    model_kwargs=model_kwargs
+                )
+        return model
+    
+    def initialize_model(self, model_params: Dict[str, Any]) -> Optional["Bedrock"]:
+        self.model = self._get_model(model_params)
         return self.model
     
+    def stream(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """Stream a completion through InvokeModelWithResponseStream"""
+        yield from self._get_model(model_params).stream(prompt, stop=stop)
+    
     def health_check(self) -> bool:
         try:
-            self.client.list_foundation_models()
+            self.control_client.get_foundation_model(modelIdentifier=self.model_id)
             return True
-        except:
+        except Exception:
             return False
     
     def get_available_models(self) -> List[str]:
         try:
-            response = self.client.list_foundation_models()
+            response = self.control_client.list_foundation_models()
             return [model["modelId"] for model in response["modelSummaries"]]
-        except:
+        except Exception:
             return []
@@ -0,0 +1,120 @@
+# plsql_rag_chat/lib/llm_handlers/http_client.py
+
+import asyncio
+import json
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class PooledHTTPClient:
+    """Keep-alive connection pool to one server, with sync and asyncio clients
+
+    All callers share the same pooled connections, so repeated requests skip
+    TCP setup, and at most `max_concurrency` requests run at once; further
+    callers wait up to the pool timeout for a slot. The asyncio client is
+    created on first use.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 300.0,
+        pool_timeout: float = 30.0,
+        max_connections: int = 20,
+        max_concurrency: int = 8
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=connect_timeout,
+            pool=pool_timeout
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+        self.max_concurrency = max_concurrency
+        self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _slot(self):
+        if not self._slots.acquire(timeout=self.timeout.pool):
+            raise httpx.PoolTimeout(f"No free request slot for {self.base_url}")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def _async_client(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        # Async clients and semaphores belong to the event loop they were made on
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._async:
+                self._async[loop] = (
+                    httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits),
+                    asyncio.Semaphore(self.max_concurrency)
+                )
+            return self._async[loop]
+
+    def get_json(self, path: str, timeout: Optional[float] = None) -> Any:
+        """GET a JSON document"""
+        with self._slot():
+            response = self._client.get(path, timeout=timeout or self.timeout)
+            response.raise_for_status()
+            return response.json()
+
+    def stream_json(self, path: str, payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """POST a request and yield each line of the newline-delimited JSON response"""
+        with self._slot(), self._client.stream("POST", path, json=payload) as response:
+            if response.status_code != 200:
+                response.read()
+                raise ValueError(f"Request to {path} failed with status code {response.status_code}: {response.text}")
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    async def aget_json(self, path: str, timeout: Optional[float] = None) -> Any:
+        """Asyncio variant of get_json"""
+        client, slots = self._async_client()
+        async with slots:
+            response = await client.get(path, timeout=timeout or self.timeout)
+            response.raise_for_status()
+            return response.json()
+
+    async def astream_json(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Asyncio variant of stream_json"""
+        client, slots = self._async_client()
+        async with slots:
+            async with client.stream("POST", path, json=payload) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    raise ValueError(f"Request to {path} failed with status code {response.status_code}: {response.text}")
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line)
+
+    def close(self):
+        self._client.close()
+
+_clients: Dict[Tuple[Any, ...], PooledHTTPClient] = {}
+_clients_lock = threading.Lock()
+
+def get_http_client(base_url: str, **options: Any) -> PooledHTTPClient:
+    """Return the process-wide client for a server, creating it on first use"""
+    key = (base_url.rstrip("/"),) + tuple(sorted(options.items()))
+    with _clients_lock:
+        if key not in _clients:
+            logger.info(f"Creating pooled HTTP client for {base_url}")
+            _clients[key] = PooledHTTPClient(base_url, **options)
+        return _clients[key]
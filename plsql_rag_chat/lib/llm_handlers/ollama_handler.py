@@ -1,48 +1,99 @@
-from typing import Dict, Any, List, Optional
-import requests
-from concurrent.futures import ThreadPoolExecutor
-from langchain_community.llms import Ollama
-from langchain.callbacks.manager import CallbackManager
-from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 from .base import BaseLLMHandler
+from .http_client import PooledHTTPClient, get_http_client
+from .streaming import HandlerLLM
 
 class OllamaHandler(BaseLLMHandler):
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 300.0,
+        max_connections: int = 20,
+        max_concurrency: int = 8
+    ):
         self.base_url = base_url
         self.model = None
-    
-    def initialize_model(self, model_params: Dict[str, Any]) -> Optional[Ollama]:
-        callback_manager = CallbackManager([StreamingStdOutCallbackHandler()])
-        
-        self.model = Ollama(
-            model=model_params.get("model_name", "llama3.2:latest"),
-            temperature=model_params.get("temperature", 0.7),
-            callback_manager=callback_manager,
-            verbose=True,
-            base_url=self.base_url,
-            num_ctx=model_params.get("context_length", 2048),
-            top_k=model_params.get("top_k", 40),
+        # Shared by every handler for this server, so sessions reuse connections
+        self.client: PooledHTTPClient = get_http_client(
+            base_url,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            max_connections=max_connections,
+            max_concurrency=max_concurrency
         )
+
+    @property
+    def backend_id(self) -> str:
+        return f"ollama:{self.base_url.rstrip('/')}"
+
+    def initialize_model(self, model_params: Dict[str, Any]) -> Optional[HandlerLLM]:
+        # Generation goes through stream(), so chains report tokens as they arrive
+        self.model = HandlerLLM(handler=self, model_params=dict(model_params))
         return self.model
-    
+
+    def _generate_payload(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        options = {
+            "temperature": model_params.get("temperature", 0.7),
+            "num_ctx": model_params.get("context_length", 2048),
+            "top_k": model_params.get("top_k", 40),
+        }
+        if stop:
+            options["stop"] = stop
+        return {
+            "model": model_params.get("model_name", "llama3.2:latest"),
+            "prompt": prompt,
+            "stream": True,
+            "options": options,
+        }
+
+    def stream(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """Stream a completion from /api/generate, one response fragment at a time"""
+        # Read to the end of the response, after the "done" line, so that the
+        # connection goes back to the pool
+        for data in self.client.stream_json("/api/generate", self._generate_payload(prompt, model_params, stop)):
+            if "error" in data:
+                raise ValueError(f"Ollama error: {data['error']}")
+            yield data.get("response", "")
+
+    async def astream(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """Asyncio variant of stream"""
+        async for data in self.client.astream_json("/api/generate", self._generate_payload(prompt, model_params, stop)):
+            if "error" in data:
+                raise ValueError(f"Ollama error: {data['error']}")
+            yield data.get("response", "")
+
     def health_check(self) -> bool:
-        with ThreadPoolExecutor() as executor:
-            try:
-                future = executor.submit(
-                    requests.get,
-                    f"{self.base_url}/api/tags",
-                    timeout=5
-                )
-                response = future.result()
-                return response.status_code == 200
-            except:
-                return False
-    
+        try:
+            self.client.get_json("/api/tags", timeout=5)
+            return True
+        except Exception:
+            return False
+
+    async def ahealth_check(self) -> bool:
+        try:
+            await self.client.aget_json("/api/tags", timeout=5)
+            return True
+        except Exception:
+            return False
+
     def get_available_models(self) -> List[str]:
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
-            if response.status_code == 200:
-                return [model["name"] for model in response.json().get("models", [])]
-        except:
-            pass
-        return []
+            return [model["name"] for model in self.client.get_json("/api/tags").get("models", [])]
+        except Exception:
+            return []
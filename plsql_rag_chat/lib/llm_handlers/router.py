@@ -0,0 +1,206 @@
+# plsql_rag_chat/lib/llm_handlers/router.py
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base import BaseLLMHandler
+from .streaming import HandlerLLM
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class BackendState:
+    """Circuit breaker and latency statistics of one routed backend"""
+
+    def __init__(self, handler: BaseLLMHandler, failure_threshold: int, cooldown: float, smoothing: float):
+        self.handler = handler
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.circuit = CLOSED
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.failures = 0
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        if self.circuit == OPEN and now >= self.open_until:
+            self.circuit = HALF_OPEN
+        if self.circuit == HALF_OPEN:
+            return not self.trial_in_flight
+        return self.circuit == CLOSED
+
+    def score(self) -> Tuple[float, int]:
+        # Unmeasured backends go first, then the fastest relative to its load
+        return (self.latency or 0.0) * (self.in_flight + 1), self.in_flight
+
+    def begin(self):
+        self.in_flight += 1
+        self.requests += 1
+        if self.circuit == HALF_OPEN:
+            self.trial_in_flight = True
+
+    def succeed(self, latency: float):
+        self.in_flight -= 1
+        self.trial_in_flight = False
+        self.failures = 0
+        self.circuit = CLOSED
+        self.latency = latency if self.latency is None else (
+            self.smoothing * latency + (1 - self.smoothing) * self.latency
+        )
+
+    def fail(self):
+        self.in_flight -= 1
+        self.trial_in_flight = False
+        self.failures += 1
+        self.errors += 1
+        if self.circuit == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip()
+
+    def abandon(self):
+        self.in_flight -= 1
+        self.trial_in_flight = False
+
+    def trip(self):
+        if self.circuit != OPEN:
+            logger.warning(f"Opening circuit for {self.handler.backend_id}")
+        self.circuit = OPEN
+        self.open_until = time.monotonic() + self.cooldown
+
+class RouterHandler(BaseLLMHandler):
+    """Handler that spreads generations over several backends
+
+    Each generation goes to the available backend with the lowest smoothed
+    time to first token, weighted by the generations it is already running.
+    A backend whose generation fails before producing output is skipped for
+    the next one; after `failure_threshold` consecutive failures its circuit
+    opens for `cooldown` seconds, after which a single trial generation may
+    close it again. A background thread probes every backend's health every
+    `probe_interval` seconds, opening circuits of unreachable backends and
+    letting recovered ones take a trial generation before the cooldown ends.
+    """
+
+    def __init__(
+        self,
+        backends: List[BaseLLMHandler],
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        probe_interval: float = 10.0,
+        smoothing: float = 0.3
+    ):
+        if not backends:
+            raise ValueError("RouterHandler needs at least one backend")
+        self.backends = [BackendState(b, failure_threshold, cooldown, smoothing) for b in backends]
+        self.probe_interval = probe_interval
+        self.model = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        if probe_interval > 0:
+            threading.Thread(target=self._probe_loop, name="llm-router-probe", daemon=True).start()
+
+    @property
+    def backend_id(self) -> str:
+        return "router:" + ",".join(state.handler.backend_id for state in self.backends)
+
+    def initialize_model(self, model_params: Dict[str, Any]) -> Optional[HandlerLLM]:
+        self.model = HandlerLLM(handler=self, model_params=dict(model_params))
+        return self.model
+
+    def _choose(self, tried: List[BackendState]) -> Optional[BackendState]:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [s for s in self.backends if s not in tried and s.available(now)]
+            if not candidates:
+                return None
+            state = min(candidates, key=BackendState.score)
+            state.begin()
+            return state
+
+    def stream(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        """Stream from the best backend, failing over until one produces output"""
+        tried: List[BackendState] = []
+        last_error: Optional[Exception] = None
+        while True:
+            state = self._choose(tried)
+            if state is None:
+                raise RuntimeError("No LLM backend available") from last_error
+            tried.append(state)
+            start = time.perf_counter()
+            first_token: Optional[float] = None
+            try:
+                for text in state.handler.stream(prompt, model_params, stop=stop):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    yield text
+            except GeneratorExit:
+                with self._lock:
+                    state.abandon()
+                raise
+            except Exception as e:
+                with self._lock:
+                    state.fail()
+                if first_token is not None:
+                    # Part of the answer is already out; another backend cannot continue it
+                    raise
+                logger.warning(f"Generation on {state.handler.backend_id} failed, failing over: {str(e)}")
+                last_error = e
+                continue
+            with self._lock:
+                state.succeed(first_token if first_token is not None else time.perf_counter() - start)
+            return
+
+    def _probe_loop(self):
+        while not self._stopped.wait(self.probe_interval):
+            self.probe()
+
+    def probe(self):
+        """Check every backend's health and update its circuit"""
+        for state in self.backends:
+            try:
+                healthy = state.handler.health_check()
+            except Exception:
+                healthy = False
+            with self._lock:
+                if not healthy:
+                    state.trip()
+                elif state.circuit == OPEN:
+                    # Reachable again; let one trial generation decide
+                    state.circuit = HALF_OPEN
+
+    def close(self):
+        """Stop the background health probes"""
+        self._stopped.set()
+
+    def health_check(self) -> bool:
+        return any(state.handler.health_check() for state in self.backends)
+
+    def get_available_models(self) -> List[str]:
+        models: List[str] = []
+        for state in self.backends:
+            models.extend(m for m in state.handler.get_available_models() if m not in models)
+        return models
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Circuit state and load of every backend"""
+        with self._lock:
+            return [{
+                "backend": state.handler.backend_id,
+                "circuit": state.circuit,
+                "in_flight": state.in_flight,
+                "latency_ms": None if state.latency is None else state.latency * 1000,
+                "requests": state.requests,
+                "errors": state.errors
+            } for state in self.backends]
@@ -0,0 +1,227 @@
+# plsql_rag_chat/lib/llm_handlers/scheduler.py
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .base import BaseLLMHandler
+
+if TYPE_CHECKING:
+    from .streaming import HandlerLLM
+
+logger = logging.getLogger(__name__)
+
+class SchedulerTimeout(TimeoutError):
+    """Raised when a generation waited longer than the queue timeout for a slot"""
+
+class _Flight:
+    """Output of one upstream generation, replayed to coalesced callers"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.condition = threading.Condition()
+
+    def append(self, text: str):
+        with self.condition:
+            self.chunks.append(text)
+            self.condition.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def follow(self) -> Iterator[str]:
+        position = 0
+        while True:
+            with self.condition:
+                while position == len(self.chunks) and not self.done:
+                    self.condition.wait()
+                pending = self.chunks[position:]
+                done, error = self.done, self.error
+            yield from pending
+            position += len(pending)
+            if done and position == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+class GenerationScheduler:
+    """Admission control for the generations sent to one backend
+
+    At most `max_in_flight` generations run at once; later ones wait in
+    arrival order and give up with SchedulerTimeout after `queue_timeout`
+    seconds. With `coalesce`, a prompt identical to one already in flight
+    (same model and parameters) does not start a second generation but
+    receives the output of the first as it is produced.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int = 4,
+        queue_timeout: float = 60.0,
+        coalesce: bool = True,
+        window: int = 1000
+    ):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.coalesce = coalesce
+        self._condition = threading.Condition()
+        self._queue: deque = deque()
+        self._flights: Dict[str, _Flight] = {}
+        self._waits: deque = deque(maxlen=window)
+        self.in_flight = 0
+        self.max_queue_depth = 0
+        self.admitted = 0
+        self.coalesced = 0
+        self.timeouts = 0
+
+    @staticmethod
+    def make_key(prompt: str, model_params: Dict[str, Any], stop: Optional[List[str]] = None) -> str:
+        material = json.dumps([prompt, model_params, stop], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _acquire(self):
+        ticket = object()
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        with self._condition:
+            self._queue.append(ticket)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            try:
+                while self._queue[0] is not ticket or self.in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise SchedulerTimeout(
+                            f"Waited {self.queue_timeout:.0f}s for a free generation slot on {self.name}"
+                        )
+                    self._condition.wait(remaining)
+            except BaseException:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+                raise
+            self._queue.popleft()
+            self.in_flight += 1
+            self.admitted += 1
+            self._waits.append(time.monotonic() - start)
+            # The next caller in line may fit into a remaining slot
+            self._condition.notify_all()
+
+    def _release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def stream(self, key: str, generate: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Run `generate` once a slot is free, or join the identical generation in flight"""
+        flight = _Flight()
+        if self.coalesce:
+            with self._condition:
+                running = self._flights.get(key)
+                if running is None:
+                    self._flights[key] = flight
+                else:
+                    self.coalesced += 1
+            if running is not None:
+                logger.debug(f"Coalesced generation on {self.name}")
+                yield from running.follow()
+                return
+
+        try:
+            self._acquire()
+            try:
+                for text in generate():
+                    flight.append(text)
+                    yield text
+            finally:
+                self._release()
+            flight.finish()
+        except GeneratorExit:
+            flight.finish(RuntimeError("Coalesced generation was abandoned by its caller"))
+            raise
+        except BaseException as e:
+            flight.finish(e)
+            raise
+        finally:
+            if self.coalesce:
+                with self._condition:
+                    if self._flights.get(key) is flight:
+                        del self._flights[key]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current load and wait-time percentiles over recent admissions"""
+        with self._condition:
+            waits = np.array(self._waits) * 1000 if self._waits else np.zeros(1)
+            return {
+                "in_flight": self.in_flight,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "admitted": self.admitted,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+                "wait_p50_ms": float(np.percentile(waits, 50)),
+                "wait_p95_ms": float(np.percentile(waits, 95)),
+                "wait_p99_ms": float(np.percentile(waits, 99))
+            }
+
+_schedulers: Dict[str, GenerationScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+def scheduler_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics of every scheduler in the process, by backend"""
+    with _schedulers_lock:
+        schedulers = dict(_schedulers)
+    return {backend_id: scheduler.metrics() for backend_id, scheduler in schedulers.items()}
+
+def get_scheduler(backend_id: str, **options: Any) -> GenerationScheduler:
+    """Return the process-wide scheduler for a backend, creating it on first use"""
+    with _schedulers_lock:
+        if backend_id not in _schedulers:
+            logger.info(f"Creating generation scheduler for {backend_id}")
+            _schedulers[backend_id] = GenerationScheduler(backend_id, **options)
+        return _schedulers[backend_id]
+
+class ScheduledHandler(BaseLLMHandler):
+    """Handler that sends the generations of another handler through its backend's scheduler"""
+
+    def __init__(self, handler: BaseLLMHandler, scheduler: GenerationScheduler):
+        self.handler = handler
+        self.scheduler = scheduler
+        self.model = None
+
+    @property
+    def backend_id(self) -> str:
+        return self.handler.backend_id
+
+    def initialize_model(self, model_params: Dict[str, Any]) -> Optional["HandlerLLM"]:
+        # LangChain is only needed once a chain is built, not for the metrics
+        from .streaming import HandlerLLM
+        self.model = HandlerLLM(handler=self, model_params=dict(model_params))
+        return self.model
+
+    def stream(
+        self,
+        prompt: str,
+        model_params: Dict[str, Any],
+        stop: Optional[List[str]] = None
+    ) -> Iterator[str]:
+        key = self.scheduler.make_key(prompt, model_params, stop)
+        return self.scheduler.stream(key, lambda: self.handler.stream(prompt, model_params, stop=stop))
+
+    def health_check(self) -> bool:
+        return self.handler.health_check()
+
+    def get_available_models(self) -> List[str]:
+        return self.handler.get_available_models()
@@ -0,0 +1,118 @@
+# plsql_rag_chat/lib/llm_handlers/streaming.py
+
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Set
+from uuid import UUID
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    BaseCallbackHandler,
+    CallbackManagerForLLMRun
+)
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+
+logger = logging.getLogger(__name__)
+
+# Tag on the chain that writes the answer, so that token callbacks can tell
+# answer tokens from those of the question-condensing step
+ANSWER_TAG = "answer"
+
+class HandlerLLM(LLM):
+    """LangChain LLM that generates through a handler's streaming API
+
+    Every chunk is reported to the callbacks as a new token, so a chain built
+    on this model streams its answer to whichever callback handler is attached.
+    """
+
+    handler: Any
+    model_params: Dict[str, Any] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return type(self.handler).__name__
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"handler": self._llm_type, **self.model_params}
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[GenerationChunk]:
+        for text in self.handler.stream(prompt, self.model_params, stop=stop):
+            if not text:
+                continue
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[GenerationChunk]:
+        async for text in self.handler.astream(prompt, self.model_params, stop=stop):
+            if not text:
+                continue
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        return "".join(chunk.text for chunk in self._stream(prompt, stop, run_manager, **kwargs))
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        return "".join([chunk.text async for chunk in self._astream(prompt, stop, run_manager, **kwargs)])
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Forward the answer tokens of a chain run to a callback
+
+    Only LLM runs nested under a chain tagged with `tag` are forwarded.
+    The time to the first answer token is kept in `first_token_seconds`.
+    """
+
+    def __init__(self, on_token: Callable[[str], None], tag: str = ANSWER_TAG):
+        self.on_token = on_token
+        self.tag = tag
+        self.started = time.perf_counter()
+        self.first_token_seconds: Optional[float] = None
+        self._runs: Set[UUID] = set()
+
+    def _track(self, run_id: UUID, parent_run_id: Optional[UUID], tags: Optional[List[str]]):
+        if (tags and self.tag in tags) or parent_run_id in self._runs:
+            self._runs.add(run_id)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        self._track(run_id, parent_run_id, tags)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        self._track(run_id, parent_run_id, tags)
+
+    def on_llm_new_token(self, token: str, *, run_id, **kwargs):
+        if run_id not in self._runs:
+            return
+        if self.first_token_seconds is None:
+            self.first_token_seconds = time.perf_counter() - self.started
+            logger.info(f"First answer token after {self.first_token_seconds * 1000:.0f}ms")
+        self.on_token(token)
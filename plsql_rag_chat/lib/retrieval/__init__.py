@@ -0,0 +1,19 @@
+# plsql_rag_chat/lib/retrieval/__init__.py
+from plsql_rag_chat.lib.lazy import lazy_exports
+
+_EXPORTS = {
+    'tokenize_plsql': 'tokenizer',
+    'LexicalIndex': 'lexical',
+    'SymbolIndex': 'symbols',
+    'SymbolRetriever': 'symbols',
+    'CallGraph': 'callgraph',
+    'CallGraphRetriever': 'callgraph',
+    'PartitionIndex': 'partitions',
+    'PartitionedRetriever': 'partitions',
+    'HybridRetriever': 'hybrid',
+    'document_key': 'hybrid',
+    'reciprocal_rank_fusion': 'hybrid'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(__name__, _EXPORTS)
@@ -0,0 +1,203 @@
+# plsql_rag_chat/lib/retrieval/callgraph.py
+
+import json
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+logger = logging.getLogger(__name__)
+
+CALLGRAPH_DIR = "callgraph"
+CALLGRAPH_VERSION = 1
+
+def _csr(rows: Sequence[Sequence[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Offsets and concatenated values of a list of integer lists"""
+    offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    values = np.fromiter((value for row in rows for value in row), dtype=np.int32, count=int(offsets[-1]))
+    return offsets, values
+
+def _invert(offsets: np.ndarray, values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Transpose a CSR mapping: for each of `size` values, the rows that list it"""
+    owners = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+    order = np.argsort(values, kind="stable")
+    inverted = np.zeros(size + 1, dtype=np.int32)
+    inverted[1:] = np.cumsum(np.bincount(values, minlength=size))
+    return inverted, owners[order]
+
+class CallGraph:
+    """Routine-level call graph in CSR adjacency arrays
+
+    Nodes are routines, one per package and name (overloads share a node);
+    `offsets`/`targets` list each routine's callees, most specific first,
+    and `chunk_offsets`/`chunk_rows` the chunks holding its definition, head
+    first. Chunks are identified by store id and, since retrieved documents
+    carry no ids, by (file name, start offset). Loading memory-maps the
+    arrays, and one-hop expansion is a few array slices.
+    """
+
+    def __init__(
+        self,
+        nodes: List[str],
+        chunk_ids: List[str],
+        chunk_keys: List[Tuple[str, int]],
+        offsets: np.ndarray,
+        targets: np.ndarray,
+        chunk_offsets: np.ndarray,
+        chunk_rows: np.ndarray
+    ):
+        self.nodes = nodes
+        self.chunk_ids = chunk_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.chunk_offsets = chunk_offsets
+        self.chunk_rows = chunk_rows
+        self._rows = {(file_name, start): row for row, (file_name, start) in enumerate(chunk_keys)}
+        # Routines defined in each chunk, the reverse of chunk_rows
+        self._owner_offsets, self._owners = _invert(chunk_offsets, np.asarray(chunk_rows), len(chunk_ids))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edges(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def build(
+        cls,
+        nodes: List[str],
+        calls: List[Dict[int, int]],
+        node_chunks: List[List[int]],
+        chunk_ids: List[str],
+        chunk_keys: List[Tuple[str, int]]
+    ) -> "CallGraph":
+        """Pack per-routine callee counts and definition chunk rows
+
+        Callees are ranked by how often the caller references them divided by
+        how many routines call them, so helpers used everywhere (output,
+        bit tests) come after the routines doing this caller's work.
+        """
+        callers = Counter(target for row in calls for target in row)
+        callees = [
+            sorted(row, key=lambda target: (-row[target] / callers[target], target))
+            for row in calls
+        ]
+        offsets, targets = _csr(callees)
+        chunk_offsets, chunk_rows = _csr(node_chunks)
+        return cls(nodes, chunk_ids, chunk_keys, offsets, targets, chunk_offsets, chunk_rows)
+
+    def save(self, store_dir: Path):
+        """Write the graph to `store_dir`/callgraph"""
+        target = Path(store_dir) / CALLGRAPH_DIR
+        target.mkdir(parents=True, exist_ok=True)
+        np.save(target / "offsets.npy", self.offsets)
+        np.save(target / "targets.npy", self.targets)
+        np.save(target / "chunk_offsets.npy", self.chunk_offsets)
+        np.save(target / "chunk_rows.npy", self.chunk_rows)
+        keys = sorted(self._rows, key=self._rows.get)
+        # Written last, so a readable header implies complete arrays
+        with open(target / "graph.json", "w") as f:
+            json.dump({
+                "version": CALLGRAPH_VERSION,
+                "nodes": self.nodes,
+                "chunk_ids": self.chunk_ids,
+                "chunk_keys": keys
+            }, f)
+        logger.info(f"Saved call graph with {len(self.nodes)} routines and {self.edges} call edges")
+
+    @classmethod
+    def load(cls, store_dir: Path) -> Optional["CallGraph"]:
+        """Open the call graph of a store, or None if it has none"""
+        source = Path(store_dir) / CALLGRAPH_DIR
+        if not (source / "graph.json").exists():
+            return None
+        with open(source / "graph.json", "r") as f:
+            header = json.load(f)
+        if header.get("version") != CALLGRAPH_VERSION:
+            logger.warning(f"Ignoring call graph with version {header.get('version')}")
+            return None
+        return cls(
+            header["nodes"],
+            header["chunk_ids"],
+            [tuple(key) for key in header["chunk_keys"]],
+            np.load(source / "offsets.npy", mmap_mode="r"),
+            np.load(source / "targets.npy", mmap_mode="r"),
+            np.load(source / "chunk_offsets.npy", mmap_mode="r"),
+            np.load(source / "chunk_rows.npy", mmap_mode="r")
+        )
+
+    def callees(self, node: int) -> np.ndarray:
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def routines_in(self, file_name: str, start: int) -> np.ndarray:
+        """Routines whose definition includes the chunk starting at `start` in `file_name`"""
+        row = self._rows.get((file_name, start))
+        if row is None:
+            return self._owners[:0]
+        return self._owners[self._owner_offsets[row]:self._owner_offsets[row + 1]]
+
+    def expand(self, keys: Sequence[Tuple[str, int]], limit: int) -> List[str]:
+        """Ids of the head chunks of routines called from the given chunks, up to `limit`
+
+        Callees of earlier chunks come first; chunks among `keys` are skipped.
+        """
+        seen = {self._rows[key] for key in keys if key in self._rows}
+        expanded: List[str] = []
+        for file_name, start in keys:
+            for node in self.routines_in(file_name, start):
+                for callee in self.callees(node):
+                    first = self.chunk_offsets[callee]
+                    if first == self.chunk_offsets[callee + 1]:
+                        continue
+                    row = int(self.chunk_rows[first])
+                    if row in seen:
+                        continue
+                    seen.add(row)
+                    expanded.append(self.chunk_ids[row])
+                    if len(expanded) >= limit:
+                        return expanded
+        return expanded
+
+class CallGraphRetriever(BaseRetriever):
+    """Add the routines called by the retrieved chunks to the results
+
+    The head chunk of each callee of the hits, in rank order, is appended
+    after them, up to `max_chunks` and while the estimated tokens of all
+    documents stay within `max_tokens`.
+    """
+
+    retriever: Any
+    vectorstore: Any
+    call_graph: Any
+    max_chunks: int = 3
+    max_tokens: Optional[int] = None
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        hits = self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+        keys = [(doc.metadata.get("file_name"), doc.metadata.get("start_index")) for doc in hits]
+        ids = self.call_graph.expand(keys, self.max_chunks)
+        if not ids:
+            return hits
+
+        used = sum(doc.metadata.get("tokens", 0) for doc in hits)
+        documents = list(hits)
+        for doc in self.vectorstore.get_by_ids(ids):
+            tokens = doc.metadata.get("tokens", 0)
+            if self.max_tokens is not None and used + tokens > self.max_tokens:
+                continue
+            used += tokens
+            documents.append(doc)
+        logger.debug(f"Call graph added {len(documents) - len(hits)} callee chunks to {len(hits)} hits")
+        return documents
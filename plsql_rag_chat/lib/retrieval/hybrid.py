@@ -0,0 +1,69 @@
+# plsql_rag_chat/lib/retrieval/hybrid.py
+
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+logger = logging.getLogger(__name__)
+
+def document_key(doc: Document) -> str:
+    """Identify a chunk across result lists that may not carry ids"""
+    return hashlib.blake2b(doc.page_content.encode("utf-8"), digest_size=16).hexdigest()
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[List[Document]],
+    weights: Optional[Sequence[float]] = None,
+    rrf_k: int = 60
+) -> List[Document]:
+    """Merge ranked lists by summing weight / (rrf_k + rank) per document"""
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc in enumerate(ranking, 1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + weight / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [documents[key] for key in ordered]
+
+class HybridRetriever(BaseRetriever):
+    """Fuse BM25 hits from the lexical index with vector search results
+
+    Both searches return `fetch_k` candidates, which are merged with
+    reciprocal rank fusion; the top `k` are returned. Without a lexical index
+    this degrades to plain vector search.
+    """
+
+    vectorstore: Any
+    lexical_index: Any = None
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        vector_hits = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        if self.lexical_index is None:
+            return vector_hits[:self.k]
+
+        lexical_ids = [doc_id for doc_id, _ in self.lexical_index.search(query, self.fetch_k)]
+        lexical_hits = self.vectorstore.get_by_ids(lexical_ids) if lexical_ids else []
+        logger.debug(f"Hybrid retrieval: {len(vector_hits)} vector hits, {len(lexical_hits)} lexical hits")
+
+        fused = reciprocal_rank_fusion(
+            [vector_hits, lexical_hits],
+            [self.vector_weight, self.lexical_weight],
+            self.rrf_k
+        )
+        return fused[:self.k]
@@ -0,0 +1,156 @@
+# plsql_rag_chat/lib/retrieval/lexical.py
+
+import json
+import logging
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from plsql_rag_chat.lib.retrieval.tokenizer import tokenize_plsql
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_DIR = "lexical"
+LEXICAL_VERSION = 1
+
+def lexical_text(doc: Document) -> str:
+    """Text indexed for a chunk: its source plus package and routine names"""
+    names = [doc.metadata.get("package_name") or ""] + list(doc.metadata.get("routine_names") or [])
+    return " ".join(names) + "\n" + doc.page_content
+
+class LexicalIndex:
+    """BM25 inverted index over chunk texts
+
+    Postings are stored as CSR-style numpy arrays (term offsets, document
+    numbers, term frequencies) and memory-mapped on load, so opening the index
+    costs little more than reading its vocabulary. Documents are identified by
+    the same ids as in the vector store.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        terms: Dict[str, int],
+        offsets: np.ndarray,
+        postings: np.ndarray,
+        frequencies: np.ndarray,
+        lengths: np.ndarray,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        self.ids = ids
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        self.average_length = float(lengths.mean()) if len(lengths) else 0.0
+        # Per-document length normalisation of the BM25 denominator
+        self._norms = k1 * (1 - b + b * lengths / max(self.average_length, 1e-9))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str]], k1: float = 1.2, b: float = 0.75) -> "LexicalIndex":
+        """Index (id, text) pairs"""
+        ids: List[str] = []
+        lengths: List[int] = []
+        term_postings: Dict[str, List[Tuple[int, int]]] = {}
+        for number, (doc_id, text) in enumerate(documents):
+            counts = Counter(tokenize_plsql(text))
+            ids.append(doc_id)
+            lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                term_postings.setdefault(term, []).append((number, count))
+
+        vocabulary = sorted(term_postings)
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        for i, term in enumerate(vocabulary):
+            offsets[i + 1] = offsets[i] + len(term_postings[term])
+        postings = np.empty(offsets[-1], dtype=np.int32)
+        frequencies = np.empty(offsets[-1], dtype=np.float32)
+        for i, term in enumerate(vocabulary):
+            entries = np.asarray(term_postings[term], dtype=np.int64).reshape(-1, 2)
+            postings[offsets[i]:offsets[i + 1]] = entries[:, 0]
+            frequencies[offsets[i]:offsets[i + 1]] = entries[:, 1]
+
+        return cls(
+            ids,
+            {term: i for i, term in enumerate(vocabulary)},
+            offsets,
+            postings,
+            frequencies,
+            np.asarray(lengths, dtype=np.float32),
+            k1,
+            b
+        )
+
+    def save(self, store_dir: Path):
+        """Write the index to `store_dir`/lexical"""
+        target = Path(store_dir) / LEXICAL_DIR
+        target.mkdir(parents=True, exist_ok=True)
+        np.save(target / "offsets.npy", self.offsets)
+        np.save(target / "postings.npy", self.postings)
+        np.save(target / "frequencies.npy", self.frequencies)
+        np.save(target / "lengths.npy", self.lengths)
+        vocabulary = sorted(self.terms, key=self.terms.get)
+        # Written last, so a readable header implies complete postings
+        with open(target / "index.json", "w") as f:
+            json.dump({
+                "version": LEXICAL_VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "ids": self.ids,
+                "terms": vocabulary
+            }, f)
+        logger.info(f"Saved lexical index with {len(vocabulary)} terms over {len(self.ids)} chunks")
+
+    @classmethod
+    def load(cls, store_dir: Path) -> Optional["LexicalIndex"]:
+        """Open the lexical index of a store, or None if it has none"""
+        source = Path(store_dir) / LEXICAL_DIR
+        if not (source / "index.json").exists():
+            return None
+        with open(source / "index.json", "r") as f:
+            header = json.load(f)
+        if header.get("version") != LEXICAL_VERSION:
+            logger.warning(f"Ignoring lexical index with version {header.get('version')}")
+            return None
+        return cls(
+            header["ids"],
+            {term: i for i, term in enumerate(header["terms"])},
+            np.load(source / "offsets.npy", mmap_mode="r"),
+            np.load(source / "postings.npy", mmap_mode="r"),
+            np.load(source / "frequencies.npy", mmap_mode="r"),
+            np.load(source / "lengths.npy"),
+            header["k1"],
+            header["b"]
+        )
+
+    def search(self, query: str, k: int = 20, rows: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Return up to `k` (id, BM25 score) pairs, best first, among `rows` if given"""
+        terms = Counter(term for term in tokenize_plsql(query) if term in self.terms)
+        if not terms or not self.ids:
+            return []
+
+        count = len(self.ids)
+        scores = np.zeros(count, dtype=np.float32)
+        for term, weight in terms.items():
+            i = self.terms[term]
+            docs = self.postings[self.offsets[i]:self.offsets[i + 1]]
+            tf = self.frequencies[self.offsets[i]:self.offsets[i + 1]]
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += weight * idf * tf * (self.k1 + 1) / (tf + self._norms[docs])
+
+        hits = np.flatnonzero(scores) if rows is None else rows[scores[rows] > 0]
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in hits]
@@ -0,0 +1,229 @@
+# plsql_rag_chat/lib/retrieval/partitions.py
+
+import json
+import logging
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+from plsql_rag_chat.lib.retrieval.hybrid import reciprocal_rank_fusion
+from plsql_rag_chat.lib.retrieval.tokenizer import tokenize_plsql
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS_DIR = "partitions"
+PARTITIONS_VERSION = 1
+
+# Question terms that scope a search to a routine category. Routines are
+# categorized by name at ingestion, so these follow the same words; "position"
+# is left out as it appears in questions about every category
+CATEGORY_TERMS = {
+    "move_generation": frozenset({"move", "moves", "movegen", "piece", "pieces", "capture", "captures", "castling"}),
+    "evaluation": frozenset({"eval", "evaluate", "evaluates", "evaluation", "score", "scores", "scoring"}),
+    "notation": frozenset({"fen", "pgn", "notation", "epd"})
+}
+
+def partition_name(kind: str, value: str) -> str:
+    """Name of the partition of a package or category, e.g. `category:evaluation`"""
+    return f"{kind}:{value}"
+
+class PartitionIndex:
+    """Store rows of the chunks of each package and routine category
+
+    A chunk belongs to its package's partition and to the category partition
+    of every routine it overlaps; chunks outside any routine, such as package
+    headers, are `general`. Rows are positions in the store, which are also
+    the document numbers of the lexical index, and are stored in CSR arrays
+    memory-mapped on load.
+    """
+
+    def __init__(self, names: List[str], offsets: np.ndarray, rows: np.ndarray, size: int):
+        self.names = names
+        self.offsets = offsets
+        self.row_values = rows
+        self.size = size
+        self._numbers = {name: number for number, name in enumerate(names)}
+        self._packages = {
+            name.split(":", 1)[1].lower(): name for name in names if name.startswith("package:")
+        }
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def build(
+        cls,
+        documents: Iterable[Tuple[str, Document]],
+        routines: Optional[Dict[str, List[Dict[str, Any]]]] = None
+    ) -> "PartitionIndex":
+        """Partition the chunks of a store, given in store order
+
+        `routines` maps file names to their parsed routines, for chunks read
+        back from a store, which does not keep them.
+        """
+        routines = routines or {}
+        members: Dict[str, List[int]] = {}
+        size = 0
+        for row, (_, doc) in enumerate(documents):
+            size += 1
+            metadata = doc.metadata
+            file_name = metadata.get("file_name")
+            package = (metadata.get("package_name") or "Unknown").upper()
+            members.setdefault(partition_name("package", package), []).append(row)
+            start, end = metadata.get("start_index"), metadata.get("end_index")
+            categories = set()
+            if file_name and start is not None and end is not None:
+                categories = {
+                    routine.get("category") or "general"
+                    for routine in routines.get(file_name) or metadata.get("routines") or []
+                    if routine.get("start") is not None and routine.get("end") is not None
+                    and routine["start"] < end and routine["end"] > start
+                }
+            for category in sorted(categories or {"general"}):
+                members.setdefault(partition_name("category", category), []).append(row)
+
+        names = sorted(members)
+        offsets = np.zeros(len(names) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(members[name]) for name in names])
+        rows = np.asarray([row for name in names for row in members[name]], dtype=np.int32)
+        index = cls(names, offsets, rows, size)
+        logger.info(f"Partitioned {size} chunks into {len(names)} package and category partitions")
+        return index
+
+    def save(self, store_dir: Path):
+        """Write the partitions to `store_dir`/partitions"""
+        target = Path(store_dir) / PARTITIONS_DIR
+        target.mkdir(parents=True, exist_ok=True)
+        np.save(target / "offsets.npy", self.offsets)
+        np.save(target / "rows.npy", self.row_values)
+        # Written last, so a readable header implies complete arrays
+        with open(target / "partitions.json", "w") as f:
+            json.dump({"version": PARTITIONS_VERSION, "names": self.names, "size": self.size}, f)
+        logger.info(f"Saved {len(self.names)} partitions over {self.size} chunks")
+
+    @classmethod
+    def load(cls, store_dir: Path) -> Optional["PartitionIndex"]:
+        """Open the partitions of a store, or None if it has none"""
+        source = Path(store_dir) / PARTITIONS_DIR
+        if not (source / "partitions.json").exists():
+            return None
+        with open(source / "partitions.json", "r") as f:
+            header = json.load(f)
+        if header.get("version") != PARTITIONS_VERSION:
+            logger.warning(f"Ignoring partitions with version {header.get('version')}")
+            return None
+        return cls(
+            header["names"],
+            np.load(source / "offsets.npy", mmap_mode="r"),
+            np.load(source / "rows.npy", mmap_mode="r"),
+            header["size"]
+        )
+
+    def packages(self) -> List[str]:
+        return [name.split(":", 1)[1] for name in self.names if name.startswith("package:")]
+
+    def categories(self) -> List[str]:
+        return [name.split(":", 1)[1] for name in self.names if name.startswith("category:")]
+
+    def rows(self, names: Sequence[str]) -> np.ndarray:
+        """Sorted store rows of the chunks in any of the named partitions"""
+        parts = [
+            self.row_values[self.offsets[number]:self.offsets[number + 1]]
+            for number in (self._numbers.get(name) for name in names) if number is not None
+        ]
+        if not parts:
+            return np.zeros(0, dtype=np.int32)
+        return np.unique(np.concatenate(parts)) if len(parts) > 1 else np.asarray(parts[0])
+
+    def classify(self, query: str) -> List[str]:
+        """Partitions a question is about, by the package names and category terms it contains
+
+        A named package scopes the search to that package; otherwise each
+        category whose terms appear is searched. No match means no scope.
+        """
+        terms = set(tokenize_plsql(query))
+        packages = [self._packages[term] for term in sorted(terms) if term in self._packages]
+        if packages:
+            return packages
+        return [
+            name for name in (
+                partition_name("category", category)
+                for category, words in CATEGORY_TERMS.items() if terms & words
+            ) if name in self._numbers
+        ]
+
+class PartitionedRetriever(BaseRetriever):
+    """Search only the partitions a question is scoped to, other questions with `retriever`
+
+    The scope is `partitions` when given, e.g. from a sidebar filter, or else
+    what `PartitionIndex.classify` finds in the question when `routing` is
+    "keywords". Vector search then computes distances for the rows of those
+    partitions alone and BM25 hits outside them are dropped, before the two
+    are fused as in `HybridRetriever`. Scopes holding fewer than `k` chunks
+    fall back to `retriever`.
+    """
+
+    retriever: Any
+    vectorstore: Any
+    partition_index: Any
+    lexical_index: Any = None
+    partitions: List[str] = []
+    routing: str = "keywords"
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    vector_weight: float = 1.0
+    lexical_weight: float = 1.0
+
+    def scope(self, query: str) -> List[str]:
+        if self.partitions:
+            return list(self.partitions)
+        if self.routing == "keywords":
+            return self.partition_index.classify(query)
+        return []
+
+    def _vector_hits(self, query: str, rows: np.ndarray, k: int) -> List[Document]:
+        embedding = self.vectorstore.embeddings.embed_query(query)
+        if hasattr(self.vectorstore, "index_to_docstore_id"):
+            # FAISS store: the index skips vectors outside the selected ids
+            import faiss
+            params = faiss.SearchParameters(sel=faiss.IDSelectorBatch(np.asarray(rows, dtype=np.int64)))
+            _, found = self.vectorstore.index.search(
+                np.asarray([embedding], dtype=np.float32), min(k, len(rows)), params=params
+            )
+            ids = [self.vectorstore.index_to_docstore_id[int(i)] for i in found[0] if i >= 0]
+            return self.vectorstore.get_by_ids(ids)
+        return self.vectorstore.similarity_search_by_vector(embedding, k=k, rows=rows)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        names = self.scope(query)
+        rows = self.partition_index.rows(names) if names else None
+        if rows is None or len(rows) < self.k:
+            return self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+        logger.debug(f"Searching {len(rows)} of {self.partition_index.size} chunks in {', '.join(names)}")
+        if self.lexical_index is None:
+            return self._vector_hits(query, rows, self.k)
+
+        # Candidates as deep, relative to the partition, as over all chunks, so
+        # fusion does not promote chunks that rank low on one of the lists
+        fetch_k = max(self.k, math.ceil(self.fetch_k * len(rows) / max(self.partition_index.size, 1)))
+        vector_hits = self._vector_hits(query, rows, fetch_k)
+        lexical_ids = [doc_id for doc_id, _ in self.lexical_index.search(query, fetch_k, rows=rows)]
+        lexical_hits = self.vectorstore.get_by_ids(lexical_ids) if lexical_ids else []
+        fused = reciprocal_rank_fusion(
+            [vector_hits, lexical_hits],
+            [self.vector_weight, self.lexical_weight],
+            self.rrf_k
+        )
+        return fused[:self.k]
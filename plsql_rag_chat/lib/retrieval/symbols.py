@@ -0,0 +1,286 @@
+# plsql_rag_chat/lib/retrieval/symbols.py
+
+import json
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+logger = logging.getLogger(__name__)
+
+SYMBOLS_FILE = "symbols.db"
+SYMBOLS_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE packages (
+    file_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    purpose TEXT,
+    routines INTEGER NOT NULL
+);
+CREATE TABLE symbols (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    package TEXT NOT NULL,
+    type TEXT,
+    category TEXT,
+    parameters TEXT,
+    return_type TEXT,
+    file_name TEXT NOT NULL,
+    start INTEGER,
+    "end" INTEGER,
+    has_body INTEGER NOT NULL,
+    chunk_ids TEXT NOT NULL
+);
+CREATE INDEX symbols_key ON symbols (key);
+CREATE INDEX symbols_package ON symbols (package, key);
+CREATE INDEX symbols_category ON symbols (category, key);
+"""
+
+_COLUMNS = (
+    "name, package, type, category, parameters, return_type, file_name, "
+    "start, \"end\", has_body, chunk_ids"
+)
+
+# Names as written in a question, optionally qualified by their package
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_$#]*(?:\.[A-Za-z_][A-Za-z0-9_$#]*)?")
+
+def _prefix_range(prefix: str) -> Tuple[str, str]:
+    """Bounds of the keys starting with `prefix`, so the B-tree index serves prefix search"""
+    return prefix, prefix + "\U0010ffff"
+
+def _row_to_symbol(row: Tuple) -> Dict[str, Any]:
+    name, package, kind, category, parameters, return_type, file_name, start, end, has_body, chunk_ids = row
+    return {
+        "name": name,
+        "package": package,
+        "type": kind,
+        "category": category,
+        "parameters": parameters,
+        "return_type": return_type,
+        "file_name": file_name,
+        "start": start,
+        "end": end,
+        "has_body": bool(has_body),
+        "chunk_ids": json.loads(chunk_ids)
+    }
+
+def symbol_packages(
+    documents: Iterable[Tuple[str, Document]],
+    routines: Optional[Dict[str, List[Dict[str, Any]]]] = None
+) -> List[Dict[str, Any]]:
+    """Packages with their routines and the ids of the chunks covering each routine
+
+    `routines` maps file names to their parsed routines, for chunks read back
+    from a store, which does not keep them.
+    """
+    routines = routines or {}
+    packages: Dict[str, Dict[str, Any]] = {}
+    for doc_id, doc in documents:
+        metadata = doc.metadata
+        file_name = metadata.get("file_name")
+        if not file_name:
+            continue
+        package = packages.setdefault(file_name, {
+            "package_name": metadata.get("package_name") or "Unknown",
+            "file_name": file_name,
+            "purpose": metadata.get("purpose", ""),
+            "routines": routines.get(file_name) or metadata.get("routines") or [],
+            "chunks": []
+        })
+        if metadata.get("start_index") is not None:
+            package["chunks"].append((metadata["start_index"], metadata["end_index"], doc_id))
+    return list(packages.values())
+
+class SymbolIndex:
+    """Routines keyed by name, package and category in SQLite
+
+    Built at ingestion time next to the vector store, so the package explorer
+    and exact routine lookups read a few B-tree pages instead of the metadata
+    JSON. Each routine records its signature, the character span of its
+    declaration or definition and the ids of the chunks covering that span.
+    Names are matched case-insensitively, by prefix or exactly.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, packages: Iterable[Dict[str, Any]], path: Any = ":memory:") -> "SymbolIndex":
+        """Index the routines of metadata-style package entries into `path`
+
+        Entries carrying `chunks`, a list of (start, end, id) triples as made
+        by `symbol_packages`, also map each routine to its chunks.
+        """
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        conn.executescript(_SCHEMA)
+        rows, package_rows = [], []
+        for package in packages:
+            routines = package.get("routines") or []
+            chunks = sorted(package.get("chunks") or [])
+            package_name = package.get("package_name") or "Unknown"
+            # Metadata written before file names were recorded has none
+            file_name = package.get("file_name") or ""
+            package_rows.append((file_name, package_name, package.get("purpose", ""), len(routines)))
+            for routine in routines:
+                start, end = routine.get("start"), routine.get("end")
+                covering = []
+                if start is not None and end is not None:
+                    covering = [doc_id for chunk_start, chunk_end, doc_id in chunks
+                                if chunk_start < end and chunk_end > start]
+                rows.append((
+                    routine["name"].upper(), routine["name"], package_name,
+                    (routine.get("type") or "").upper(), routine.get("category"), routine.get("parameters") or "",
+                    routine.get("return_type"), file_name, start, end,
+                    int(bool(routine.get("has_body"))), json.dumps(covering)
+                ))
+        with conn:
+            conn.executemany("INSERT INTO packages VALUES (?, ?, ?, ?)", package_rows)
+            conn.executemany(f"INSERT INTO symbols (key, {_COLUMNS}) VALUES ({', '.join('?' * 12)})", rows)
+            conn.execute(f"PRAGMA user_version = {SYMBOLS_VERSION}")
+        logger.info(f"Indexed {len(rows)} routines of {len(package_rows)} packages")
+        return cls(conn)
+
+    @classmethod
+    def load(cls, store_dir: Path) -> Optional["SymbolIndex"]:
+        """Open the symbol index of a store read-only, or None if it has none"""
+        source = Path(store_dir) / SYMBOLS_FILE
+        if not source.exists():
+            return None
+        conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True, check_same_thread=False)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SYMBOLS_VERSION:
+            logger.warning(f"Ignoring symbol index with version {version}")
+            conn.close()
+            return None
+        return cls(conn)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+
+    def packages(self) -> List[Dict[str, Any]]:
+        """Package names with their purpose and routine count, by name"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, file_name, purpose, routines FROM packages ORDER BY name, file_name"
+            ).fetchall()
+        return [{"name": n, "file_name": f, "purpose": p, "routines": r} for n, f, p, r in rows]
+
+    def categories(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT category FROM symbols ORDER BY category").fetchall()
+        return [row[0] for row in rows if row[0]]
+
+    def search(
+        self,
+        prefix: str = "",
+        package: Optional[str] = None,
+        category: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Number of routines matching, and one page of them ordered by name
+
+        `prefix` matches the start of a routine name, or of `PACKAGE.ROUTINE`
+        when it contains a dot.
+        """
+        prefix = prefix.strip().upper()
+        where, params = [], []
+        if "." in prefix:
+            package_part, prefix = prefix.split(".", 1)
+            where.append("package = ?")
+            params.append(package_part)
+        if prefix:
+            where.append("key >= ? AND key < ?")
+            params.extend(_prefix_range(prefix))
+        if package:
+            where.append("package = ?")
+            params.append(package)
+        if category:
+            where.append("category = ?")
+            params.append(category)
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM symbols {clause}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM symbols {clause} ORDER BY key, package, has_body DESC, file_name "
+                "LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return total, [_row_to_symbol(row) for row in rows]
+
+    def lookup(self, name: str) -> List[Dict[str, Any]]:
+        """Every declaration and definition of a routine, `NAME` or `PACKAGE.NAME`"""
+        package, _, routine = name.strip().upper().rpartition(".")
+        query = f"SELECT {_COLUMNS} FROM symbols WHERE key = ?"
+        params = [routine]
+        if package:
+            query += " AND package = ?"
+            params.append(package)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY has_body DESC, package, start", params).fetchall()
+        return [_row_to_symbol(row) for row in rows]
+
+    def resolve(self, text: str) -> List[Dict[str, Any]]:
+        """Routines named exactly in `text`, definitions in preference to declarations
+
+        Only names written like code count: in upper case, with an underscore,
+        qualified by their package, or in the mixed case they were declared
+        with. Plain words such as "move" or "Position" are left to the search.
+        """
+        seen = set()
+        found: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+        for name in _IDENTIFIER_RE.findall(text):
+            code_like = name.isupper() or "_" in name or "." in name
+            if name.upper() in seen or (name.islower() and not code_like):
+                continue
+            seen.add(name.upper())
+            symbols = self.lookup(name)
+            if not code_like:
+                symbols = [s for s in symbols if s["name"] == name]
+            # The same routine may be named bare and qualified
+            for symbol in [s for s in symbols if s["has_body"]] or symbols:
+                found.setdefault((symbol["file_name"], symbol["start"]), symbol)
+        return list(found.values())
+
+class SymbolRetriever(BaseRetriever):
+    """Answer questions naming a routine with its definition, other questions with `retriever`
+
+    When the question names routines found in the symbol index, the chunks
+    covering their definitions are returned as they are, without running the
+    vector search, up to `max_chunks`.
+    """
+
+    retriever: Any
+    vectorstore: Any
+    symbol_index: Any
+    max_chunks: int = 6
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        ids: List[str] = []
+        for symbol in self.symbol_index.resolve(query):
+            ids.extend(doc_id for doc_id in symbol["chunk_ids"] if doc_id not in ids)
+        if ids:
+            documents = self.vectorstore.get_by_ids(ids[:self.max_chunks])
+            if documents:
+                logger.debug(f"Resolved {len(documents)} definition chunks by name")
+                return documents
+        return self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
@@ -0,0 +1,56 @@
+# plsql_rag_chat/lib/retrieval/tokenizer.py
+
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+# Possibly schema- or package-qualified identifiers: PL_PIG_CHESS_ENGINE.TRKDATA
+_IDENTIFIER_RE = re.compile(
+    r"[A-Za-z_][A-Za-z0-9_$#]*(?:\s*\.\s*[A-Za-z_][A-Za-z0-9_$#]*)*"
+)
+
+# Boundaries inside a single name: snake_case, camelCase and digits
+_PART_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+# Question words carry no signal; PL/SQL keywords are left to IDF weighting
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it me of on or
+please show tell that the this to used uses using what where which who why
+with work works explain describe
+""".split())
+
+def split_identifier(name: str) -> List[str]:
+    """Split one name on underscores and case changes: GetNextTil -> get, next, til"""
+    parts = []
+    for piece in name.split("_"):
+        parts.extend(part.lower() for part in _PART_RE.findall(piece))
+    return parts
+
+def tokenize_plsql(text: str) -> List[str]:
+    """Lexical terms for PL/SQL source or a question about it
+
+    Every identifier yields its lowercased full form, and qualified names also
+    yield each component, so `PL_PIG_CHESS_ENGINE.TRKDATA` matches a query for
+    the qualified name, for `trkdata` alone, and for "chess engine". Compound
+    names additionally yield their snake_case/camelCase parts.
+    """
+    terms = []
+    for match in _IDENTIFIER_RE.findall(text):
+        terms.extend(_identifier_terms(match))
+    return terms
+
+@lru_cache(maxsize=65536)
+def _identifier_terms(identifier: str) -> Tuple[str, ...]:
+    # Source code repeats the same names, so each is split only once
+    terms = []
+    components = [c.strip().lower() for c in identifier.split(".")]
+    if len(components) > 1:
+        terms.append(".".join(components))
+    for component, original in zip(components, identifier.split(".")):
+        if component in STOPWORDS:
+            continue
+        terms.append(component)
+        parts = split_identifier(original.strip())
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part not in STOPWORDS)
+    return tuple(terms)
@@ -1,5 +1,9 @@
+import math
 import streamlit as st
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from plsql_rag_chat.config.settings import PACKAGE_CATEGORIES
 
 def render_sidebar_config(model_params: Dict[str, Any]) -> Dict[str, Any]:
     """Render sidebar configuration controls"""
@@ -41,22 +45,117 @@ def render_sidebar_config(model_params: Dict[str, Any]) -> Dict[str, Any]:
     
     return updated_params
 
-def render_chess_package_explorer(metadata: Dict[str, Any]):
-    """Render the chess package explorer"""
+def render_search_scope(partition_index: Any) -> Optional[str]:
+    """Render the search scope selector; returns the chosen partition, None for automatic"""
+    if partition_index is None:
+        return None
+    
+    scopes = [f"category:{name}" for name in partition_index.categories()]
+    scopes += [f"package:{name}" for name in partition_index.packages()]
+    
+    def label(scope: Optional[str]) -> str:
+        if scope is None:
+            return "Automatic"
+        kind, name = scope.split(":", 1)
+        return PACKAGE_CATEGORIES.get(name, name) if kind == "category" else f"📦 {name}"
+    
+    return st.sidebar.selectbox(
+        "Search scope",
+        [None] + scopes,
+        format_func=label,
+        key="search_scope",
+        help="Search only this category or package; automatic scopes questions by the terms they use"
+    )
+
+def render_chess_package_explorer(symbol_index: Any, page_size: int = 20):
+    """Render the chess package explorer, one page of matching routines at a time"""
     st.sidebar.subheader("📚 Chess Engine Components")
     
-    if not metadata or "packages" not in metadata:
+    if symbol_index is None:
         st.sidebar.warning("No package information available")
         return
     
-    for package in metadata["packages"]:
-        with st.sidebar.expander(f"📦 {package.get('package_name', 'Unknown')}"):
-            st.write(f"**Purpose**: {package.get('purpose', 'N/A')}")
-            
-            if package.get("routines"):
-                st.write("**Routines:**")
-                for routine in package["routines"]:
-                    routine_type = routine.get("type", "").title()
-                    routine_name = routine.get("name", "")
-                    routine_params = routine.get("parameters", "")
-                    st.code(f"{routine_type}: {routine_name}({routine_params})")
+    packages = symbol_index.packages()
+    query = st.sidebar.text_input(
+        "Search routines",
+        key="explorer_query",
+        placeholder="MOVE or PL_PIG_CHESS_ENGINE.EVAL",
+        help="Routine names starting with this text; qualify it to search one package"
+    )
+    package = st.sidebar.selectbox(
+        "Package",
+        [None] + sorted({p["name"] for p in packages}),
+        format_func=lambda name: name or "All packages",
+        key="explorer_package"
+    )
+    category = st.sidebar.selectbox(
+        "Category",
+        [None] + symbol_index.categories(),
+        format_func=lambda name: PACKAGE_CATEGORIES.get(name, name) if name else "All categories",
+        key="explorer_category"
+    )
+    
+    # Back to the first page whenever the filters change
+    filters = (query, package, category)
+    if st.session_state.get("explorer_filters") != filters:
+        st.session_state.explorer_filters = filters
+        st.session_state.explorer_page = 0
+    page = st.session_state.explorer_page
+    
+    total, routines = symbol_index.search(
+        query, package=package, category=category, offset=page * page_size, limit=page_size
+    )
+    pages = max(1, math.ceil(total / page_size))
+    
+    for entry in packages:
+        if entry["name"] == package and entry["purpose"]:
+            st.sidebar.write(f"**Purpose**: {entry['purpose']}")
+            break
+    st.sidebar.caption(f"{total} routines · page {page + 1} of {pages}")
+    for routine in routines:
+        signature = f"{routine['type'].title()}: {routine['package']}.{routine['name']}({routine['parameters']})"
+        if routine["return_type"]:
+            signature += f" RETURN {routine['return_type']}"
+        if routine["file_name"]:
+            signature += f"  -- {routine['file_name']}"
+        st.sidebar.code(signature)
+    
+    previous, following = st.sidebar.columns(2)
+    if previous.button("◀ Previous", key="explorer_previous", disabled=page == 0, use_container_width=True):
+        st.session_state.explorer_page = page - 1
+        st.rerun()
+    if following.button("Next ▶", key="explorer_next", disabled=page + 1 >= pages, use_container_width=True):
+        st.session_state.explorer_page = page + 1
+        st.rerun()
+
+def render_chat_sessions(sessions: List[Dict[str, Any]], current: str) -> Optional[str]:
+    """Render stored conversations; returns the one chosen to reopen"""
+    if not sessions:
+        return None
+    
+    selected = None
+    with st.sidebar.expander("🕘 Past Conversations"):
+        for session in sessions:
+            updated = datetime.fromtimestamp(session["updated"]).strftime("%Y-%m-%d %H:%M")
+            label = f"{session['title'] or 'Untitled'} · {updated} · {session['messages']} messages"
+            if st.button(label, key=f"session_{session['session_id']}",
+                         disabled=session["session_id"] == current):
+                selected = session["session_id"]
+    return selected
+
+def render_backend_metrics(metrics: Dict[str, Dict[str, Any]]):
+    """Render queue depth and wait times of the LLM backends"""
+    if not metrics:
+        return
+    
+    with st.sidebar.expander("📈 Backend Load"):
+        for backend, values in metrics.items():
+            st.write(f"**{backend}**")
+            st.write(
+                f"In flight: {values['in_flight']} · Queued: {values['queue_depth']} · "
+                f"Coalesced: {values['coalesced']} · Timeouts: {values['timeouts']}"
+            )
+            st.write(
+                f"Wait p50/p95/p99: {values['wait_p50_ms']:.0f} / "
+                f"{values['wait_p95_ms']:.0f} / {values['wait_p99_ms']:.0f} ms"
+            )
@@ -1,15 +1,29 @@
 # plsql_rag_chat/lib/utils/__init__.py
 
-from .helpers import (
-    get_llm_handler,
-    load_vectorstore,
-    validate_vectorstore,
-    initialize_chat_chain
-)
+from plsql_rag_chat.lib.lazy import lazy_exports
 
-__all__ = [
-    'get_llm_handler',
-    'load_vectorstore',
-    'validate_vectorstore',
-    'initialize_chat_chain'
-]
\ No newline at end of file
+# Imported on first use, so the history store does not load the chain helpers
+_EXPORTS = {
+    'get_llm_handler': 'helpers',
+    'get_shared_llm_handler': 'helpers',
+    'is_backend_healthy': 'helpers',
+    'get_router_handler': 'helpers',
+    'schedule_handler': 'helpers',
+    'get_embeddings': 'helpers',
+    'load_vectorstore': 'helpers',
+    'get_source_code': 'helpers',
+    'load_lexical_index': 'helpers',
+    'load_symbol_index': 'helpers',
+    'load_call_graph': 'helpers',
+    'load_partition_index': 'helpers',
+    'get_retriever': 'helpers',
+    'get_response_cache': 'helpers',
+    'get_rewrite_cache': 'helpers',
+    'validate_vectorstore': 'helpers',
+    'create_chat_memory': 'helpers',
+    'get_chat_history_store': 'helpers',
+    'initialize_chat_chain': 'helpers'
+}
+
+__all__ = list(_EXPORTS)
+__getattr__ = lazy_exports(__name__, _EXPORTS)
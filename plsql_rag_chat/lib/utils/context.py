@@ -0,0 +1,180 @@
+# plsql_rag_chat/lib/utils/context.py
+
+import copy
+import logging
+from typing import Any, List, Optional, Tuple
+
+from langchain.chains.combine_documents.stuff import StuffDocumentsChain
+from langchain_core.documents import Document
+from langchain_core.callbacks import Callbacks
+
+from plsql_rag_chat.lib.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+def _span(doc: Document) -> Optional[Tuple[int, int]]:
+    start, end = doc.metadata.get("start_index"), doc.metadata.get("end_index")
+    if isinstance(start, int) and isinstance(end, int):
+        return start, end
+    return None
+
+def _same_source(a: Document, b: Document) -> bool:
+    return a.metadata.get("source") is not None and a.metadata.get("source") == b.metadata.get("source")
+
+def _text_overlap(first: str, second: str, min_overlap: int, max_overlap: int) -> int:
+    """Length of the longest suffix of `first` that is a prefix of `second`"""
+    for size in range(min(len(first), len(second), max_overlap), min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return size
+    return 0
+
+class ContextPacker:
+    """Fit retrieved chunks into the model's context window
+
+    Chunks are taken in retrieval order, best first. Duplicates and chunks
+    contained in another are dropped, and chunks that overlap or are
+    consecutive parts of the same routine are merged into one passage. The
+    passages are then packed while they fit into `max_tokens`, less the
+    tokens reserved for the answer and those of the rest of the prompt.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int,
+        answer_tokens: int = 512,
+        separator: str = "\n\n",
+        min_overlap: int = 20,
+        max_overlap: int = 400
+    ):
+        self.max_tokens = max_tokens
+        self.answer_tokens = answer_tokens
+        self.separator = separator
+        self.min_overlap = min_overlap
+        self.max_overlap = max_overlap
+
+    def budget(self, overhead_tokens: int = 0) -> int:
+        """Tokens left for context once the answer and the rest of the prompt are accounted for"""
+        return max(self.max_tokens - self.answer_tokens - overhead_tokens, 0)
+
+    def _combine(self, a: Document, b: Document) -> Optional[Document]:
+        """One passage covering both chunks, or None if they are unrelated"""
+        if a.page_content == b.page_content:
+            return a
+        if not _same_source(a, b):
+            return None
+
+        span_a, span_b = _span(a), _span(b)
+        if span_a and span_b:
+            first, second = (a, b) if span_a <= span_b else (b, a)
+            (start, first_end), (second_start, end) = _span(first), _span(second)
+            if end <= first_end:
+                return first
+            if second_start <= first_end:
+                text = first.page_content + second.page_content[first_end - second_start:]
+            elif (first.metadata.get("routine") == second.metadata.get("routine")
+                  and first.metadata.get("parts") == second.metadata.get("parts")
+                  and second.metadata.get("part") == first.metadata.get("part_end", first.metadata.get("part", 0)) + 1):
+                # Consecutive parts of one routine are separated by whitespace only
+                text = first.page_content + "\n" + second.page_content
+            else:
+                return None
+            return self._merged(first, second, text, start, end)
+
+        # Chunks without offsets, as in stores built by the original notebook
+        if b.page_content in a.page_content:
+            return a
+        if a.page_content in b.page_content:
+            return b
+        for first, second in ((a, b), (b, a)):
+            overlap = _text_overlap(first.page_content, second.page_content, self.min_overlap, self.max_overlap)
+            if overlap:
+                return self._merged(first, second, first.page_content + second.page_content[overlap:])
+        return None
+
+    @staticmethod
+    def _merged(
+        first: Document,
+        second: Document,
+        text: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> Document:
+        metadata = copy.copy(first.metadata)
+        if start is not None:
+            metadata["start_index"], metadata["end_index"] = start, end
+        if second.metadata.get("part") is not None:
+            metadata["part_end"] = second.metadata.get("part_end", second.metadata["part"])
+        names = list(first.metadata.get("routine_names") or [])
+        names.extend(n for n in second.metadata.get("routine_names") or [] if n not in names)
+        if names:
+            metadata["routine_names"] = names
+        metadata["tokens"] = estimate_tokens(text)
+        return Document(page_content=text, metadata=metadata)
+
+    def merge(self, docs: List[Document]) -> List[Document]:
+        """Deduplicate and merge chunks, ordering passages by the rank of their best chunk"""
+        passages: List[Tuple[int, Document]] = []
+        for rank, doc in enumerate(docs):
+            merged = True
+            while merged:
+                merged = False
+                for i, (passage_rank, passage) in enumerate(passages):
+                    combined = self._combine(passage, doc)
+                    if combined is not None:
+                        # The grown passage may now touch another one
+                        del passages[i]
+                        doc, rank, merged = combined, min(rank, passage_rank), True
+                        break
+            passages.append((rank, doc))
+        passages.sort(key=lambda passage: passage[0])
+        return [passage for _, passage in passages]
+
+    def pack(self, docs: List[Document], overhead_tokens: int = 0) -> List[Document]:
+        """Select the passages that fit into the context budget"""
+        budget = self.budget(overhead_tokens)
+        separator_tokens = estimate_tokens(self.separator)
+        packed: List[Document] = []
+        used = 0
+        passages = self.merge(docs)
+        for passage in passages:
+            cost = estimate_tokens(passage.page_content) + (separator_tokens if packed else 0)
+            if used + cost <= budget:
+                packed.append(passage)
+                used += cost
+
+        if not packed and passages and budget > 0:
+            # Better the start of the best passage than no context at all
+            best = passages[0]
+            text = best.page_content[:budget * CHARS_PER_TOKEN]
+            while text and estimate_tokens(text) > budget:
+                text = text[:int(len(text) * 0.9)]
+            packed.append(Document(page_content=text, metadata={**best.metadata, "tokens": estimate_tokens(text)}))
+            used = estimate_tokens(text)
+
+        logger.info(
+            f"Packed {len(packed)} of {len(passages)} passages ({len(docs)} chunks) "
+            f"into {used}/{budget} context tokens"
+        )
+        return packed
+
+class PackedStuffDocumentsChain(StuffDocumentsChain):
+    """`stuff` chain that packs the documents into the context budget first
+
+    The fixed part of the prompt (instructions, question and any other
+    inputs) is measured by rendering it with an empty context.
+    """
+
+    packer: Any
+
+    def _overhead_tokens(self, **kwargs: Any) -> int:
+        inputs = {k: v for k, v in kwargs.items() if k in self.llm_chain.prompt.input_variables}
+        inputs[self.document_variable_name] = ""
+        return estimate_tokens(self.llm_chain.prompt.format(**inputs))
+
+    def combine_docs(self, docs: List[Document], callbacks: Callbacks = None, **kwargs: Any) -> Tuple[str, dict]:
+        docs = self.packer.pack(docs, self._overhead_tokens(**kwargs))
+        return super().combine_docs(docs, callbacks=callbacks, **kwargs)
+
+    async def acombine_docs(self, docs: List[Document], callbacks: Callbacks = None, **kwargs: Any) -> Tuple[str, dict]:
+        docs = self.packer.pack(docs, self._overhead_tokens(**kwargs))
+        return await super().acombine_docs(docs, callbacks=callbacks, **kwargs)
@@ -1,21 +1,35 @@
 # plsql_rag_chat/lib/utils/helpers.py
 
+from __future__ import annotations
+
+import atexit
 from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Tuple, Dict, Any, Optional, List
 import json
 import logging
-from langchain_community.vectorstores import FAISS
-from langchain.chains import ConversationalRetrievalChain
-from langchain.prompts import PromptTemplate
-from langchain.memory import ConversationBufferWindowMemory
 
-# Local imports
-from plsql_rag_chat.lib.embeddings.hash_embeddings import SimpleHashEmbeddings
+# Local imports. LangChain, FAISS and the LLM provider SDKs are imported by
+# the functions that use them, so the app starts without loading them
+from plsql_rag_chat.lib.ingestion.store import resolve_store_dir
+from plsql_rag_chat.lib.utils.history_store import HISTORY_FILE, ChatHistoryStore
+from plsql_rag_chat.lib.utils.resources import ResourceRegistry, get_registry, index_fingerprint
 from plsql_rag_chat.lib.llm_handlers.base import BaseLLMHandler
-from plsql_rag_chat.lib.llm_handlers.ollama_handler import OllamaHandler
-from plsql_rag_chat.lib.llm_handlers.bedrock_handler import BedrockHandler
-from plsql_rag_chat.config.settings import SYSTEM_PROMPTS
+from plsql_rag_chat.config.settings import SYSTEM_PROMPTS, get_settings
+
+if TYPE_CHECKING:
+    from langchain.chains import ConversationalRetrievalChain
+    from langchain_core.documents import Document
+    from langchain_core.vectorstores import VectorStore
+    from plsql_rag_chat.lib.embeddings.cached_embeddings import CachedEmbeddings
+    from plsql_rag_chat.lib.llm_handlers.router import RouterHandler
+    from plsql_rag_chat.lib.retrieval.callgraph import CallGraph
+    from plsql_rag_chat.lib.retrieval.lexical import LexicalIndex
+    from plsql_rag_chat.lib.retrieval.partitions import PartitionIndex
+    from plsql_rag_chat.lib.retrieval.symbols import SymbolIndex
+    from plsql_rag_chat.lib.utils.memory import ConversationMemory
+    from plsql_rag_chat.lib.utils.response_cache import ResponseCache
+    from plsql_rag_chat.lib.utils.rewriter import RewriteCache
 
 # Set up logging
 logging.basicConfig(
@@ -30,12 +44,17 @@ def get_llm_handler(config: Dict[str, Any]) -> Optional[BaseLLMHandler]:
     logger.info(f"Initializing LLM handler for provider: {provider}")
     
     try:
+        # Only the chosen provider's client library is imported
         if provider == "ollama":
+            from plsql_rag_chat.lib.llm_handlers.ollama_handler import OllamaHandler
             logger.info(f"Creating Ollama handler with base URL: {config['ollama_base_url']}")
-            return OllamaHandler(base_url=config["ollama_base_url"])
+            return OllamaHandler(base_url=config["ollama_base_url"], **get_settings().ollama_http)
         elif provider == "bedrock":
+            from plsql_rag_chat.lib.llm_handlers.bedrock_handler import BedrockHandler
             logger.info(f"Creating Bedrock handler for region: {config['aws_region']}")
-            return BedrockHandler(region=config["aws_region"])
+            return BedrockHandler(region=config["aws_region"], model_id=config["bedrock_model_id"])
+        elif provider == "router":
+            return get_router_handler(get_settings().router)
         else:
             logger.error(f"Unsupported LLM provider: '{provider}'")
             return None
@@ -44,53 +63,432 @@ def get_llm_handler(config: Dict[str, Any]) -> Optional[BaseLLMHandler]:
         logger.exception("Detailed traceback:")
         return None
 
-@lru_cache(maxsize=1)
-def load_vectorstore(
-    store_path: Path,
-    metadata_path: Path
-) -> Tuple[Optional[FAISS], Optional[Dict[str, Any]]]:
-    """Load the vector store and metadata with caching"""
+def resource_registry() -> ResourceRegistry:
+    """Registry of the objects shared by every chat session in the process"""
+    return get_registry(check_interval=get_settings().resource["check_interval"])
+
+def get_shared_llm_handler(config: Dict[str, Any]) -> Optional[BaseLLMHandler]:
+    """LLM handler shared by every session using the same configuration"""
+    key = ("llm_handler",) + tuple(sorted((k, str(v)) for k, v in config.items()))
+    return resource_registry().get(key, lambda: get_llm_handler(config))
+
+def is_backend_healthy(llm_handler: BaseLLMHandler) -> bool:
+    """Health check of the handler's backend; a success is reused for a while"""
+    # Failures are not cached, so a backend that comes up is seen right away
+    healthy = resource_registry().get(
+        ("health", llm_handler.backend_id),
+        lambda: llm_handler.health_check() or None,
+        ttl=get_settings().resource["health_ttl"]
+    )
+    return bool(healthy)
+
+def get_router_handler(router_config: Dict[str, Any]) -> Optional[RouterHandler]:
+    """Build a router over the configured backends, each behind its own scheduler"""
+    from plsql_rag_chat.lib.llm_handlers.router import RouterHandler
+    
+    backends = []
+    for backend, target in router_config["backends"]:
+        if backend == "ollama":
+            from plsql_rag_chat.lib.llm_handlers.ollama_handler import OllamaHandler
+            backends.append(OllamaHandler(base_url=target, **get_settings().ollama_http))
+        elif backend == "bedrock":
+            from plsql_rag_chat.lib.llm_handlers.bedrock_handler import BedrockHandler
+            backends.append(BedrockHandler(
+                region=target, model_id=get_settings().llm["bedrock_model_id"], pin_model=True
+            ))
+        else:
+            logger.error(f"Unsupported router backend: '{backend}'")
+    if not backends:
+        logger.error("No backends configured for the router; set LLM_BACKENDS")
+        return None
+    logger.info(f"Creating router over {len(backends)} backends")
+    return RouterHandler(
+        [schedule_handler(backend) for backend in backends],
+        failure_threshold=router_config["failure_threshold"],
+        cooldown=router_config["cooldown"],
+        probe_interval=router_config["probe_interval"]
+    )
+
+def schedule_handler(llm_handler: BaseLLMHandler) -> BaseLLMHandler:
+    """Route a handler's generations through the shared scheduler of its backend"""
+    from plsql_rag_chat.lib.llm_handlers.router import RouterHandler
+    from plsql_rag_chat.lib.llm_handlers.scheduler import ScheduledHandler, get_scheduler
+    
+    # Routers schedule each of their backends separately
+    config = get_settings().scheduler
+    if not config["enabled"] or isinstance(llm_handler, (ScheduledHandler, RouterHandler)):
+        return llm_handler
+    scheduler = get_scheduler(
+        llm_handler.backend_id,
+        max_in_flight=config["max_in_flight"],
+        queue_timeout=config["queue_timeout"],
+        coalesce=config["coalesce"]
+    )
+    return ScheduledHandler(llm_handler, scheduler)
+
+def get_embeddings(cache_path: Optional[Path] = None) -> CachedEmbeddings:
+    """Create the configured embedding model wrapped in the persistent vector cache"""
+    from plsql_rag_chat.lib.embeddings.cached_embeddings import CachedEmbeddings
+    from plsql_rag_chat.lib.embeddings.hash_embeddings import SimpleHashEmbeddings
+    from plsql_rag_chat.lib.embeddings.hashing_embeddings import HashingEmbeddings
+    
+    settings = get_settings()
+    config = settings.embedding
+    models = {"hash": SimpleHashEmbeddings, "hashing": HashingEmbeddings}
+    model = models.get(config["model"])
+    if model is None:
+        logger.error(f"Unknown embedding model '{config['model']}'. Defaulting to 'hash'")
+        model = SimpleHashEmbeddings
+    return CachedEmbeddings(
+        model(dimension=config["dimension"]),
+        cache_dir=cache_path or settings.embedding_cache_path,
+        max_entries=config["cache_max_entries"]
+    )
+
+def load_vectorstore(store_path: Path) -> Optional[VectorStore]:
+    """Load the vector store, shared until the index files change"""
+    registry = resource_registry()
+    
+    def build():
+        vectorstore = _load_vectorstore(store_path)
+        if vectorstore is not None:
+            # Retrievers over the previous store must not outlive it
+            registry.invalidate_kind("retriever")
+        return vectorstore
+    
+    return registry.get(
+        ("vectorstore", str(Path(store_path).resolve())),
+        build,
+        fingerprint=lambda: index_fingerprint(store_path)
+    )
+
+def _load_vectorstore(store_path: Path) -> Optional[VectorStore]:
+    from langchain_community.vectorstores import FAISS
+    from plsql_rag_chat.lib.ingestion.docstore import CompactDocstore
+    from plsql_rag_chat.lib.ingestion.native_store import NativeVectorStore, is_native_store
+    
     try:
-        # Convert to absolute path and resolve any symlinks
-        store_path = Path(store_path).resolve()
-        metadata_path = Path(metadata_path).resolve()
+        # Convert to absolute path and follow the published generation, if any
+        store_path = resolve_store_dir(Path(store_path).resolve())
         
         logger.info(f"Loading vector store from: {store_path}")
         logger.info(f"Vector store files present: {list(store_path.glob('*'))}")
         
         # Create embeddings
-        embeddings = SimpleHashEmbeddings(dimension=384)
+        embeddings = get_embeddings()
         
-        # Load vector store with explicit path to folder
-        vectorstore = FAISS.load_local(
-            folder_path=str(store_path),
-            embeddings=embeddings,
-            allow_dangerous_deserialization=True
-        )
-        
-        logger.info("Successfully loaded vector store")
-        
-        # Load metadata if it exists
-        if metadata_path.exists():
-            logger.info(f"Loading metadata from: {metadata_path}")
-            with open(metadata_path, "r") as f:
-                metadata = json.load(f)
-            logger.info("Successfully loaded metadata")
+        if is_native_store(store_path):
+            # Memory-mapped vectors plus SQLite sidecar; nothing is unpickled
+            config = get_settings().vectorstore
+            vectorstore = NativeVectorStore.load_local(
+                store_path,
+                embeddings,
+                search_params={
+                    "nprobe": config["nprobe"],
+                    "efSearch": config["ef_search"],
+                    "refine": config["refine"]
+                }
+            )
         else:
-            logger.warning(f"Metadata file not found at: {metadata_path}")
-            metadata = {}
+            # Load vector store with explicit path to folder
+            vectorstore = FAISS.load_local(
+                folder_path=str(store_path),
+                embeddings=embeddings,
+                allow_dangerous_deserialization=True
+            )
             
-        return vectorstore, metadata
+            # Compact stores read chunk texts from the blob in the same directory
+            if isinstance(vectorstore.docstore, CompactDocstore):
+                vectorstore.docstore.attach(store_path)
+        
+        logger.info("Successfully loaded vector store")
+        return vectorstore
     except Exception as e:
         logger.error(f"Error loading vector store: {str(e)}", exc_info=True)
-        return None, None
+        return None
+
+def load_lexical_index(store_path: Path) -> Optional[LexicalIndex]:
+    """Load the BM25 index written next to the vector store, if any, shared until it changes"""
+    # Wrapped in a tuple so that a store without a lexical index is cached too
+    loaded = resource_registry().get(
+        ("lexical_index", str(Path(store_path).resolve())),
+        lambda: (_load_lexical_index(store_path),),
+        fingerprint=lambda: index_fingerprint(store_path)
+    )
+    return loaded[0]
+
+def _load_lexical_index(store_path: Path) -> Optional[LexicalIndex]:
+    from plsql_rag_chat.lib.retrieval.lexical import LexicalIndex
+    
+    try:
+        store_path = resolve_store_dir(Path(store_path).resolve())
+        lexical_index = LexicalIndex.load(store_path)
+        if lexical_index is None:
+            logger.warning(f"No lexical index in {store_path}, using vector search only")
+        else:
+            logger.info(f"Loaded lexical index over {len(lexical_index)} chunks")
+        return lexical_index
+    except Exception as e:
+        logger.error(f"Error loading lexical index: {str(e)}", exc_info=True)
+        return None
+
+def load_symbol_index(store_path: Path, metadata_path: Optional[Path] = None) -> Optional[SymbolIndex]:
+    """Load the routine index written next to the vector store, shared until it changes
+
+    Stores indexed before the symbol index existed fall back to an in-memory
+    index of `metadata_path`, which lists routines but cannot resolve them to
+    chunks.
+    """
+    loaded = resource_registry().get(
+        ("symbol_index", str(Path(store_path).resolve()), str(metadata_path)),
+        lambda: (_load_symbol_index(store_path, metadata_path),),
+        fingerprint=lambda: index_fingerprint(store_path, metadata_path)
+    )
+    return loaded[0]
+
+def _load_symbol_index(store_path: Path, metadata_path: Optional[Path] = None) -> Optional[SymbolIndex]:
+    from plsql_rag_chat.lib.retrieval.symbols import SymbolIndex
+    
+    try:
+        store_path = resolve_store_dir(Path(store_path).resolve())
+        symbol_index = SymbolIndex.load(store_path)
+        if symbol_index is not None:
+            logger.info(f"Loaded symbol index with {len(symbol_index)} routines")
+            return symbol_index
+        if metadata_path is None or not Path(metadata_path).exists():
+            logger.warning(f"No symbol index in {store_path}")
+            return None
+        logger.warning(f"No symbol index in {store_path}, indexing routines from {metadata_path}")
+        with open(metadata_path, "r") as f:
+            metadata = json.load(f)
+        return SymbolIndex.build(metadata.get("packages", []))
+    except Exception as e:
+        logger.error(f"Error loading symbol index: {str(e)}", exc_info=True)
+        return None
+
+def load_call_graph(store_path: Path) -> Optional[CallGraph]:
+    """Load the routine call graph written next to the vector store, if any, shared until it changes"""
+    loaded = resource_registry().get(
+        ("call_graph", str(Path(store_path).resolve())),
+        lambda: (_load_call_graph(store_path),),
+        fingerprint=lambda: index_fingerprint(store_path)
+    )
+    return loaded[0]
+
+def _load_call_graph(store_path: Path) -> Optional[CallGraph]:
+    from plsql_rag_chat.lib.retrieval.callgraph import CallGraph
+    
+    try:
+        store_path = resolve_store_dir(Path(store_path).resolve())
+        call_graph = CallGraph.load(store_path)
+        if call_graph is None:
+            logger.warning(f"No call graph in {store_path}, retrieved routines are not expanded")
+        else:
+            logger.info(f"Loaded call graph with {len(call_graph)} routines and {call_graph.edges} calls")
+        return call_graph
+    except Exception as e:
+        logger.error(f"Error loading call graph: {str(e)}", exc_info=True)
+        return None
+
+def load_partition_index(store_path: Path) -> Optional[PartitionIndex]:
+    """Load the package and category partitions written next to the vector store, if any"""
+    loaded = resource_registry().get(
+        ("partition_index", str(Path(store_path).resolve())),
+        lambda: (_load_partition_index(store_path),),
+        fingerprint=lambda: index_fingerprint(store_path)
+    )
+    return loaded[0]
+
+def _load_partition_index(store_path: Path) -> Optional[PartitionIndex]:
+    from plsql_rag_chat.lib.retrieval.partitions import PartitionIndex
+    
+    try:
+        store_path = resolve_store_dir(Path(store_path).resolve())
+        partition_index = PartitionIndex.load(store_path)
+        if partition_index is None:
+            logger.warning(f"No partitions in {store_path}, every question searches all chunks")
+        else:
+            logger.info(f"Loaded {len(partition_index)} partitions over {partition_index.size} chunks")
+        return partition_index
+    except Exception as e:
+        logger.error(f"Error loading partitions: {str(e)}", exc_info=True)
+        return None
+
+def get_retriever(
+    vectorstore: VectorStore,
+    model_params: Dict[str, Any],
+    lexical_index: Optional[LexicalIndex] = None,
+    symbol_index: Optional[SymbolIndex] = None,
+    call_graph: Optional[CallGraph] = None,
+    partition_index: Optional[PartitionIndex] = None,
+    partitions: Optional[List[str]] = None
+):
+    """Retriever used by the chat chain, shared by sessions with the same settings and scope"""
+    registry = resource_registry()
+    
+    def build():
+        return _build_retriever(
+            vectorstore, model_params, lexical_index, symbol_index, call_graph, partition_index, partitions
+        )
+    
+    # Only retrievers over the shared store are kept; they are dropped when it is reloaded
+    if not any(loaded is vectorstore for loaded in registry.values("vectorstore")):
+        return build()
+    settings = get_settings()
+    key = (
+        "retriever", id(vectorstore), id(lexical_index), id(symbol_index), id(call_graph),
+        id(partition_index), tuple(partitions or ()), model_params["retrieval_k"],
+        model_params["context_length"], *settings.retrieval.values(),
+        *settings.symbols.values(), settings.context["answer_tokens"]
+    )
+    return registry.get(key, build)
+
+def _build_retriever(
+    vectorstore: VectorStore,
+    model_params: Dict[str, Any],
+    lexical_index: Optional[LexicalIndex] = None,
+    symbol_index: Optional[SymbolIndex] = None,
+    call_graph: Optional[CallGraph] = None,
+    partition_index: Optional[PartitionIndex] = None,
+    partitions: Optional[List[str]] = None
+):
+    settings = get_settings()
+    config = settings.retrieval
+    if config["mode"] != "hybrid":
+        lexical_index = None
+    if lexical_index is not None:
+        from plsql_rag_chat.lib.retrieval.hybrid import HybridRetriever
+        retriever = HybridRetriever(
+            vectorstore=vectorstore,
+            lexical_index=lexical_index,
+            k=model_params["retrieval_k"],
+            fetch_k=config["fetch_k"],
+            rrf_k=config["rrf_k"],
+            vector_weight=config["vector_weight"],
+            lexical_weight=config["lexical_weight"]
+        )
+    else:
+        retriever = vectorstore.as_retriever(search_kwargs={"k": model_params["retrieval_k"]})
+    
+    # Scoped questions search only their package and category partitions
+    if partition_index is not None and (partitions or config["routing"] == "keywords"):
+        from plsql_rag_chat.lib.retrieval.partitions import PartitionedRetriever
+        retriever = PartitionedRetriever(
+            retriever=retriever,
+            vectorstore=vectorstore,
+            partition_index=partition_index,
+            lexical_index=lexical_index,
+            partitions=list(partitions or []),
+            routing=config["routing"],
+            k=model_params["retrieval_k"],
+            fetch_k=config["fetch_k"],
+            rrf_k=config["rrf_k"],
+            vector_weight=config["vector_weight"],
+            lexical_weight=config["lexical_weight"]
+        )
+    
+    # Questions naming a routine go straight to its definition
+    if symbol_index is not None and settings.symbols["lookup"]:
+        from plsql_rag_chat.lib.retrieval.symbols import SymbolRetriever
+        retriever = SymbolRetriever(
+            retriever=retriever,
+            vectorstore=vectorstore,
+            symbol_index=symbol_index,
+            max_chunks=settings.symbols["max_chunks"]
+        )
+    
+    # Routines called by the hits, within the room left for context
+    if call_graph is not None and config["expand"] == "calls" and config["expand_k"] > 0:
+        from plsql_rag_chat.lib.retrieval.callgraph import CallGraphRetriever
+        retriever = CallGraphRetriever(
+            retriever=retriever,
+            vectorstore=vectorstore,
+            call_graph=call_graph,
+            max_chunks=config["expand_k"],
+            max_tokens=model_params["context_length"] - settings.context["answer_tokens"]
+        )
+    return retriever
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> Optional[ResponseCache]:
+    """Answer cache shared by every chat session in the process"""
+    from plsql_rag_chat.lib.utils.response_cache import ResponseCache
+    
+    config = get_settings().response_cache
+    if not config["enabled"]:
+        return None
+    threshold = config["similarity_threshold"]
+    return ResponseCache(
+        max_entries=config["max_entries"],
+        ttl_seconds=config["ttl_seconds"],
+        similarity_threshold=threshold or None,
+        embeddings=get_embeddings() if threshold else None
+    )
+
+@lru_cache(maxsize=1)
+def get_rewrite_cache() -> RewriteCache:
+    """Cache of rewritten follow-up questions shared by every chat session"""
+    from plsql_rag_chat.lib.utils.rewriter import RewriteCache
+    return RewriteCache(max_entries=get_settings().rewrite["cache_size"])
+
+def get_rewrite_llm(llm_handler: BaseLLMHandler, llm: Any, model_params: Dict[str, Any]) -> Any:
+    """Model for rewriting follow-up questions: the configured one, else `llm`"""
+    from plsql_rag_chat.lib.llm_handlers.streaming import HandlerLLM
+    
+    model_name = get_settings().rewrite["model_name"]
+    if not model_name:
+        return llm
+    # Handlers read the model and temperature from each call's parameters
+    return HandlerLLM(
+        handler=schedule_handler(llm_handler),
+        model_params={**model_params, "model_name": model_name, "temperature": 0.0}
+    )
+
+def response_cache_scope(llm_handler: BaseLLMHandler, model_params: Dict[str, Any]) -> str:
+    """Cache scope naming the model and the parameters that shape its answers"""
+    return "|".join([
+        type(llm_handler).__name__,
+        str(model_params.get("model_name")),
+        str(model_params.get("temperature")),
+        str(model_params.get("context_length")),
+        str(model_params.get("top_k"))
+    ])
+
+def get_source_code(vectorstore: VectorStore, doc: Document) -> str:
+    """Return the formatted package source for a retrieved chunk"""
+    from plsql_rag_chat.lib.ingestion.docstore import CompactDocstore
+    from plsql_rag_chat.lib.ingestion.native_store import NativeVectorStore
+    
+    if isinstance(vectorstore, NativeVectorStore):
+        formatted = vectorstore.field(doc, "formatted_content")
+    elif isinstance(vectorstore.docstore, CompactDocstore):
+        formatted = vectorstore.docstore.field(doc, "formatted_content")
+    else:
+        formatted = doc.metadata.get("formatted_content")
+    return formatted if formatted is not None else doc.page_content
 
 def validate_vectorstore(store_path: Path) -> bool:
     """Validate that the vector store exists and contains required files"""
+    from plsql_rag_chat.lib.ingestion.native_store import (
+        is_native_store,
+        NORMS_FILE,
+        SIDECAR_FILE,
+        VECTORS_FILE
+    )
+    
     try:
-        store_path = Path(store_path).resolve()
+        store_path = resolve_store_dir(Path(store_path).resolve())
         logger.info(f"Validating vector store at: {store_path}")
         
+        if is_native_store(store_path):
+            required = [store_path / name for name in (VECTORS_FILE, NORMS_FILE, SIDECAR_FILE)]
+            missing = [path for path in required if not path.exists()]
+            if missing:
+                logger.error(f"Missing native vector store files: {missing}")
+                return False
+            logger.info("Vector store validation successful")
+            return True
+        
         index_path = store_path / "index.faiss"
         pickle_path = store_path / "index.pkl"
         
@@ -119,34 +517,76 @@ def validate_vectorstore(store_path: Path) -> bool:
         logger.error(f"Error validating vector store: {str(e)}", exc_info=True)
         return False
 
+def create_chat_memory() -> ConversationMemory:
+    """Conversation memory for one chat session"""
+    from plsql_rag_chat.lib.utils.memory import ConversationMemory
+    return ConversationMemory(**get_settings().memory)
+
+@lru_cache(maxsize=1)
+def get_chat_history_store() -> Optional[ChatHistoryStore]:
+    """Persistent chat history shared by every chat session in the process"""
+    settings = get_settings()
+    if not settings.chat_history["enabled"]:
+        return None
+    try:
+        store = ChatHistoryStore(
+            settings.chat_histories_path / HISTORY_FILE,
+            batch_size=settings.chat_history["batch_size"],
+            flush_interval=settings.chat_history["flush_interval"]
+        )
+    except Exception as e:
+        logger.error(f"Error opening chat history store: {str(e)}", exc_info=True)
+        return None
+    # Buffered messages are written before the process exits
+    atexit.register(store.close)
+    return store
+
 def initialize_chat_chain(
     llm_handler: BaseLLMHandler,
-    vectorstore: FAISS,
-    model_params: Dict[str, Any]
+    vectorstore: VectorStore,
+    model_params: Dict[str, Any],
+    lexical_index: Optional[LexicalIndex] = None,
+    memory: Optional[ConversationMemory] = None,
+    symbol_index: Optional[SymbolIndex] = None,
+    call_graph: Optional[CallGraph] = None,
+    partition_index: Optional[PartitionIndex] = None,
+    partitions: Optional[List[str]] = None
 ) -> Optional[ConversationalRetrievalChain]:
-    """Initialize the conversational retrieval chain"""
+    """Initialize the conversational retrieval chain
+
+    Pass the session's `memory` to keep the conversation when the chain is
+    rebuilt, e.g. with new model parameters, and `partitions` to confine
+    retrieval to a package or category chosen in the sidebar.
+    """
+    from langchain.chains import ConversationalRetrievalChain
+    from langchain_core.prompts import PromptTemplate
+    from plsql_rag_chat.lib.llm_handlers.streaming import ANSWER_TAG
+    from plsql_rag_chat.lib.utils.context import ContextPacker, PackedStuffDocumentsChain
+    from plsql_rag_chat.lib.utils.memory import ConversationMemory
+    from plsql_rag_chat.lib.utils.response_cache import CachedCombineDocumentsChain
+    from plsql_rag_chat.lib.utils.rewriter import build_question_rewriter
+    
+    settings = get_settings()
     try:
         logger.info("Initializing chat chain with parameters: %s", model_params)
         
-        # Initialize the language model
-        llm = llm_handler.initialize_model(model_params)
+        # Initialize the language model behind the backend's admission control
+        llm = schedule_handler(llm_handler).initialize_model(model_params)
         if not llm:
             logger.error("Failed to initialize language model")
             return None
             
-        # Configure memory with explicit output key
-        memory = ConversationBufferWindowMemory(
-            k=5,
-            memory_key="chat_history",
-            output_key="answer",  # Specify which key to store in memory
-            return_messages=True
-        )
+        # Older turns are summarized by the same model, off the request path
+        if memory is None:
+            memory = create_chat_memory()
+        if isinstance(memory, ConversationMemory):
+            memory.llm = llm
         
         # Create the chain
         chain = ConversationalRetrievalChain.from_llm(
             llm=llm,
-            retriever=vectorstore.as_retriever(
-                search_kwargs={"k": model_params["retrieval_k"]}
+            retriever=get_retriever(
+                vectorstore, model_params, lexical_index, symbol_index, call_graph, partition_index, partitions
             ),
             memory=memory,
             return_source_documents=True,
@@ -166,6 +606,40 @@ def initialize_chat_chain(
             }
         )
         
+        # Follow-ups that stand on their own skip the condensing LLM call
+        chain.question_generator = build_question_rewriter(
+            get_rewrite_llm(llm_handler, llm, model_params),
+            mode=settings.rewrite["mode"],
+            rewrite_cache=get_rewrite_cache()
+        )
+        
+        # Deduplicate, merge and trim the retrieved chunks to fit num_ctx
+        stuff_chain = chain.combine_docs_chain
+        chain.combine_docs_chain = PackedStuffDocumentsChain(
+            llm_chain=stuff_chain.llm_chain,
+            document_prompt=stuff_chain.document_prompt,
+            document_variable_name=stuff_chain.document_variable_name,
+            document_separator=stuff_chain.document_separator,
+            verbose=stuff_chain.verbose,
+            packer=ContextPacker(
+                max_tokens=model_params["context_length"],
+                answer_tokens=settings.context["answer_tokens"],
+                separator=stuff_chain.document_separator
+            )
+        )
+        
+        # Repeated questions over the same retrieved code skip the LLM call
+        response_cache = get_response_cache()
+        if response_cache is not None:
+            chain.combine_docs_chain = CachedCombineDocumentsChain(
+                combine_docs_chain=chain.combine_docs_chain,
+                response_cache=response_cache,
+                scope=response_cache_scope(llm_handler, model_params)
+            )
+        
+        # Lets token callbacks stream the answer but not the condensed question
+        chain.combine_docs_chain.tags = [ANSWER_TAG]
+        
         logger.info("Successfully initialized chat chain")
         return chain
         
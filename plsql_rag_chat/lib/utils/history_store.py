@@ -0,0 +1,207 @@
+# plsql_rag_chat/lib/utils/history_store.py
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = "chat_history.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    metadata TEXT,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    messages INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated);
+CREATE INDEX IF NOT EXISTS messages_created ON messages (created);
+"""
+
+def _row_to_message(row: Tuple) -> Dict[str, Any]:
+    seq, role, content, created, metadata = row
+    return {
+        "seq": seq,
+        "role": role,
+        "content": content,
+        "created": created,
+        "metadata": json.loads(metadata) if metadata else {}
+    }
+
+class ChatHistoryStore:
+    """Append-only chat history in SQLite, indexed by session and time
+
+    Messages are buffered in memory and written in one transaction once
+    `batch_size` are pending or `flush_interval` seconds have passed, by a
+    background thread, so answering a question never waits for the disk.
+    Reads see buffered messages too. Sessions are read a page at a time,
+    newest first, so reopening a long conversation loads only what is shown.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 64, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending: List[Tuple] = []
+        self._next_seq: Dict[str, int] = {}
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="chat-history-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def _last_seq(self, session_id: str) -> int:
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return -1 if row[0] is None else row[0]
+
+    def append(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """Queue a message for writing and return its sequence number in the session"""
+        # Sessions reopened from disk continue after their last stored message
+        last = self._last_seq(session_id) if session_id not in self._next_seq else -1
+        with self._lock:
+            seq = self._next_seq.setdefault(session_id, last + 1)
+            self._next_seq[session_id] = seq + 1
+            self._pending.append((
+                session_id, seq, role, content, time.time(),
+                json.dumps(metadata) if metadata else None
+            ))
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+        return seq
+
+    def _write_loop(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write all buffered messages in one transaction"""
+        with self._db_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            try:
+                with self._conn:
+                    self._conn.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?)", batch)
+                    for session_id, _, role, content, created, _ in batch:
+                        # The first user message names the session
+                        self._conn.execute(
+                            "INSERT INTO sessions VALUES (?, ?, ?, ?, 1) "
+                            "ON CONFLICT(session_id) DO UPDATE SET updated = excluded.updated, "
+                            "messages = messages + 1, "
+                            "title = CASE WHEN title = '' THEN excluded.title ELSE title END",
+                            (session_id, content[:80] if role == "user" else "", created, created)
+                        )
+            except Exception as e:
+                logger.error(f"Error writing {len(batch)} chat messages: {str(e)}")
+                with self._lock:
+                    # Keep them for the next attempt, in order
+                    self._pending = batch + self._pending
+
+    def _buffered(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                _row_to_message((seq, role, content, created, metadata))
+                for sid, seq, role, content, created, metadata in self._pending
+                if sid == session_id
+            ]
+
+    def page(self, session_id: str, before: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Up to `limit` messages of a session older than seq `before` (default: the newest), oldest first"""
+        buffered = [m for m in self._buffered(session_id) if before is None or m["seq"] < before]
+        newest = buffered[-limit:]
+        remaining = limit - len(newest)
+        if remaining > 0:
+            bound = newest[0]["seq"] if newest else before
+            with self._db_lock:
+                rows = self._conn.execute(
+                    "SELECT seq, role, content, created, metadata FROM messages "
+                    "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                    (session_id, bound if bound is not None else 2 ** 62, remaining)
+                ).fetchall()
+            newest = [_row_to_message(row) for row in reversed(rows)] + newest
+        return newest
+
+    def list_sessions(self, limit: int = 20, before: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Sessions by last activity, newest first, that were updated before `before`"""
+        self.flush()
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT session_id, title, created, updated, messages FROM sessions "
+                "WHERE updated < ? ORDER BY updated DESC LIMIT ?",
+                (before if before is not None else float("inf"), limit)
+            ).fetchall()
+        return [
+            {"session_id": r[0], "title": r[1], "created": r[2], "updated": r[3], "messages": r[4]}
+            for r in rows
+        ]
+
+    def iter_turns(self, since: Optional[float] = None, batch: int = 500) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """(question, answer, answer metadata) of every answered question, oldest first
+
+        Used to warm caches from past sessions; reads `batch` rows at a time.
+        """
+        self.flush()
+        last = (since or 0.0, "", -1)
+        open_questions: Dict[str, str] = {}
+        while True:
+            with self._db_lock:
+                rows = self._conn.execute(
+                    "SELECT created, session_id, seq, role, content, metadata FROM messages "
+                    "WHERE (created, session_id, seq) > (?, ?, ?) ORDER BY created, session_id, seq LIMIT ?",
+                    (*last, batch)
+                ).fetchall()
+            if not rows:
+                return
+            for created, session_id, seq, role, content, metadata in rows:
+                if role == "user":
+                    open_questions[session_id] = content
+                elif role == "assistant" and session_id in open_questions:
+                    yield open_questions.pop(session_id), content, json.loads(metadata) if metadata else {}
+            last = rows[-1][:3]
+
+    def close(self):
+        """Stop the writer and write what is still buffered"""
+        self._stopped.set()
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
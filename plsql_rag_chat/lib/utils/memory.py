@@ -0,0 +1,160 @@
+# plsql_rag_chat/lib/utils/memory.py
+
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Tuple
+
+from langchain_core.memory import BaseMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from pydantic import PrivateAttr
+
+from plsql_rag_chat.lib.utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Summaries run off the request path; one worker per process is plenty
+_SUMMARIZER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+SUMMARY_PROMPT = """Progressively summarize a conversation about a PL/SQL chess engine's code.
+Keep the packages, routines and design points discussed, and the questions still open.
+Answer with the new summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{lines}
+
+New summary:"""
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut `text` to roughly `max_tokens` tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    text = text[:max_tokens * CHARS_PER_TOKEN]
+    while text and estimate_tokens(text) > max_tokens:
+        text = text[:int(len(text) * 0.9)]
+    return text.rstrip() + " ..."
+
+class ConversationMemory(BaseMemory):
+    """Bounded chat history for the question-condensing step
+
+    The last `max_turns` (question, answer) pairs are kept verbatim in a ring
+    buffer. Turns that fall out of it are folded into a running summary by the
+    LLM on a background thread, so saving a turn never waits for a model call.
+    Until a summary is ready, evicted turns are returned verbatim. The history
+    handed to the chain, summary included, is trimmed oldest first to
+    `max_tokens`, however long the session runs.
+    """
+
+    llm: Any = None
+    max_turns: int = 4
+    max_tokens: int = 768
+    summary_tokens: int = 256
+    memory_key: str = "chat_history"
+    input_key: str = "question"
+    output_key: str = "answer"
+
+    _turns: Deque[Tuple[str, str]] = PrivateAttr(default_factory=deque)
+    _pending: List[Tuple[str, str]] = PrivateAttr(default_factory=list)
+    _summary: str = PrivateAttr(default="")
+    _summarizing: bool = PrivateAttr(default=False)
+    _generation: int = PrivateAttr(default=0)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    @property
+    def summary(self) -> str:
+        with self._lock:
+            return self._summary
+
+    def turns(self) -> List[Tuple[str, str]]:
+        """Turns not yet folded into the summary, oldest first"""
+        with self._lock:
+            return self._pending + list(self._turns)
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            summary, turns = self._summary, self._pending + list(self._turns)
+
+        # The summary is bounded by summary_tokens; the newest turns fill the rest
+        messages: List[BaseMessage] = []
+        budget = self.max_tokens - (estimate_tokens(summary) if summary else 0)
+        for question, answer in reversed(turns):
+            cost = estimate_tokens(question) + estimate_tokens(answer)
+            if cost > budget:
+                if not messages:
+                    # Never drop the last turn entirely; follow-ups refer to it
+                    answer = _truncate(answer, max(budget - estimate_tokens(question), 0))
+                    messages = [HumanMessage(content=question), AIMessage(content=answer)]
+                break
+            messages = [HumanMessage(content=question), AIMessage(content=answer)] + messages
+            budget -= cost
+        if summary:
+            messages.insert(0, SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+        return {self.memory_key: messages}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]):
+        question = inputs.get(self.input_key, "")
+        answer = outputs.get(self.output_key, "")
+        with self._lock:
+            self._turns.append((question, answer))
+            while len(self._turns) > self.max_turns:
+                self._pending.append(self._turns.popleft())
+            self._schedule()
+
+    def _schedule(self):
+        # Caller holds the lock
+        if self._pending and not self._summarizing:
+            self._summarizing = True
+            _SUMMARIZER.submit(self._summarize)
+
+    def _summarize(self):
+        with self._lock:
+            summary, batch, generation = self._summary, list(self._pending), self._generation
+        try:
+            summary = self._fold(summary, batch)
+        except Exception as e:
+            logger.warning(f"Error summarizing conversation, keeping questions only: {str(e)}")
+            summary = self._fold_questions(summary, batch)
+        with self._lock:
+            self._summarizing = False
+            if generation == self._generation:
+                self._summary = summary
+                del self._pending[:len(batch)]
+            self._schedule()
+
+    def _fold(self, summary: str, batch: List[Tuple[str, str]]) -> str:
+        """Running summary extended with `batch`"""
+        if self.llm is None:
+            return self._fold_questions(summary, batch)
+        lines = "\n".join(f"Human: {q}\nAssistant: {_truncate(a, self.summary_tokens)}" for q, a in batch)
+        prompt = SUMMARY_PROMPT.format(
+            max_words=self.summary_tokens * 3 // 4,
+            summary=summary or "(none)",
+            lines=lines
+        )
+        result = self.llm.invoke(prompt)
+        return _truncate(str(getattr(result, "content", result)).strip(), self.summary_tokens)
+
+    def _fold_questions(self, summary: str, batch: List[Tuple[str, str]]) -> str:
+        """Summary that just lists the questions asked, newest last"""
+        asked = "; ".join(q for q, _ in batch)
+        text = f"{summary} {asked}".strip() if summary else f"The user asked: {asked}"
+        if estimate_tokens(text) > self.summary_tokens:
+            # Drop the oldest questions first
+            text = "The user asked: ..." + text[-self.summary_tokens * CHARS_PER_TOKEN // 2:]
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._turns.clear()
+            self._pending.clear()
+            self._summary = ""
+            # A summary still running belongs to the old conversation
+            self._generation += 1
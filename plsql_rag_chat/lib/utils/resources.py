@@ -0,0 +1,143 @@
+# plsql_rag_chat/lib/utils/resources.py
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from plsql_rag_chat.lib.ingestion.store import CURRENT_FILE, resolve_store_dir
+
+logger = logging.getLogger(__name__)
+
+def index_fingerprint(store_path: Path, metadata_path: Optional[Path] = None) -> Tuple:
+    """Name, size and modification time of every live index file
+
+    Changes when a new generation is published, when the files of an
+    unversioned store are rewritten, or when the metadata file changes.
+    """
+    store_dir = resolve_store_dir(Path(store_path).resolve())
+    entries = [str(store_dir)]
+    paths = sorted(p for p in store_dir.glob("*") if p.is_file() and p.name != CURRENT_FILE)
+    if metadata_path is not None and Path(metadata_path).exists():
+        paths.append(Path(metadata_path).resolve())
+    for path in paths:
+        stat = path.stat()
+        entries.append((path.name, stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+class _Resource:
+    __slots__ = ("value", "fingerprint", "created", "checked")
+
+    def __init__(self, value: Any, fingerprint: Any):
+        self.value = value
+        self.fingerprint = fingerprint
+        self.created = self.checked = time.monotonic()
+
+class ResourceRegistry:
+    """Process-wide cache of objects that every chat session can share
+
+    Like Streamlit's `st.cache_resource`, but usable outside a Streamlit run
+    and invalidated by content rather than arguments: a resource registered
+    with a `fingerprint` function is rebuilt once the fingerprint changes,
+    checked at most every `check_interval` seconds, and one registered with a
+    `ttl` is rebuilt when older. Each resource is built once even when many
+    sessions ask for it at the same time. Factories returning None are not
+    cached, so a failed load is retried on the next request.
+    """
+
+    def __init__(self, check_interval: float = 2.0):
+        self.check_interval = check_interval
+        self._entries: Dict[Hashable, _Resource] = {}
+        self._build_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.invalidations = 0
+
+    def _fresh(self, key: Hashable, fingerprint: Optional[Callable[[], Any]], ttl: Optional[float]) -> Optional[_Resource]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        stale = ttl is not None and now - entry.created > ttl
+        if not stale and fingerprint is not None and now - entry.checked >= self.check_interval:
+            entry.checked = now
+            if fingerprint() != entry.fingerprint:
+                logger.info(f"Resource {key!r} changed on disk, rebuilding")
+                self.invalidations += 1
+                stale = True
+        if stale:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        return entry
+
+    def get(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        fingerprint: Optional[Callable[[], Any]] = None,
+        ttl: Optional[float] = None
+    ) -> Any:
+        """The shared value for `key`, built by `factory` when missing or stale"""
+        entry = self._fresh(key, fingerprint, ttl)
+        if entry is not None:
+            return entry.value
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            # Another session may have rebuilt it while this one waited
+            entry = self._fresh(key, fingerprint, ttl)
+            if entry is not None:
+                return entry.value
+
+            # Taken before building, so a change during the build is seen next time
+            current = fingerprint() if fingerprint is not None else None
+            start = time.perf_counter()
+            value = factory()
+            if value is None:
+                with self._lock:
+                    self._entries.pop(key, None)
+                return None
+            with self._lock:
+                self._entries[key] = _Resource(value, current)
+                self.builds += 1
+            logger.info(f"Built shared resource {key!r} in {(time.perf_counter() - start) * 1000:.0f}ms")
+            return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one resource, or all of them; sessions holding it keep their reference"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def values(self, kind: str) -> List[Any]:
+        """Current values of the resources whose key is a tuple starting with `kind`"""
+        with self._lock:
+            return [e.value for k, e in self._entries.items() if isinstance(k, tuple) and k and k[0] == kind]
+
+    def invalidate_kind(self, kind: str):
+        """Drop every resource whose key is a tuple starting with `kind`"""
+        with self._lock:
+            for key in [k for k in self._entries if isinstance(k, tuple) and k and k[0] == kind]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"resources": len(self._entries), "builds": self.builds, "invalidations": self.invalidations}
+
+_REGISTRY: Optional[ResourceRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_registry(check_interval: float = 2.0) -> ResourceRegistry:
+    """The registry shared by the whole process"""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = ResourceRegistry(check_interval=check_interval)
+        return _REGISTRY
@@ -0,0 +1,183 @@
+# plsql_rag_chat/lib/utils/response_cache.py
+
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.chains.combine_documents.base import BaseCombineDocumentsChain
+from langchain_core.embeddings import Embeddings
+from langchain_core.documents import Document
+from langchain_core.callbacks import Callbacks
+
+from plsql_rag_chat.lib.retrieval.hybrid import document_key
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, without trailing punctuation"""
+    return _WHITESPACE_RE.sub(" ", question).strip().lower().rstrip("?!. ")
+
+class _Entry:
+    __slots__ = ("answer", "chunks", "scope", "created", "vector")
+
+    def __init__(self, answer: str, chunks: Tuple[str, ...], scope: str, vector: Optional[np.ndarray]):
+        self.answer = answer
+        self.chunks = chunks
+        self.scope = scope
+        self.created = time.monotonic()
+        self.vector = vector
+
+class ResponseCache:
+    """Process-wide LRU cache of generated answers with a time-to-live
+
+    Answers are keyed by the normalized question, the retrieved chunks and a
+    scope string naming the model and its generation parameters, so the same
+    question over different code or with a different model is never served a
+    stale answer. With `similarity_threshold` and `embeddings` set, a miss
+    falls back to the cached question in the same scope whose embedding is
+    most similar, provided at least half of its chunks were retrieved again.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        similarity_threshold: Optional[float] = None,
+        embeddings: Optional[Embeddings] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embeddings = embeddings
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def semantic(self) -> bool:
+        return bool(self.similarity_threshold) and self.embeddings is not None
+
+    @staticmethod
+    def make_key(question: str, chunks: Tuple[str, ...], scope: str) -> str:
+        material = "\x1f".join((scope, normalize_question(question)) + chunks)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, question: str, documents: List[Document], scope: str) -> Optional[str]:
+        """Return a cached answer for this question and context, if any"""
+        chunks = tuple(document_key(doc) for doc in documents)
+        key = self.make_key(question, chunks, scope)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.answer
+
+        if self.semantic:
+            match = self._nearest(question, chunks, scope)
+            if match is not None:
+                with self._lock:
+                    self.semantic_hits += 1
+                return match
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question: str, documents: List[Document], scope: str, answer: str):
+        """Store a freshly generated answer"""
+        chunks = tuple(document_key(doc) for doc in documents)
+        vector = self._embed(question) if self.semantic else None
+        with self._lock:
+            key = self.make_key(question, chunks, scope)
+            self._entries[key] = _Entry(answer, chunks, scope, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses
+        }
+
+    def _expire(self):
+        """Drop entries older than the TTL; callers hold the lock"""
+        deadline = time.monotonic() - self.ttl_seconds
+        for key in [k for k, e in self._entries.items() if e.created < deadline]:
+            del self._entries[key]
+
+    def _embed(self, question: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(normalize_question(question)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _nearest(self, question: str, chunks: Tuple[str, ...], scope: str) -> Optional[str]:
+        query = self._embed(question)
+        retrieved = set(chunks)
+        best_key, best_score = None, self.similarity_threshold
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.scope != scope or entry.vector is None:
+                    continue
+                if len(retrieved.intersection(entry.chunks)) * 2 < len(entry.chunks):
+                    continue
+                score = float(entry.vector @ query)
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            logger.info(f"Near-duplicate cache hit (similarity {best_score:.3f})")
+            return self._entries[best_key].answer
+
+class CachedCombineDocumentsChain(BaseCombineDocumentsChain):
+    """Answer from the response cache before running the wrapped combine chain
+
+    Wrapped around the `stuff` chain of ConversationalRetrievalChain, it sees
+    the standalone question and the retrieved documents, which are exactly
+    what the answer prompt is built from.
+    """
+
+    combine_docs_chain: BaseCombineDocumentsChain
+    response_cache: Any
+    scope: str = ""
+
+    def combine_docs(self, docs: List[Document], callbacks: Callbacks = None, **kwargs: Any) -> Tuple[str, dict]:
+        question = kwargs.get("question", "")
+        start = time.perf_counter()
+        answer = self.response_cache.get(question, docs, self.scope)
+        if answer is not None:
+            logger.info(f"Answered from response cache in {(time.perf_counter() - start) * 1000:.2f}ms")
+            return answer, {}
+        answer, extra = self.combine_docs_chain.combine_docs(docs, callbacks=callbacks, **kwargs)
+        self.response_cache.put(question, docs, self.scope, answer)
+        return answer, extra
+
+    async def acombine_docs(self, docs: List[Document], callbacks: Callbacks = None, **kwargs: Any) -> Tuple[str, dict]:
+        question = kwargs.get("question", "")
+        answer = self.response_cache.get(question, docs, self.scope)
+        if answer is not None:
+            return answer, {}
+        answer, extra = await self.combine_docs_chain.acombine_docs(docs, callbacks=callbacks, **kwargs)
+        self.response_cache.put(question, docs, self.scope, answer)
+        return answer, extra
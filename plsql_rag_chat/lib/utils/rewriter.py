@@ -0,0 +1,157 @@
+# plsql_rag_chat/lib/utils/rewriter.py
+
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from langchain.chains import LLMChain
+from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
+from langchain_core.callbacks import AsyncCallbackManagerForChainRun, CallbackManagerForChainRun
+
+from plsql_rag_chat.lib.utils.response_cache import normalize_question
+
+logger = logging.getLogger(__name__)
+
+# Tag on the question-rewriting chain, for callbacks that time the stages
+REWRITE_TAG = "rewrite"
+
+REWRITE_MODES = ("auto", "always", "never")
+
+# Words that point back at earlier turns; a question without any of them is
+# taken to stand on its own
+_REFERENCE_WORDS = {
+    "it", "its", "it's", "this", "that", "these", "those", "they", "them", "their", "theirs",
+    "he", "she", "him", "her", "one", "ones", "former", "latter", "above", "previous",
+    "previously", "earlier", "before", "same", "also", "else", "again", "instead", "other",
+    "another", "more", "there", "here", "such", "then", "mentioned", "said"
+}
+_FOLLOW_UP_STARTS = ("and ", "but ", "so ", "or ", "also ", "what about", "how about", "why not", "what else")
+_WORD_RE = re.compile(r"[a-z']+")
+
+def is_self_contained(question: str, min_words: int = 4) -> bool:
+    """Whether `question` can be answered without the chat history
+
+    Short questions, ones that open like a follow-up ("and ...", "what
+    about ...") and ones with pronouns or references to earlier turns are not.
+    """
+    text = question.strip().lower()
+    words = _WORD_RE.findall(text)
+    if len(words) < min_words or text.startswith(_FOLLOW_UP_STARTS):
+        return False
+    return not any(word in _REFERENCE_WORDS for word in words)
+
+class RewriteCache:
+    """LRU cache of rewritten questions, keyed by question and chat history"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(question: str, chat_history: str) -> str:
+        return hashlib.sha256(f"{normalize_question(question)}\n{chat_history}".encode()).hexdigest()
+
+    def get(self, question: str, chat_history: str) -> Optional[str]:
+        key = self._key(question, chat_history)
+        with self._lock:
+            rewritten = self._entries.get(key)
+            if rewritten is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rewritten
+
+    def put(self, question: str, chat_history: str, rewritten: str):
+        key = self._key(question, chat_history)
+        with self._lock:
+            self._entries[key] = rewritten
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+class QuestionRewriteChain(LLMChain):
+    """Question generator that only calls the LLM when a question needs it
+
+    Drop-in replacement for the question generator of
+    ConversationalRetrievalChain. In "auto" mode self-contained questions are
+    passed through unchanged; "always" rewrites every follow-up and "never"
+    none. Rewrites are looked up in `rewrite_cache` first. The outputs carry
+    a "rewrite" key saying what happened: skipped, cached or rewritten.
+    """
+
+    mode: str = "auto"
+    rewrite_cache: Any = None
+
+    def _decide(self, inputs: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """Outputs that need no LLM call, or None"""
+        question = inputs["question"]
+        if self.mode == "never" or (self.mode == "auto" and is_self_contained(question)):
+            return {self.output_key: question, "rewrite": "skipped"}
+        if self.rewrite_cache is not None:
+            cached = self.rewrite_cache.get(question, inputs["chat_history"])
+            if cached is not None:
+                return {self.output_key: cached, "rewrite": "cached"}
+        return None
+
+    def _store(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> Dict[str, str]:
+        rewritten = outputs[self.output_key].strip()
+        if not rewritten:
+            # An empty rewrite would retrieve nothing useful
+            rewritten = inputs["question"]
+        elif self.rewrite_cache is not None:
+            self.rewrite_cache.put(inputs["question"], inputs["chat_history"], rewritten)
+        logger.info(f"Rewrote question {inputs['question']!r} as {rewritten!r}")
+        return {**outputs, self.output_key: rewritten, "rewrite": "rewritten"}
+
+    def _call(
+        self,
+        inputs: Dict[str, Any],
+        run_manager: Optional[CallbackManagerForChainRun] = None
+    ) -> Dict[str, str]:
+        outputs = self._decide(inputs)
+        if outputs is not None:
+            return outputs
+        return self._store(inputs, super()._call(inputs, run_manager=run_manager))
+
+    async def _acall(
+        self,
+        inputs: Dict[str, Any],
+        run_manager: Optional[AsyncCallbackManagerForChainRun] = None
+    ) -> Dict[str, str]:
+        outputs = self._decide(inputs)
+        if outputs is not None:
+            return outputs
+        return self._store(inputs, await super()._acall(inputs, run_manager=run_manager))
+
+def build_question_rewriter(
+    llm: Any,
+    mode: str = "auto",
+    rewrite_cache: Optional[RewriteCache] = None,
+    tags: Optional[List[str]] = None
+) -> QuestionRewriteChain:
+    """Question generator over `llm` with the standard condensing prompt"""
+    if mode not in REWRITE_MODES:
+        raise ValueError(f"Unknown rewrite mode {mode!r}, expected one of {REWRITE_MODES}")
+    return QuestionRewriteChain(
+        llm=llm,
+        prompt=CONDENSE_QUESTION_PROMPT,
+        mode=mode,
+        rewrite_cache=rewrite_cache,
+        tags=tags if tags is not None else [REWRITE_TAG]
+    )
@@ -0,0 +1,79 @@
+# plsql_rag_chat/lib/utils/timings.py
+
+import logging
+import time
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from plsql_rag_chat.lib.llm_handlers.streaming import ANSWER_TAG
+from plsql_rag_chat.lib.utils.rewriter import REWRITE_TAG
+
+logger = logging.getLogger(__name__)
+
+class StageTimingHandler(BaseCallbackHandler):
+    """Wall-clock time of each stage of a chat chain run
+
+    `timings` maps "rewrite", "retrieve", "answer" and "total" to seconds, for
+    the stages that ran; `rewrite` says whether the question was skipped,
+    cached or rewritten.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.rewrite: Optional[str] = None
+        self._started: Dict[UUID, tuple] = {}
+
+    def _start(self, run_id: UUID, stage: str):
+        self._started[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id: UUID) -> Optional[str]:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        stage, start = started
+        self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+        return stage
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, **kwargs):
+        if parent_run_id is None:
+            self._start(run_id, "total")
+        elif tags and REWRITE_TAG in tags:
+            self._start(run_id, "rewrite")
+        elif tags and ANSWER_TAG in tags:
+            self._start(run_id, "answer")
+
+    def on_chain_end(self, outputs: Dict[str, Any], *, run_id, **kwargs):
+        stage = self._end(run_id)
+        if stage == "rewrite" and isinstance(outputs, dict):
+            self.rewrite = outputs.get("rewrite")
+        elif stage == "total":
+            logger.info(f"Stage timings: {self.summary()}")
+
+    def on_chain_error(self, error: BaseException, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        # Nested retrievers are part of the outer one's time
+        if not any(stage == "retrieve" for stage, _ in self._started.values()):
+            self._start(run_id, "retrieve")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_retriever_error(self, error: BaseException, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def summary(self) -> str:
+        """One-line report such as "rewrite 0ms (skipped) · retrieve 12ms · answer 2.31s · total 2.33s\""""
+        parts = []
+        for stage in ("rewrite", "retrieve", "answer", "total"):
+            if stage not in self.timings:
+                continue
+            seconds = self.timings[stage]
+            text = f"{stage} {seconds * 1000:.0f}ms" if seconds < 1 else f"{stage} {seconds:.2f}s"
+            if stage == "rewrite" and self.rewrite:
+                text += f" ({self.rewrite})"
+            parts.append(text)
+        return " · ".join(parts)
@@ -0,0 +1,18 @@
+# plsql_rag_chat/lib/utils/tokens.py
+
+import re
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Typical BPE tokenizers average about four characters of code per token
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the LLM token count of `text` without loading a tokenizer
+
+    Takes the larger of the word/punctuation count and the character-based
+    estimate, so long identifiers and dense punctuation are both covered.
+    """
+    if not text:
+        return 0
+    return max(len(_TOKEN_RE.findall(text)), -(-len(text) // CHARS_PER_TOKEN))
@@ -12,8 +12,14 @@ setup(
         "python-dotenv>=1.0.0",
         "boto3>=1.34.0",
         "requests>=2.31.0",
+        "httpx>=0.25.0",
         "numpy>=1.26.0",
         "sqlparse>=0.4.4",
     ],
+    entry_points={
+        "console_scripts": [
+            "plsql-rag-ingest=plsql_rag_chat.lib.ingestion.cli:main",
+        ],
+    },
     python_requires=">=3.8",
 )
\ No newline at end of file